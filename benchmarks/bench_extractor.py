@@ -0,0 +1,65 @@
+"""
+Сравнение скорости однопроходного разбора (``quote_extractor``) с разбором через свойства ``Quote``.
+Совпадение результатов проверяется тестом ``tests/test_extractor.py``.
+
+Разбор HTML в дерево одинаков для обоих способов и занимает большую часть времени,
+поэтому по отдельности измеряется сбор полей из уже разобранного дерева
+и полный разбор страницы. Берётся лучший из нескольких замеров, чтобы шум машины не искажал сравнение.
+Запуск из корня репозитория: ``python -m benchmarks.bench_extractor``.
+"""
+import timeit
+from pathlib import Path
+
+from selectolax.lexbor import LexborHTMLParser
+
+from src.parser import Quote, QuotePage, QuoteRecord, QuotePageRecord
+from src.parser._entities.quote_extractor import extract_page, extract_quote, extract_quote_from_html
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+NUMBER = 200
+REPEATS = 7
+
+
+def best(func) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEATS)) / NUMBER
+
+
+def compare(html_page: str, is_page: bool) -> tuple[float, float, float, float]:
+    if is_page:
+        full_old = best(lambda: QuotePageRecord.from_page(QuotePage(html_page)))
+        full_new = best(lambda: extract_page(html_page))
+        article_tags = QuotePage(html_page).article_tags
+        header = None
+    else:
+        full_old = best(lambda: QuoteRecord.from_quote(Quote(html_page=html_page)))
+        full_new = best(lambda: extract_quote_from_html(html_page))
+        tree = LexborHTMLParser(html_page).body
+        article_tags = [tree.css_first('article')]
+        header = tree.css_first('h1')
+        header = header.text() if header is not None else None
+
+    def by_properties():
+        for article_tag in article_tags:
+            quote = Quote(article_tag=article_tag)
+            quote._parable_header_ = header
+            QuoteRecord.from_quote(quote)
+
+    def single_pass():
+        for article_tag in article_tags:
+            extract_quote(article_tag, header)
+
+    return best(by_properties), best(single_pass), full_old, full_new
+
+
+def main() -> None:
+    print(f'{"":<24} {"сбор полей":>28}  {"страница целиком":>28}')
+    for path in sorted(FIXTURES_DIR.glob('*.html')):
+        old, new, full_old, full_new = compare(path.read_text('utf-8'), path.name.startswith('page_'))
+        print(
+            f'{path.name:<24} {old * 1e6:7.1f} → {new * 1e6:7.1f} мкс (×{old / new:.2f})'
+            f'  {full_old * 1e6:7.1f} → {full_new * 1e6:7.1f} мкс (×{full_old / full_new:.2f})'
+        )
+
+
+if __name__ == '__main__':
+    main()
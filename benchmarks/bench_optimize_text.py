@@ -0,0 +1,30 @@
+"""
+Сравнение скорости ``parser.utils.optimize_text`` с прежней реализацией на фрагментах текста страниц-образцов.
+Совпадение результатов (в том числе на случайных строках) проверяется тестом ``tests/test_optimize_text.py``.
+Запуск из корня репозитория: ``python -m benchmarks.bench_optimize_text``.
+"""
+import timeit
+
+from src.parser import utils
+from tests.test_optimize_text import fixture_fragments, reference_optimize_text
+
+REPEATS = 200
+
+
+def main() -> None:
+    fragments = fixture_fragments()
+
+    def run(func) -> float:
+        return timeit.timeit(lambda: [func(text) for text in fragments], number=REPEATS) / REPEATS
+
+    old = run(reference_optimize_text)
+    new = run(utils.optimize_text)
+    batch = timeit.timeit(lambda: utils.optimize_texts(fragments), number=REPEATS) / REPEATS
+    print(f'Фрагментов: {len(fragments)}, суммарно {sum(map(len, fragments))} символов')
+    print(f'прежняя реализация  {old * 1e3:8.3f} мс')
+    print(f'optimize_text       {new * 1e3:8.3f} мс  (×{old / new:.2f})')
+    print(f'optimize_texts      {batch * 1e3:8.3f} мс  (×{old / batch:.2f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Бенчмарк парсера и форматеров Telegram на сохранённых страницах сайта-донора (работает без сети).
+Для каждого вида страниц измеряются время разбора, время получения каждого свойства ``Quote``/``QuotePage``,
+время форматирования и пиковое потребление памяти. Результаты сравниваются с базовым файлом.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.bench_parser                   # сравнение с benchmarks/baseline.json
+    python -m benchmarks.bench_parser --save-baseline   # запись новых базовых значений
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from selectolax.lexbor import LexborHTMLParser
+
+from src.parser import Quote, QuotePage, QuoteRecord, QuotePageRecord
+from src.parser.executor import parse_page, parse_quote
+from src.telegram.formatters.quote import TgQuoteFormatter
+from src.telegram.formatters.quote_page import TgPageFormatter
+from src.telegram.formatters.render_cache import render_cache
+
+BENCHMARKS_DIR = Path(__file__).parent
+FIXTURES_DIR = BENCHMARKS_DIR / 'fixtures'
+BASELINE_PATH = BENCHMARKS_DIR / 'baseline.json'
+CALIBRATION_CASE = 'calibration'
+CALIBRATION_REPEATS = 4  # Во сколько раз больше замеров у эталонной нагрузки: от неё зависят все сравнения
+KEY = ('https://citaty.info/bench', None)  # Ключ страницы в кеше представлений
+MIN_TIME_DELTA = 10e-6  # Меньшие изменения времени — шум замера, а не регрессия
+
+QUOTE_PROPERTIES = (
+    'id', 'type', 'rel_link', 'text', 'taxonomy', 'header', 'topics', 'image_links', 'explanation', 'has_original'
+)
+PAGE_PROPERTIES = ('header', 'article_tags', 'quotes', 'pagination', 'non_quote_search_results')
+
+# Вид страницы -> файл образца
+QUOTE_CASES = {
+    'quote_movie': 'quote_movie.html',
+    'quote_original': 'quote_original.html',
+    'quote_series': 'quote_series.html',
+    'quote_picture': 'quote_picture.html',
+    'quote_random': 'random.html',
+    'po': 'po.html',
+    'pritcha': 'pritcha.html',
+}
+PAGE_CASES = {
+    'page_category': 'page_category.html',
+    'page_search': 'page_search.html',
+    'page_search_empty': 'page_search_empty.html',
+}
+ORIGINAL_CASE = ('en_body', 'en_body.json')
+
+
+def timed(func: Callable, repeats: int, setup: Callable = None) -> float:
+    """
+    Минимальное из ``repeats`` времён выполнения ``func`` в секундах (наименее зашумлённая оценка). Если задан ``setup``, он вызывается
+    перед каждым замером (не учитываясь), а его результат передаётся в ``func``.
+    """
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()  # Как и в timeit, сборка мусора не должна попадать в замер
+    try:
+        for _ in range(repeats):
+            argument = setup() if setup else None
+            start = time.perf_counter()
+            func(argument) if setup else func()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return min(samples)
+
+
+def calibrate(repeats: int) -> float:
+    """
+    Время эталонной нагрузки (разбор и обход HTML без логики парсера). Времена сравниваются
+    с базовыми в пересчёте на него, поэтому базовый файл применим и на другой машине.
+    Вызывается до и после остальных замеров, и берётся меньшее время: случайная нагрузка на машину
+    во время одного замера иначе исказила бы пересчёт всех показателей сразу.
+    """
+    html_page = (FIXTURES_DIR / PAGE_CASES['page_category']).read_text('utf-8')
+    return timed(lambda: sum(1 for _ in LexborHTMLParser(html_page).body.traverse()), repeats * CALIBRATION_REPEATS)
+
+
+def peak_memory(func: Callable) -> int:
+    """
+    Пиковый объём памяти в байтах, выделенной через аллокатор Python во время выполнения ``func``
+    (включая память, которую через него получает Lexbor при разборе).
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def property_timings(factory: Callable, properties: tuple[str, ...], repeats: int) -> dict[str, float]:
+    """
+    Время первого (ещё не закешированного) обращения к каждому свойству свежего объекта.
+    Время свойств, зависящих от других (например, ``header`` от ``taxonomy``), включает и их получение.
+    """
+    return {
+        f'property.{name}': timed(lambda obj, name=name: getattr(obj, name), repeats, factory)
+        for name in properties
+    }
+
+
+def bench_quote(html_page: str, repeats: int) -> dict[str, float]:
+    def format_quote():
+        render_cache.clear()
+        formatter = TgQuoteFormatter(parse_quote(html_page))
+        return formatter.text, formatter.media, formatter.reply_markup
+
+    record = parse_quote(html_page)
+    results = {
+        'parse': timed(lambda: parse_quote(html_page), repeats),
+        'parse_legacy': timed(lambda: QuoteRecord.from_quote(Quote(html_page=html_page)), repeats),
+        **property_timings(lambda: Quote(html_page=html_page), QUOTE_PROPERTIES, repeats),
+        'format': timed(lambda _: (
+            TgQuoteFormatter(record).text, TgQuoteFormatter(record).reply_markup
+        ), repeats, render_cache.clear),
+        'format_cached': timed(lambda: (
+            TgQuoteFormatter(record).text, TgQuoteFormatter(record).reply_markup
+        ), repeats),
+        'memory_peak': peak_memory(format_quote)
+    }
+    return results
+
+
+def bench_page(html_page: str, repeats: int) -> dict[str, float]:
+    def format_page():
+        render_cache.clear()
+        formatter = TgPageFormatter(parse_page(html_page))
+        return formatter.text, formatter.reply_markup, formatter.inline_results('запрос')
+
+    record = parse_page(html_page)
+    return {
+        'parse': timed(lambda: parse_page(html_page), repeats),
+        'parse_legacy': timed(lambda: QuotePageRecord.from_page(QuotePage(html_page)), repeats),
+        **property_timings(lambda: QuotePage(html_page), PAGE_PROPERTIES, repeats),
+        'format': timed(lambda _: (
+            TgPageFormatter(record).text, TgPageFormatter(record).reply_markup
+        ), repeats, render_cache.clear),
+        'format_inline': timed(lambda _: TgPageFormatter(record).inline_results('запрос'), repeats, render_cache.clear),
+        'format_cached': timed(lambda: (
+            TgPageFormatter(record, KEY).text, TgPageFormatter(record, KEY).reply_markup,
+            TgPageFormatter(record, KEY).inline_results('запрос')
+        ), repeats),
+        'memory_peak': peak_memory(format_page)
+    }
+
+
+def bench_original(json_body: str, repeats: int) -> dict[str, float]:
+    def get_original():
+        return Quote.get_original_text(html_page=json.loads(json_body)[1]['data'])
+
+    return {
+        'parse': timed(get_original, repeats),
+        'memory_peak': peak_memory(get_original)
+    }
+
+
+def run_rounds(repeats: int, rounds: int) -> dict[str, dict[str, float]]:
+    """
+    Лучшие значения показателей из ``rounds`` полных прогонов. Времена каждого прогона сначала
+    пересчитываются по его собственной эталонной нагрузке, поэтому замедление машины на время
+    одного прогона не выдаётся за ухудшение. Итоговые времена приведены к лучшему эталонному времени.
+    """
+    best = None
+    for _ in range(rounds):
+        results = run(repeats)
+        calibration = results[CALIBRATION_CASE]['time']
+        for case, metrics in results.items():
+            if case != CALIBRATION_CASE:
+                for metric, value in metrics.items():
+                    if metric != 'memory_peak':
+                        metrics[metric] = value / calibration
+        if best is None:
+            best = results
+            continue
+        for case, metrics in results.items():
+            for metric, value in metrics.items():
+                best[case][metric] = min(best[case][metric], value)
+    calibration = best[CALIBRATION_CASE]['time']
+    for case, metrics in best.items():
+        if case != CALIBRATION_CASE:
+            for metric in metrics:
+                if metric != 'memory_peak':
+                    metrics[metric] *= calibration
+    return best
+
+
+def run(repeats: int) -> dict[str, dict[str, float]]:
+    calibration = calibrate(repeats)
+    results = {}
+    for case, file_name in QUOTE_CASES.items():
+        results[case] = bench_quote((FIXTURES_DIR / file_name).read_text('utf-8'), repeats)
+    for case, file_name in PAGE_CASES.items():
+        results[case] = bench_page((FIXTURES_DIR / file_name).read_text('utf-8'), repeats)
+    case, file_name = ORIGINAL_CASE
+    results[case] = bench_original((FIXTURES_DIR / file_name).read_text('utf-8'), repeats)
+    return {CALIBRATION_CASE: {'time': min(calibration, calibrate(repeats))}, **results}
+
+
+def format_value(metric: str, value: float) -> str:
+    if metric == 'memory_peak':
+        return f'{value / 1024:9.1f} КиБ'
+    return f'{value * 1e3:9.3f} мс'
+
+
+def compare(
+        results: dict[str, dict[str, float]],
+        baseline: dict[str, dict[str, float]],
+        tolerance: float
+) -> list[str]:
+    """
+    Печать результатов рядом с базовыми значениями, пересчитанными по скорости машины.
+    Returns:
+        список показателей, ухудшившихся больше чем на ``tolerance`` (доля от базового значения)
+        и, для времени, больше чем на ``MIN_TIME_DELTA``
+    """
+    regressions = []
+    scale = 1.0
+    if base_calibration := baseline.get(CALIBRATION_CASE, {}).get('time'):
+        scale = results[CALIBRATION_CASE]['time'] / base_calibration
+        print(f'Скорость машины относительно базовой: ×{1 / scale:.2f}')
+    for case, metrics in results.items():
+        if case == CALIBRATION_CASE:
+            continue
+        print(case)
+        for metric, value in metrics.items():
+            line = f'  {metric:<36}{format_value(metric, value)}'
+            base = baseline.get(case, {}).get(metric)
+            if base:
+                if metric != 'memory_peak':
+                    base *= scale
+                change = value / base - 1
+                line += f'  {change:+7.1%}'
+                if change > tolerance and (metric == 'memory_peak' or value - base > MIN_TIME_DELTA):
+                    line += '  РЕГРЕССИЯ'
+                    regressions.append(f'{case}.{metric}')
+            print(line)
+    return regressions
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--repeats', type=int, default=20, help='количество замеров каждого показателя за прогон')
+    arg_parser.add_argument('--rounds', type=int, default=5, help='количество прогонов')
+    arg_parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='файл базовых значений')
+    arg_parser.add_argument('--save-baseline', action='store_true', help='сохранить результаты как базовые')
+    arg_parser.add_argument('--tolerance', type=float, default=0.25, help='допустимое ухудшение (доля)')
+    args = arg_parser.parse_args()
+
+    results = run_rounds(args.repeats, args.rounds)
+    if args.save_baseline:
+        compare(results, {}, args.tolerance)
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n', 'utf-8')
+        print(f'Базовые значения сохранены в {args.baseline}')
+        return 0
+    baseline = json.loads(args.baseline.read_text('utf-8')) if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f'Ухудшились: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
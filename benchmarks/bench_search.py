@@ -0,0 +1,104 @@
+"""
+Бенчмарк локального поискового индекса на синтетических цитатах, собранных из слов сохранённых страниц.
+Измеряются время индексации, поиска (в том числе по началу слова, как в инлайн-режиме),
+получения первой и следующей страницы результатов,
+сохранения и загрузки индекса.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.bench_search --quotes 50000
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.parser import QuoteRecord
+from src.parser.executor import parse_page
+from src.search import QuoteIndex, tokenize
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+PAGE_FIXTURES = ('page_category.html', 'page_search.html')
+
+
+def synthetic_quotes(count: int, words_per_quote: int, seed: int) -> list[QuoteRecord]:
+    """
+    Цитаты со структурой реальных (заголовок, таксономия, темы) и случайным текстом из слов реальных цитат.
+    """
+    rng = random.Random(seed)
+    templates = []
+    for name in PAGE_FIXTURES:
+        templates += parse_page((FIXTURES_DIR / name).read_bytes()).quotes
+    words = [word for quote in templates for word in ' '.join(
+        [quote.text] if isinstance(quote.text, str) else quote.text
+    ).split()]
+    quotes = []
+    for num in range(count):
+        data = rng.choice(templates).as_dict()
+        data['id'] = str(num)
+        data['text'] = ' '.join(rng.choices(words, k=words_per_quote))
+        quotes.append(QuoteRecord.from_dict(data))
+    return quotes
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--quotes', type=int, default=20_000, help='количество цитат в индексе')
+    arg_parser.add_argument('--words', type=int, default=40, help='количество слов в тексте цитаты')
+    arg_parser.add_argument('--queries', type=int, default=200, help='количество поисковых запросов')
+    arg_parser.add_argument('--seed', type=int, default=1)
+    args = arg_parser.parse_args()
+
+    quotes = synthetic_quotes(args.quotes, args.words, args.seed)
+    index = QuoteIndex()
+    start = time.perf_counter()
+    index.add_many(quotes)
+    elapsed = time.perf_counter() - start
+    print(f'Индексация: {len(index)} цитат за {elapsed:.2f} с ({elapsed / len(quotes) * 1e6:.0f} мкс на цитату)')
+
+    rng = random.Random(args.seed)
+    vocabulary = sorted({term for quote in quotes[:1000] for term in tokenize(quote.text)})
+    scenarios = {
+        'одно слово': lambda: rng.choice(vocabulary),
+        'два слова': lambda: f'{rng.choice(vocabulary)} {rng.choice(vocabulary)}',
+        'начало слова': lambda: rng.choice(vocabulary)[:3]
+    }
+    # Все результаты (search), первая страница, как её получают обработчики (page, без запомненных результатов),
+    # и следующая страница
+    print(f'{"запрос":<16}{"все, p50/p95 мс":>18}{"страница":>14}{"листание":>14}{"найдено (медиана)":>20}')
+    for name, make_query in scenarios.items():
+        timings = {'search': [], 'page': [], 'turn': []}
+        hits = []
+        for _ in range(args.queries):
+            query = make_query()
+            for kind, func in (
+                    ('search', lambda: hits.append(len(index.search(query)))),
+                    ('page', lambda: index._results.clear() or index.page(query)),
+                    ('turn', lambda: index.page(query, '1'))
+            ):
+                start = time.perf_counter()
+                func()
+                timings[kind].append(time.perf_counter() - start)
+        columns = []
+        for kind, samples in timings.items():
+            samples.sort()
+            columns.append(f'{statistics.median(samples) * 1e3:.2f}/{samples[int(len(samples) * 0.95)] * 1e3:.2f}')
+        print(f'{name:<16}{columns[0]:>18}{columns[1]:>14}{columns[2]:>14}{statistics.median(hits):>20.0f}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / 'index.jsonl')
+        start = time.perf_counter()
+        index.save(path)
+        print(f'Сохранение: {time.perf_counter() - start:.2f} с, {Path(path).stat().st_size / 2 ** 20:.1f} МиБ')
+        loaded_index = QuoteIndex()
+        start = time.perf_counter()
+        loaded_index.load(path)
+        print(f'Загрузка: {time.perf_counter() - start:.2f} с')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Бенчмарк запуска: время импорта модулей бота в новом интерпретаторе (по ``python -X importtime``).
+Каждый сценарий запускается в отдельном процессе из временной директории, поэтому заодно проверяется,
+что данные пакетов загружаются независимо от текущей директории.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeats 20 --top 15
+"""
+import argparse
+import collections
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+FIXTURE_PATH = Path(__file__).parent / 'fixtures' / 'quote_movie.html'
+
+# Сценарий -> код, выполняемый в новом интерпретаторе
+SCENARIOS = {
+    'interpreter': 'pass',
+    'parser_worker': 'from src.parser.executor import parse_quote',
+    'first_parse': (
+        'from src.parser.executor import parse_quote; '
+        f'parse_quote(open({str(FIXTURE_PATH)!r}, "rb").read())'
+    ),
+    'dispatcher': 'import src.telegram.main',
+    'bot_worker': 'import src.telegram.main; src.telegram.main.create_handlers({})'
+}
+
+
+def run_scenario(code: str, cwd: str) -> tuple[float, dict[str, int]]:
+    """
+    Returns:
+        время работы процесса в секундах и собственное время импорта каждого модуля в микросекундах
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_DIR))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError('\n'.join(
+            line for line in result.stderr.splitlines() if not line.startswith('import time:')
+        ))
+    self_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_us, _, name = line.removeprefix('import time:').split('|')
+            if self_us.strip().isdigit():
+                self_times[name.strip()] = int(self_us)
+    return elapsed, self_times
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--repeats', type=int, default=10, help='количество запусков каждого сценария')
+    arg_parser.add_argument('--top', type=int, default=10, help='количество самых долгих модулей в отчёте')
+    arg_parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = arg_parser.parse_args()
+
+    print(f'{"сценарий":<16}{"процесс, мс":>13}{"импорт, мс":>12}{"модулей":>9}')
+    slowest = {}
+    with tempfile.TemporaryDirectory() as cwd:
+        for name in args.scenarios:
+            walls, imports = [], []
+            module_times = collections.defaultdict(list)
+            for _ in range(args.repeats):
+                try:
+                    elapsed, self_times = run_scenario(SCENARIOS[name], cwd)
+                except RuntimeError as e:
+                    print(f'{name}: ошибка запуска\n{e}')
+                    return 1
+                walls.append(elapsed)
+                imports.append(sum(self_times.values()) / 1e6)
+                for module, self_us in self_times.items():
+                    module_times[module].append(self_us)
+            print(
+                f'{name:<16}{statistics.median(walls) * 1e3:>13.1f}'
+                f'{statistics.median(imports) * 1e3:>12.1f}{len(module_times):>9}'
+            )
+            slowest[name] = sorted(
+                ((statistics.median(times), module) for module, times in module_times.items()), reverse=True
+            )[:args.top]
+
+    for name, modules in slowest.items():
+        print(f'\n{name}: самые долгие модули (собственное время, мс)')
+        for self_us, module in modules:
+            print(f'{self_us / 1e3:>9.1f}  {module}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,400 @@
+"""
+Нагрузочный тест обработчиков Telegram без обращения к Telegram и сайту-донору.
+Запросы смешанного вида (``/random``, команды категорий, поиск, пагинация, коллбэки цитат,
+инлайн-запросы со смещением) проходят через настоящие функции ``src.telegram.handlers``,
+а вместо сайта-донора отвечает локальная подмена на основе сохранённых страниц из ``fixtures``
+с настраиваемыми задержкой и долей ошибок.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.load_test --requests 2000 --concurrency 50 --latency 0.08 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from src import http_client
+from src.metrics import registry
+from src.parser import ParsingExecutor
+from src.parser import const as parser_const
+from src.telegram import const as tg_const
+from src.telegram import handlers
+from src.telegram import utils as tg_utils
+from src.telegram.formatters.render_cache import render_cache
+from src.telegram.instrumentation import instrumented
+from src.upstream import AdaptiveLimiter
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+QUOTE_FIXTURES = ('quote_movie.html', 'quote_original.html', 'quote_series.html', 'quote_picture.html')
+NODE_ID_PATTERN = re.compile(r'id="node-\d+"')
+SEARCH_WORDS = (
+    'любовь', 'жизнь', 'счастье', 'дружба', 'время', 'мечта', 'свобода', 'война', 'смерть', 'надежда'
+)
+EMPTY_SEARCH_WORDS = ('zzzz', 'qwerty')
+TYPING_INTERVAL = 0.15  # Пауза между нажатиями клавиш при наборе инлайн-запроса
+DEFAULT_MIX = 'random=2,quote_link=1,category=3,search=3,page=2,quote_callback=3,original=1,inline=3,typing=1'
+
+
+class FakeSite:
+    """
+    Подмена citaty.info на уровне транспорта httpx: отдаёт сохранённые страницы,
+    подставляя в единичные цитаты запрошенный идентификатор.
+    """
+    def __init__(self, latency: float, jitter: float, error_rate: float, rnd: random.Random):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rnd = rnd
+        self.requests = collections.Counter()
+        self.injected_errors = 0
+        self._quotes = [(FIXTURES_DIR / name).read_text('utf-8') for name in QUOTE_FIXTURES]
+        self._po = (FIXTURES_DIR / 'po.html').read_text('utf-8')
+        self._pritcha = (FIXTURES_DIR / 'pritcha.html').read_text('utf-8')
+        self._category = (FIXTURES_DIR / 'page_category.html').read_text('utf-8')
+        self._search = (FIXTURES_DIR / 'page_search.html').read_text('utf-8')
+        self._search_empty = (FIXTURES_DIR / 'page_search_empty.html').read_text('utf-8')
+        self._en_body = (FIXTURES_DIR / 'en_body.json').read_bytes()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.strip('/')
+        kind = path.split('/', 1)[0] or 'index'
+        self.requests[kind] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self._rnd.gauss(self.latency, self.jitter)))
+        if self._rnd.random() < self.error_rate:
+            self.injected_errors += 1
+            return httpx.Response(httpx.codes.SERVICE_UNAVAILABLE, request=request)
+        match path.split('/'):
+            case ['random']:
+                content = self._quote_page('quote', self._rnd.randrange(1, 10 ** 6))
+            case ['quote' | 'po' | 'pritcha' as quote_type, quote_id]:
+                content = self._quote_page(quote_type, int(quote_id))
+            case ['search', 'site', query]:
+                content = self._search_empty if query in EMPTY_SEARCH_WORDS else self._search
+            case ['ajax', 'en_body', _]:
+                return httpx.Response(
+                    httpx.codes.OK, content=self._en_body,
+                    headers={'Content-Type': 'application/json'}, request=request
+                )
+            case _:
+                content = self._category
+        return httpx.Response(
+            httpx.codes.OK, content=content.encode(parser_const.STR_ENCODING),
+            headers={'Content-Type': 'text/html; charset=utf-8'}, request=request
+        )
+
+    def _quote_page(self, quote_type: str, quote_id: int) -> str:
+        match quote_type:
+            case 'po':
+                template = self._po
+            case 'pritcha':
+                template = self._pritcha
+            case _:
+                template = self._quotes[quote_id % len(self._quotes)]
+        return NODE_ID_PATTERN.sub(f'id="node-{quote_id}"', template, count=1)
+
+
+class TelegramRecorder:
+    """
+    Учёт вызовов API Telegram, сделанных обработчиками через заглушки, с имитацией их задержки.
+    """
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = collections.Counter()
+        self.bad_requests = 0
+        self.photo_downloads = 0
+
+    async def call(self, method: str, text: str = None):
+        self.calls[method] += 1
+        if text == tg_const.BAD_REQUEST_MSG:
+            self.bad_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def media_group(self, media: list) -> list['FakeMessage']:
+        """
+        Сообщения с изображениями: переданные ссылкой Telegram загружает с сайта-донора, а по file_id — нет.
+        """
+        await self.call('send_media_group')
+        messages = []
+        for item in media:
+            file_id = item.media
+            if item.media.startswith('http'):
+                self.photo_downloads += 1
+                file_id = f'file-{item.media}'
+            messages.append(FakeMessage(self, photo=FakePhoto(file_id)))
+        return messages
+
+
+class FakePhoto:
+    def __init__(self, file_id: str):
+        self.file_id = file_id
+
+
+class FakeMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, recorder: TelegramRecorder, text: str = None, command: list[str] = None,
+                 reply_to_message: 'FakeMessage' = None, photo: FakePhoto = None):
+        self._recorder = recorder
+        self.id = next(self._ids)
+        self.text = text
+        self.command = command
+        self.via_bot = None
+        self.reply_to_message = reply_to_message
+        self.photo = photo
+
+    async def reply(self, text: str, **_) -> 'FakeMessage':
+        await self._recorder.call('send_message', text)
+        return FakeMessage(self._recorder, text)
+
+    async def reply_chat_action(self, *_, **__) -> None:
+        await self._recorder.call('send_chat_action')
+
+    async def reply_media_group(self, media: list, **_) -> list['FakeMessage']:
+        return await self._recorder.media_group(media)
+
+    async def edit(self, text: str, **_) -> 'FakeMessage':
+        await self._recorder.call('edit_message_text', text)
+        return self
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class FakeCallbackQuery:
+    def __init__(self, recorder: TelegramRecorder, data: str, user_id: int, message: FakeMessage = None):
+        self._recorder = recorder
+        self.data = data
+        self.from_user = FakeUser(user_id)
+        self.message = message
+
+    async def answer(self, text: str = None, **_) -> None:
+        await self._recorder.call('answer_callback_query', text)
+
+
+class FakeInlineQuery:
+    def __init__(self, recorder: TelegramRecorder, query: str, offset: str, user_id: int):
+        self._recorder = recorder
+        self.query = query
+        self.offset = offset
+        self.from_user = FakeUser(user_id)
+        self.results = 0
+
+    async def answer(self, results: list, **_) -> None:
+        self.results = len(results)
+        await self._recorder.call('answer_inline_query')
+
+
+class FakeClient:
+    def __init__(self, recorder: TelegramRecorder):
+        self._recorder = recorder
+
+    async def send_message(self, text: str, **_) -> FakeMessage:
+        await self._recorder.call('send_message', text)
+        return FakeMessage(self._recorder, text)
+
+    async def send_media_group(self, media: list, **_) -> list[FakeMessage]:
+        return await self._recorder.media_group(media)
+
+
+class TrafficGenerator:
+    """
+    Случайные запросы пользователей: популярность цитат убывает по степенному закону,
+    так что часть из них попадает в кеш, как и при настоящей нагрузке.
+    """
+    def __init__(self, recorder: TelegramRecorder, mix: dict[str, float], quote_count: int, rnd: random.Random):
+        self._recorder = recorder
+        self._rnd = rnd
+        self._quote_count = quote_count
+        self._scenarios = list(mix)
+        self._weights = list(mix.values())
+        self._commands = list(tg_const.MULTIPLE_COMMAND_LINKS)
+        self._app = FakeClient(recorder)
+        self._handlers = {
+            name: instrumented(getattr(handlers, name)) for name in (
+                'single_quote', 'multiple_quotes', 'turn_page', 'quote_by_callback', 'original',
+                'multiple_quotes_inline'
+            )
+        }
+
+    def next(self) -> tuple[str, object]:
+        """
+        Вид очередного запроса и корутина его обработки.
+        """
+        scenario = self._rnd.choices(self._scenarios, self._weights)[0]
+        return scenario, getattr(self, f'_{scenario}')()
+
+    def _quote_rel_link(self) -> str:
+        quote_id = int(self._rnd.paretovariate(1.1)) % self._quote_count
+        quote_type = self._rnd.choices(('quote', 'po', 'pritcha'), (8, 1, 1))[0]
+        return f'{quote_type}/{quote_id}'
+
+    def _request_text(self) -> str:
+        if self._rnd.random() < 0.5:
+            return '/' + self._rnd.choice(self._commands)
+        return self._rnd.choice(SEARCH_WORDS + EMPTY_SEARCH_WORDS[:1])
+
+    def _user_id(self) -> int:
+        return self._rnd.randrange(1, 10 ** 5)
+
+    def _random(self):
+        return self._handlers['single_quote'](None, FakeMessage(self._recorder, '/random', ['random']))
+
+    def _quote_link(self):
+        return self._handlers['single_quote'](None, FakeMessage(self._recorder, parser_const.BASE_URL % self._quote_rel_link()))
+
+    def _category(self):
+        command = self._rnd.choice(self._commands)
+        return self._handlers['multiple_quotes'](None, FakeMessage(self._recorder, f'/{command}', [command]))
+
+    def _search(self):
+        return self._handlers['multiple_quotes'](None, FakeMessage(self._recorder, self._rnd.choice(SEARCH_WORDS)))
+
+    def _page(self):
+        request = FakeMessage(self._recorder, self._request_text())
+        message = FakeMessage(self._recorder, reply_to_message=request)
+        query = FakeCallbackQuery(self._recorder, f'p{self._rnd.randrange(1, 6)}', self._user_id(), message)
+        return self._handlers['turn_page'](None, query)
+
+    def _quote_callback(self):
+        query = FakeCallbackQuery(self._recorder, self._quote_rel_link(), self._user_id())
+        return self._handlers['quote_by_callback'](self._app, query)
+
+    def _original(self):
+        query = FakeCallbackQuery(self._recorder, f'o{self._rnd.randrange(self._quote_count)}', self._user_id())
+        return self._handlers['original'](None, query)
+
+    def _inline(self):
+        text = self._request_text().removeprefix('/')
+        offset = self._rnd.choice(('', '', '1', '2'))
+        return self._handlers['multiple_quotes_inline'](
+            None, FakeInlineQuery(self._recorder, text, offset, self._user_id())
+        )
+
+    async def _typing(self):
+        """
+        Набор поискового запроса в инлайн-режиме: Telegram присылает запрос после каждого нажатия клавиши.
+        """
+        word, user_id = self._rnd.choice(SEARCH_WORDS), self._user_id()
+        async with asyncio.TaskGroup() as tg:
+            for length in range(1, len(word) + 1):
+                tg.create_task(self._handlers['multiple_quotes_inline'](
+                    None, FakeInlineQuery(self._recorder, word[:length], '', user_id)
+                ))
+                await asyncio.sleep(TYPING_INTERVAL)
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for item in mix.split(','):
+        scenario, weight = item.split('=')
+        if not hasattr(TrafficGenerator, f'_{scenario}'):
+            raise argparse.ArgumentTypeError(f'неизвестный вид запросов: {scenario}')
+        weights[scenario] = float(weight)
+    return weights
+
+
+def percentiles(samples: list[float]) -> tuple[float, float, float]:
+    """
+    50-й, 95-й и 99-й процентили.
+    """
+    if len(samples) < 2:
+        return (samples[0],) * 3 if samples else (0.0, 0.0, 0.0)
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+
+async def run(args: argparse.Namespace) -> None:
+    rnd = random.Random(args.seed)
+    site = FakeSite(args.latency, args.jitter, args.error_rate, rnd)
+    recorder = TelegramRecorder(args.telegram_latency)
+    http_client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(site.handle), follow_redirects=True)
+    if args.upstream_rate:
+        http_client.upstream_limiter = AdaptiveLimiter(rate=args.upstream_rate, burst=int(args.upstream_rate) or 1)
+    tg_utils.parsing_executor = ParsingExecutor(mode=args.parser_mode, workers=args.parser_workers)
+    generator = TrafficGenerator(recorder, args.mix, args.quotes, rnd)
+
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    remaining = iter(range(args.requests))
+
+    async def worker():
+        for _ in remaining:
+            scenario, handler_call = generator.next()
+            start = time.perf_counter()
+            try:
+                await handler_call
+            except Exception:
+                errors[scenario] += 1
+            latencies[scenario].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await tg_utils.prefetcher.stop()
+    tg_utils.parsing_executor.shutdown()
+    await http_client.http_client.aclose()
+
+    print(f'Запросов: {args.requests} за {elapsed:.2f} с — {args.requests / elapsed:.1f} в секунду')
+    print(f'{"вид":<16}{"кол-во":>8}{"ошибки":>8}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}')
+    all_latencies = []
+    for scenario, samples in sorted(latencies.items()):
+        all_latencies.extend(samples)
+        p50, p95, p99 = percentiles(samples)
+        print(f'{scenario:<16}{len(samples):>8}{errors[scenario]:>8}{p50 * 1e3:>10.1f}{p95 * 1e3:>10.1f}{p99 * 1e3:>10.1f}')
+    p50, p95, p99 = percentiles(all_latencies)
+    print(f'{"всего":<16}{len(all_latencies):>8}{sum(errors.values()):>8}'
+          f'{p50 * 1e3:>10.1f}{p95 * 1e3:>10.1f}{p99 * 1e3:>10.1f}')
+    print(f'Запросы к сайту-донору: {sum(site.requests.values())} '
+          f'({", ".join(f"{kind}: {count}" for kind, count in site.requests.most_common())}), '
+          f'внесённых ошибок: {site.injected_errors}')
+    print(
+        f'Вызовы API Telegram: {dict(recorder.calls)}, сообщений об ошибке: {recorder.bad_requests}, '
+        f'изображений, загруженных Telegram по ссылке: {recorder.photo_downloads}'
+    )
+    print(f'Кеш ответов: {tg_utils.response_cache.stats}')
+    print(f'Кеш цитат: {tg_utils.quote_cache.stats}')
+    print(f'Кеш страниц: {tg_utils.page_cache.stats}')
+    print(f'Кеш представлений: {render_cache.stats}')
+    print(f'Кеш file_id изображений: {tg_utils.photo_cache.stats}')
+    print(f'Ограничитель: {http_client.upstream_limiter.stats}, фоновые загрузки: {tg_utils.prefetcher.stats}')
+    if args.metrics:
+        Path(args.metrics).write_text(registry.render(), 'utf-8')
+        print(f'Метрики (в том числе длительности этапов обработки) записаны в {args.metrics}')
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--requests', type=int, default=1000, help='общее количество запросов')
+    arg_parser.add_argument('--concurrency', type=int, default=20, help='количество одновременных пользователей')
+    arg_parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                            help=f'веса видов запросов (по умолчанию {DEFAULT_MIX})')
+    arg_parser.add_argument('--quotes', type=int, default=5000, help='количество различных цитат на сайте')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='средняя задержка сайта-донора, с')
+    arg_parser.add_argument('--jitter', type=float, default=0.02, help='разброс задержки сайта-донора, с')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 503 от сайта-донора')
+    arg_parser.add_argument('--telegram-latency', type=float, default=0.0, help='задержка вызовов API Telegram, с')
+    arg_parser.add_argument('--upstream-rate', type=float, default=0.0,
+                            help='ограничение частоты запросов к сайту-донору (0 — как в боте)')
+    arg_parser.add_argument('--parser-mode', choices=('thread', 'process'), default=parser_const.PARSER_MODE)
+    arg_parser.add_argument('--parser-workers', type=int, default=parser_const.PARSER_WORKERS)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--metrics', help='файл для записи метрик в формате Prometheus')
+    asyncio.run(run(arg_parser.parse_args()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+from .prefetcher import Prefetcher
+from .sqlite_store import SqliteStore
+from .store import QuoteStore
+from .ttl_cache import CacheEntry, TTLCache
+
+
+__all__ = [
+    CacheEntry.__name__,
+    Prefetcher.__name__,
+    QuoteStore.__name__,
+    SqliteStore.__name__,
+    TTLCache.__name__
+]
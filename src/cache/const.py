@@ -0,0 +1,26 @@
+RESPONSE_CACHE_SIZE = 4 * 1024 * 1024   # Суммарный размер тел ответов в байтах (только оригиналы цитат)
+
+RANDOM_TTL = 0               # Случайные цитаты не кешируются
+RATING_TTL = 5 * 60          # Рейтинги меняются быстрее прочих списков
+PAGE_TTL = 15 * 60           # Категории, поиск и прочие списки цитат
+QUOTE_TTL = 6 * 60 * 60      # Единичные цитаты и их оригиналы практически не меняются
+
+STALE_WHILE_REVALIDATE = 10 * 60  # Сколько устаревшая страница отдаётся сразу, пока она обновляется в фоне
+STALE_TTL = 24 * 60 * 60          # Сколько устаревшая страница хранится для условного запроса (ETag, Last-Modified)
+
+QUOTE_CACHE_SIZE = 10_000    # Количество разобранных цитат в кеше
+PAGE_CACHE_SIZE = 2_000      # Количество разобранных страниц с цитатами в кеше
+PHOTO_CACHE_SIZE = 20_000    # Количество file_id изображений цитат в кеше
+PHOTO_TTL = 30 * 24 * 60 * 60  # Изображение по той же ссылке могут заменить, поэтому file_id периодически обновляется
+
+STORE_MAX_QUOTES = 200_000        # Ограничение количества цитат в постоянном хранилище
+STORE_MAX_PAGES = 20_000          # Ограничение количества страниц в постоянном хранилище
+STORE_MAX_PHOTOS = 100_000        # Ограничение количества file_id изображений в постоянном хранилище
+STORE_MAX_AGE = 7 * 24 * 60 * 60  # Записи старше удаляются из хранилища
+STORE_PRUNE_INTERVAL = 500        # Количество записей между очистками хранилища
+STORE_BUSY_TIMEOUT = 5_000        # Сколько миллисекунд ждать записи, начатой другим процессом
+
+PREFETCH_QUEUE_SIZE = 200    # Ограничение очереди фоновых загрузок
+PREFETCH_CONCURRENCY = 2     # Количество одновременных фоновых загрузок
+PREFETCH_INTERVAL = 0.25     # Минимальный интервал между началами фоновых загрузок в секундах
+PREFETCH_NEXT_PAGE = True    # Загружать ли заранее следующую страницу пагинации
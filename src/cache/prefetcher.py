@@ -0,0 +1,84 @@
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from . import const
+
+
+class Prefetcher:
+    """
+    Фоновая загрузка данных, которые вероятно понадобятся следующими, в кеш.
+    Очередь ограничена, а количество и частота загрузок невелики,
+    чтобы не мешать запросам, которые пользователь ждёт прямо сейчас.
+    """
+    def __init__(
+            self,
+            max_queue: int = const.PREFETCH_QUEUE_SIZE,
+            concurrency: int = const.PREFETCH_CONCURRENCY,
+            interval: float = const.PREFETCH_INTERVAL
+    ):
+        self.concurrency = concurrency
+        self.interval = interval
+        self._queue: asyncio.Queue[tuple[Hashable, Callable[[], Awaitable[Any]]]] = asyncio.Queue(max_queue)
+        self._pending: set[Hashable] = set()
+        self._workers: list[asyncio.Task] = []
+        self._next_start = 0.0
+        self.done = self.failed = self.dropped = 0
+
+    def schedule(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Постановка загрузки в очередь. Повторы уже ожидающих загрузок
+        и загрузки сверх размера очереди отбрасываются.
+        Returns:
+            поставлена ли загрузка в очередь
+        """
+        if key in self._pending:
+            return False
+        try:
+            self._queue.put_nowait((key, func))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._pending.add(key)
+        if not self._workers:  # Загрузки не должны наследовать контекст запроса, запустившего обработчики
+            self._workers = [
+                asyncio.create_task(self._work(), context=contextvars.Context()) for _ in range(self.concurrency)
+            ]
+        return True
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'queued': self._queue.qsize(),
+            'done': self.done,
+            'failed': self.failed,
+            'dropped': self.dropped
+        }
+
+    async def _work(self) -> None:
+        while True:
+            key, func = await self._queue.get()
+            try:
+                await self._wait_turn()
+                await func()
+            except Exception:  # Фоновая загрузка не должна влиять на обработку запросов
+                self.failed += 1
+            else:
+                self.done += 1
+            finally:
+                self._pending.discard(key)
+                self._queue.task_done()
+
+    async def _wait_turn(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from ..parser import QuoteRecord, QuotePageRecord
+from ..parser import const as parser_const
+from . import const, utils
+from .ttl_cache import TTLCache
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS quotes (
+    rel_link TEXT PRIMARY KEY,
+    quote_id TEXT NOT NULL,
+    source_url TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quotes_quote_id ON quotes (quote_id);
+CREATE INDEX IF NOT EXISTS quotes_source_url ON quotes (source_url);
+CREATE INDEX IF NOT EXISTS quotes_updated_at ON quotes (updated_at);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_updated_at ON pages (updated_at);
+CREATE TABLE IF NOT EXISTS photos (
+    url TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS photos_updated_at ON photos (updated_at);
+'''
+
+
+class SqliteStore:
+    """
+    Постоянное хранилище разобранных цитат, страниц и file_id отправленных изображений на основе SQLite.
+    Один файл базы могут одновременно использовать несколько процессов бота (журнал WAL).
+    Все асинхронные методы выполняют запросы в отдельном потоке, не блокируя цикл событий.
+    """
+    def __init__(
+            self,
+            path: str,
+            max_quotes: int = const.STORE_MAX_QUOTES,
+            max_pages: int = const.STORE_MAX_PAGES,
+            max_photos: int = const.STORE_MAX_PHOTOS,
+            max_age: float = const.STORE_MAX_AGE
+    ):
+        self.max_quotes = max_quotes
+        self.max_pages = max_pages
+        self.max_photos = max_photos
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(f'PRAGMA busy_timeout={const.STORE_BUSY_TIMEOUT}')
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    async def get_quote(self, url: str, max_age: float) -> tuple[QuoteRecord, float] | None:
+        """
+        Цитата и её возраст в секундах по нормализованной ссылке (исходной или прямой),
+        если она сохранена не более ``max_age`` секунд назад.
+        """
+        return await asyncio.to_thread(self._get_quote, url, max_age)
+
+    async def get_quote_by_id(self, quote_id: str, max_age: float) -> tuple[QuoteRecord, float] | None:
+        return await asyncio.to_thread(self._get_quote_by_id, quote_id, max_age)
+
+    async def put_quote(self, quote: QuoteRecord, source_url: str = None) -> None:
+        await asyncio.to_thread(self._put_quote, quote, source_url)
+
+    async def get_page(self, url: str, max_age: float) -> tuple[QuotePageRecord, float] | None:
+        """
+        Страница и её возраст в секундах по ключу кеша, если она сохранена не более ``max_age`` секунд назад.
+        """
+        return await asyncio.to_thread(self._get_page, url, max_age)
+
+    async def put_page(self, url: str, quote_page: QuotePageRecord) -> None:
+        await asyncio.to_thread(self._put_page, url, quote_page)
+
+    async def get_file_ids(self, urls: list[str]) -> dict[str, str]:
+        """
+        Сохранённые file_id изображений по их ссылкам (ссылки без file_id пропускаются).
+        """
+        return await asyncio.to_thread(self._get_file_ids, urls)
+
+    async def put_file_ids(self, file_ids: dict[str, str]) -> None:
+        await asyncio.to_thread(self._put_file_ids, file_ids)
+
+    async def delete_file_ids(self, urls: list[str]) -> None:
+        await asyncio.to_thread(self._delete_file_ids, urls)
+
+    def warm(self, quote_cache: TTLCache, page_cache: TTLCache, photo_cache: TTLCache = None) -> int:
+        """
+        Заполнение кешей в памяти ещё не устаревшими записями, начиная с самых свежих.
+        Вызывается при запуске до начала обработки обновлений.
+        Returns:
+            количество загруженных записей
+        """
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            quote_rows = self._connection.execute(
+                'SELECT rel_link, source_url, data, updated_at FROM quotes ORDER BY updated_at DESC LIMIT ?',
+                (quote_cache.max_size,)
+            ).fetchall()
+            page_rows = self._connection.execute(
+                'SELECT url, data, updated_at FROM pages ORDER BY updated_at DESC LIMIT ?',
+                (page_cache.max_size,)
+            ).fetchall()
+        for rel_link, source_url, data, updated_at in reversed(quote_rows):  # Свежие — последними, как в LRU
+            url = parser_const.BASE_URL % rel_link
+            ttl = utils.url_ttl(url) - (now - updated_at)
+            if ttl > 0:
+                quote = QuoteRecord.from_dict(json.loads(data))
+                quote_cache.set(utils.cache_key(url), quote, ttl)
+                if source_url:
+                    quote_cache.set(source_url, quote, ttl)
+                loaded += 1
+        for url, data, updated_at in reversed(page_rows):
+            ttl = utils.url_ttl(url) - (now - updated_at)
+            if ttl > 0:
+                page_cache.set(url, QuotePageRecord.from_dict(json.loads(data)), ttl, const.STALE_TTL)
+                loaded += 1
+        if photo_cache is not None:
+            with self._lock:
+                photo_rows = self._connection.execute(
+                    'SELECT url, file_id, updated_at FROM photos ORDER BY updated_at DESC LIMIT ?',
+                    (photo_cache.max_size,)
+                ).fetchall()
+            for url, file_id, updated_at in reversed(photo_rows):
+                ttl = const.PHOTO_TTL - (now - updated_at)
+                if ttl > 0:
+                    photo_cache.set(url, file_id, ttl)
+                    loaded += 1
+        return loaded
+
+    def prune(self) -> None:
+        """
+        Удаление устаревших записей и самых старых записей сверх ограничений размера.
+        """
+        expired = time.time() - self.max_age
+        with self._lock:
+            self._connection.execute('DELETE FROM quotes WHERE updated_at < ?', (expired,))
+            self._connection.execute('DELETE FROM pages WHERE updated_at < ?', (expired,))
+            self._connection.execute('DELETE FROM photos WHERE updated_at < ?', (time.time() - const.PHOTO_TTL,))
+            self._connection.execute(
+                'DELETE FROM quotes WHERE rel_link IN '
+                '(SELECT rel_link FROM quotes ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_quotes,)
+            )
+            self._connection.execute(
+                'DELETE FROM pages WHERE url IN '
+                '(SELECT url FROM pages ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_pages,)
+            )
+            self._connection.execute(
+                'DELETE FROM photos WHERE url IN '
+                '(SELECT url FROM photos ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_photos,)
+            )
+
+    def _get_quote(self, url: str, max_age: float) -> tuple[QuoteRecord, float] | None:
+        rel_link = url.removeprefix(parser_const.BASE_URL % '')
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data, updated_at FROM quotes WHERE rel_link = ? OR source_url = ? '
+                'ORDER BY updated_at DESC LIMIT 1',
+                (rel_link, url)
+            ).fetchone()
+        return self._quote_from_row(row, max_age)
+
+    def _get_quote_by_id(self, quote_id: str, max_age: float) -> tuple[QuoteRecord, float] | None:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data, updated_at FROM quotes WHERE quote_id = ? ORDER BY updated_at DESC LIMIT 1',
+                (quote_id,)
+            ).fetchone()
+        return self._quote_from_row(row, max_age)
+
+    @staticmethod
+    def _quote_from_row(row: tuple | None, max_age: float) -> tuple[QuoteRecord, float] | None:
+        if row is not None:
+            data, updated_at = row
+            age = time.time() - updated_at
+            if age < max_age:
+                return QuoteRecord.from_dict(json.loads(data)), age
+
+    def _put_quote(self, quote: QuoteRecord, source_url: str | None) -> None:
+        with self._lock:
+            self._connection.execute(
+                'INSERT INTO quotes (rel_link, quote_id, source_url, data, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (rel_link) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at, '
+                'source_url = coalesce(excluded.source_url, source_url)',
+                (quote.rel_link, quote.id, source_url,
+                 json.dumps(quote.as_dict(), ensure_ascii=False), time.time())
+            )
+        self._count_write()
+
+    def _get_page(self, url: str, max_age: float) -> tuple[QuotePageRecord, float] | None:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data, updated_at FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+        if row is not None:
+            data, updated_at = row
+            age = time.time() - updated_at
+            if age < max_age:
+                return QuotePageRecord.from_dict(json.loads(data)), age
+
+    def _put_page(self, url: str, quote_page: QuotePageRecord) -> None:
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO pages (url, data, updated_at) VALUES (?, ?, ?)',
+                (url, json.dumps(quote_page.as_dict(), ensure_ascii=False), time.time())
+            )
+        self._count_write()
+
+    def _get_file_ids(self, urls: list[str]) -> dict[str, str]:
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT url, file_id FROM photos WHERE url IN ({", ".join("?" * len(urls))}) AND updated_at >= ?',
+                (*urls, time.time() - const.PHOTO_TTL)
+            ).fetchall()
+        return dict(rows)
+
+    def _put_file_ids(self, file_ids: dict[str, str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO photos (url, file_id, updated_at) VALUES (?, ?, ?)',
+                [(url, file_id, now) for url, file_id in file_ids.items()]
+            )
+        self._count_write()
+
+    def _delete_file_ids(self, urls: list[str]) -> None:
+        with self._lock:
+            self._connection.executemany('DELETE FROM photos WHERE url = ?', [(url,) for url in urls])
+
+    def _count_write(self) -> None:
+        self._writes += 1
+        if self._writes % const.STORE_PRUNE_INTERVAL == 0:
+            self.prune()
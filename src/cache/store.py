@@ -0,0 +1,45 @@
+from typing import Protocol
+
+from ..parser import QuoteRecord, QuotePageRecord
+from .ttl_cache import TTLCache
+
+
+class QuoteStore(Protocol):
+    """
+    Постоянное хранилище разобранных цитат, страниц и file_id отправленных изображений, общее для всех процессов бота.
+    Любая реализация с этими методами (например, на основе Redis) может заменить ``SqliteStore``.
+    """
+    async def get_quote(self, url: str, max_age: float) -> tuple[QuoteRecord, float] | None:
+        """
+        Цитата и её возраст в секундах по нормализованной ссылке (исходной или прямой),
+        если она сохранена не более ``max_age`` секунд назад.
+        """
+
+    async def get_quote_by_id(self, quote_id: str, max_age: float) -> tuple[QuoteRecord, float] | None: ...
+
+    async def put_quote(self, quote: QuoteRecord, source_url: str = None) -> None: ...
+
+    async def get_page(self, url: str, max_age: float) -> tuple[QuotePageRecord, float] | None:
+        """
+        Страница и её возраст в секундах по ключу кеша, если она сохранена не более ``max_age`` секунд назад.
+        """
+
+    async def put_page(self, url: str, quote_page: QuotePageRecord) -> None: ...
+
+    async def get_file_ids(self, urls: list[str]) -> dict[str, str]:
+        """
+        Сохранённые file_id изображений по их ссылкам (ссылки без file_id пропускаются).
+        """
+
+    async def put_file_ids(self, file_ids: dict[str, str]) -> None: ...
+
+    async def delete_file_ids(self, urls: list[str]) -> None: ...
+
+    def warm(self, quote_cache: TTLCache, page_cache: TTLCache, photo_cache: TTLCache = None) -> int:
+        """
+        Заполнение кешей в памяти ещё не устаревшими записями.
+        Returns:
+            количество загруженных записей
+        """
+
+    def close(self) -> None: ...
@@ -0,0 +1,151 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class CacheEntry:
+    """
+    Запись кеша. После истечения времени жизни запись ещё ``stale_ttl`` секунд
+    доступна через ``TTLCache.lookup`` как устаревшая, например, для повторной проверки
+    на сайте-доноре по сохранённым в ``meta`` заголовкам.
+    """
+    __slots__ = ('value', 'expires_at', 'stale_until', 'size', 'meta')
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float, size: int, meta: Any):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.meta = meta
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.monotonic()
+
+    @property
+    def remaining(self) -> float:
+        """
+        Сколько секунд запись ещё будет свежей (ноль для устаревшей).
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def staleness(self) -> float:
+        """
+        Сколько секунд назад истекло время жизни записи (ноль для неустаревшей).
+        """
+        return max(0.0, time.monotonic() - self.expires_at)
+
+
+class TTLCache:
+    """
+    LRU-кеш с ограничением суммарного размера значений и собственным временем жизни каждой записи.
+    """
+    def __init__(self, max_size: int, sizeof: Callable[[Any], int] = sys.getsizeof):
+        self.max_size = max_size
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.size = 0
+        self.hits = self.stale_hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.fresh
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Значение по ключу, если оно есть в кеше и не устарело.
+        """
+        entry = self._live_entry(key)
+        if entry is None or not entry.fresh:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def lookup(self, key: Hashable) -> CacheEntry | None:
+        """
+        Запись по ключу, в том числе устаревшая, но ещё не удалённая.
+        """
+        entry = self._live_entry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry.fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0, meta: Any = None) -> None:
+        """
+        Сохранение значения на ``ttl`` секунд (и ещё на ``stale_ttl`` в качестве устаревшего).
+        Значения с нулевым временем жизни и не помещающиеся в кеш целиком не сохраняются.
+        """
+        if key in self._entries:
+            self._remove(key)
+        size = self._sizeof(value)
+        if ttl <= 0 or size > self.max_size:
+            return
+        expires_at = time.monotonic() + ttl
+        self._entries[key] = CacheEntry(value, expires_at, expires_at + stale_ttl, size, meta)
+        self.size += size
+        while self.size > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def touch(self, key: Hashable, ttl: float, stale_ttl: float = 0) -> bool:
+        """
+        Продление времени жизни имеющейся записи (например, если сайт-донор подтвердил,
+        что страница не изменилась).
+        Returns:
+            была ли запись в кеше
+        """
+        entry = self._live_entry(key)
+        if entry is None:
+            return False
+        entry.expires_at = time.monotonic() + ttl
+        entry.stale_until = entry.expires_at + stale_ttl
+        self._entries.move_to_end(key)
+        return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._entries:
+            return default
+        return self._remove(key).value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Счётчики попаданий, промахов и вытеснений, а также текущая заполненность кеша.
+        """
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'size': self.size
+        }
+
+    def _live_entry(self, key: Hashable) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.stale_until <= time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: Hashable) -> CacheEntry:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        return entry
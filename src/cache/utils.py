@@ -0,0 +1,73 @@
+import re
+
+import httpx
+
+from ..parser import const as parser_const
+from . import const
+
+_QUOTE_URL_PATTERN = re.compile(
+    r'^https://citaty\.info/(?:(?:quote|po|proverb|pritcha|parable)/\d+|ajax/en_body/\d+)$'
+)
+_RATING_URL_PATTERN = re.compile(r'^https://citaty\.info/rating/')
+
+
+def normalize_url(url: str | httpx.URL) -> str:
+    """
+    Приведение ссылки к единому виду: без фрагмента и завершающего слеша.
+    Examples:
+        ``https://Citaty.info/quote/35045#comments`` → ``https://citaty.info/quote/35045``
+    Raises:
+        httpx.InvalidURL: в случае некорректной ссылки
+    """
+    url = httpx.URL(url)
+    return str(url.copy_with(fragment=None)).rstrip('/')
+
+
+def cache_key(url: str | httpx.URL, page: str = None) -> str:
+    """
+    Ключ кеша для страницы: нормализованная ссылка и номер страницы пагинации, если он не нулевой.
+    """
+    url = normalize_url(url)
+    if page and page != '0':
+        return f'{url}?page={page}'
+    return url
+
+
+def url_ttl(url: str) -> float:
+    """
+    Время жизни закешированной страницы в зависимости от её вида.
+    """
+    url = normalize_url(url)
+    if url == parser_const.RANDOM_URL:
+        return const.RANDOM_TTL
+    if _QUOTE_URL_PATTERN.match(url):
+        return const.QUOTE_TTL
+    if _RATING_URL_PATTERN.match(url):
+        return const.RATING_TTL
+    return const.PAGE_TTL
+
+
+def validators(response: httpx.Response) -> dict[str, str] | None:
+    """
+    Заголовки ответа, по которым страницу можно проверить на изменения условным запросом.
+    """
+    result = {}
+    if etag := response.headers.get('ETag'):
+        result['etag'] = etag
+    if last_modified := response.headers.get('Last-Modified'):
+        result['last_modified'] = last_modified
+    return result or None
+
+
+def conditional_headers(page_validators: dict[str, str] | None) -> dict[str, str] | None:
+    """
+    Заголовки условного запроса, на который сайт-донор ответит 304, если страница не изменилась.
+    """
+    if not page_validators:
+        return None
+    headers = {}
+    if etag := page_validators.get('etag'):
+        headers['If-None-Match'] = etag
+    if last_modified := page_validators.get('last_modified'):
+        headers['If-Modified-Since'] = last_modified
+    return headers
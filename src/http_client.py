@@ -1,6 +1,128 @@
+import asyncio
+import logging
+import time
+
 import httpx
 
+from .metrics import registry
+from .upstream import AdaptiveLimiter, LatencyTracker, Priority, RequestPriority, RetryBudget
+from .upstream import const as upstream_const
+from .upstream import retry, streaming
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_EXCEPTIONS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadError,
+    httpx.RemoteProtocolError
+)
+
 http_client = httpx.AsyncClient(
     timeout=httpx.Timeout(10.0),
-    follow_redirects=True
+    follow_redirects=True,
+    limits=httpx.Limits(
+        max_connections=upstream_const.MAX_CONNECTIONS,
+        max_keepalive_connections=upstream_const.MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=upstream_const.KEEPALIVE_EXPIRY
+    )
+)
+upstream_limiter = AdaptiveLimiter()
+retry_budget = RetryBudget()
+upstream_latency = LatencyTracker()
+
+upstream_responses = registry.counter(
+    'upstream_responses_total', 'Ответы сайта-донора по кодам состояния (error — ошибка соединения)', ('status',)
 )
+upstream_in_flight = registry.gauge('upstream_in_flight', 'Выполняющиеся запросы к сайту-донору')
+upstream_in_flight.set_function(lambda: upstream_limiter.in_flight)
+upstream_window = registry.gauge('upstream_window', 'Окно одновременных запросов к сайту-донору')
+upstream_window.set_function(lambda: upstream_limiter.window)
+
+
+async def get(
+        url: str | httpx.URL,
+        params: dict = None,
+        priority: Priority | RequestPriority = Priority.interactive,
+        headers: dict = None,
+        stop_marker: bytes = None
+) -> httpx.Response:
+    """
+    GET-запрос к сайту-донору в пределах ограничений частоты и количества одновременных запросов.
+    Неудачные попытки (ошибки соединения, ответы 502/503/504) повторяются с экспоненциальной задержкой,
+    а слишком медленные запросы пользователей дублируются, пока это позволяет общий запас повторов.
+    Если задан ``stop_marker``, тело успешного ответа читается только до его первого вхождения включительно.
+    Приоритет ``RequestPriority`` может быть повышен во время ожидания в очереди ограничителя.
+    Raises:
+        httpx.HTTPError: если все попытки завершились ошибкой
+    """
+    retry_budget.deposit()
+    hedging_delay = None
+    if upstream_const.HEDGING_ENABLED and priority.value == Priority.interactive:
+        hedging_delay = upstream_latency.quantile(upstream_const.HEDGING_QUANTILE)
+    attempt = 0
+    while True:
+        try:
+            response = await retry.hedged(
+                lambda: _get_once(url, params, priority, headers, stop_marker),
+                hedging_delay,
+                retry_budget.withdraw
+            )
+        except RETRYABLE_EXCEPTIONS:
+            if attempt >= upstream_const.MAX_RETRIES or not retry_budget.withdraw():
+                raise
+        else:
+            if response.status_code not in upstream_const.RETRY_STATUS_CODES \
+                    or attempt >= upstream_const.MAX_RETRIES or not retry_budget.withdraw():
+                return response
+        attempt += 1
+        logger.info('Повтор запроса к сайту-донору', extra={'event': 'upstream_retry', 'url': str(url), 'attempt': attempt})
+        await asyncio.sleep(retry.backoff_delay(attempt))
+
+
+async def _get_once(
+        url: str | httpx.URL,
+        params: dict | None,
+        priority: Priority | RequestPriority,
+        headers: dict | None,
+        stop_marker: bytes | None
+) -> httpx.Response:
+    started_at = time.monotonic()  # Ожидание в очереди ограничителя тоже учитывается при дублировании
+    async with upstream_limiter.slot(priority) as slot:
+        try:
+            if stop_marker is None:
+                response = await http_client.get(url=url, params=params, headers=headers)
+            else:
+                response = await _get_prefix(url, params, headers, stop_marker)
+        except httpx.HTTPError as e:
+            upstream_responses.labels('error').inc()
+            logger.warning('Ошибка запроса к сайту-донору: %r', e, extra={'event': 'upstream_error', 'url': str(url)})
+            raise
+        upstream_responses.labels(str(response.status_code)).inc()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Ответ сайта-донора', extra={
+                'event': 'upstream_response', 'url': str(response.url), 'status': response.status_code,
+                'elapsed_ms': round((time.monotonic() - started_at) * 1e3, 1)
+            })
+        slot.failed = response.status_code in upstream_const.OVERLOAD_STATUS_CODES
+    if not slot.failed:
+        upstream_latency.add(time.monotonic() - started_at)
+    return response
+
+
+async def _get_prefix(
+        url: str | httpx.URL,
+        params: dict | None,
+        headers: dict | None,
+        stop_marker: bytes
+) -> httpx.Response:
+    """
+    Потоковое получение страницы с прекращением чтения после ``stop_marker``.
+    Если он не найден, используется тело целиком.
+    """
+    async with http_client.stream('GET', url=url, params=params, headers=headers) as response:
+        if response.status_code != httpx.codes.OK:
+            await response.aread()
+            return response
+        content, _ = await streaming.read_until(response, stop_marker)
+        return streaming.truncated_response(response, content)
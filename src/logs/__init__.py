@@ -0,0 +1,18 @@
+from .context import new_request_id, request_id
+from .filters import LoggedExceptionFilter, RequestContextFilter, SamplingFilter, mark_logged
+from .formatter import JsonFormatter
+from .pipeline import DroppingQueueHandler, StoppableQueueListener, setup_logging
+
+
+__all__ = [
+    DroppingQueueHandler.__name__,
+    JsonFormatter.__name__,
+    LoggedExceptionFilter.__name__,
+    RequestContextFilter.__name__,
+    SamplingFilter.__name__,
+    StoppableQueueListener.__name__,
+    mark_logged.__name__,
+    new_request_id.__name__,
+    'request_id',
+    setup_logging.__name__
+]
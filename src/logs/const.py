@@ -0,0 +1,11 @@
+LOG_LEVEL = 'INFO'
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Размер файла журнала, после которого он ротируется
+LOG_BACKUP_COUNT = 5              # Количество хранимых старых файлов журнала
+LOG_QUEUE_SIZE = 10_000           # Записи сверх очереди к фоновому писателю отбрасываются
+LOGGED_ATTRIBUTE = '_logged_with_context'  # Отметка исключения, уже записанного вместе с контекстом обновления
+
+# Частые события записываются выборочно: одно из N
+SAMPLING_RATES = {
+    'upstream_response': 20,
+    'handled': 10
+}
@@ -0,0 +1,15 @@
+import contextvars
+import itertools
+import os
+
+# Идентификатор обрабатываемого обновления: связывает записи о запросе, разборе и отправке ответа
+request_id: contextvars.ContextVar[str | None] = contextvars.ContextVar('request_id', default=None)
+
+_counter = itertools.count(1)
+
+
+def new_request_id() -> str:
+    """
+    Короткий идентификатор, уникальный среди процессов бота (включает PID).
+    """
+    return f'{os.getpid():x}-{next(_counter):x}'
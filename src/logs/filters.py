@@ -0,0 +1,58 @@
+import collections
+import logging
+
+from ..metrics import current_handler
+from . import const
+from .context import request_id
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Добавление к записи идентификатора обновления и имени обработчика, в рамках которых она сделана.
+    Применяется до постановки записи в очередь, пока контекст ещё доступен.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        record.handler = current_handler.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборочная запись частых событий (атрибут ``event`` записи): пропускается одна запись из N.
+    Предупреждения и ошибки пропускаются всегда.
+    """
+    def __init__(self, rates: dict[str, int] = const.SAMPLING_RATES):
+        super().__init__()
+        self.rates = rates
+        self._counters = collections.Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        if not rate:
+            return True
+        count = self._counters[record.event]
+        self._counters[record.event] = count + 1
+        if count % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class LoggedExceptionFilter(logging.Filter):
+    """
+    Отбрасывание повторных записей об исключении, уже записанном вместе с контекстом обновления
+    (см. ``mark_logged``). Так диспетчер pyrogram, который записывает каждое исключение обработчика
+    ещё раз, не дублирует запись обёртки обработчика.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not (record.exc_info and getattr(record.exc_info[1], const.LOGGED_ATTRIBUTE, False))
+
+
+def mark_logged(exception: BaseException) -> None:
+    """
+    Отметка исключения как записанного: следующие записи о нём отбрасываются ``LoggedExceptionFilter``.
+    """
+    setattr(exception, const.LOGGED_ATTRIBUTE, True)
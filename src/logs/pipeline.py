@@ -0,0 +1,89 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+from . import const
+from .filters import LoggedExceptionFilter, RequestContextFilter, SamplingFilter
+from .formatter import JsonFormatter
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Передача записей фоновому писателю без ожидания: при переполненной очереди запись отбрасывается.
+    Записи не сериализуются заранее — это делает писатель в своём потоке.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StoppableQueueListener(logging.handlers.QueueListener):
+    """
+    Фоновый писатель, который можно останавливать повторно: остановка уже остановленного
+    (или не запущенного) писателя ничего не делает. Оставшиеся в очереди записи пишутся при остановке.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = False
+
+    def start(self) -> None:
+        super().start()
+        self.running = True
+
+    def stop(self) -> None:
+        if self.running:
+            self.running = False
+            super().stop()
+
+
+def setup_logging(
+        path: str = None,
+        level: str = const.LOG_LEVEL,
+        max_bytes: int = const.LOG_MAX_BYTES,
+        backup_count: int = const.LOG_BACKUP_COUNT,
+        queue_size: int = const.LOG_QUEUE_SIZE
+) -> logging.handlers.QueueListener:
+    """
+    Настройка журнала процесса: записи в формате JSON Lines через очередь попадают к фоновому
+    писателю, который пишет их в файл ``path`` с ротацией по размеру (или в stderr, если путь не задан).
+    Обработчики бота никогда не ждут записи на диск.
+    Returns:
+        запущенный писатель (останавливается автоматически при завершении процесса)
+    """
+    if path:
+        writer = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    else:
+        writer = logging.StreamHandler(sys.stderr)
+    writer.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(LoggedExceptionFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = StoppableQueueListener(log_queue, writer, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
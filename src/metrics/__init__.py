@@ -0,0 +1,20 @@
+from .profiler import ProfileResult, SamplingProfiler, profiler
+from .registry import Counter, Gauge, Histogram, Registry, registry
+from .server import MetricsServer
+from .timing import current_handler, timed, track_phase
+
+
+__all__ = [
+    Counter.__name__,
+    Gauge.__name__,
+    Histogram.__name__,
+    MetricsServer.__name__,
+    ProfileResult.__name__,
+    Registry.__name__,
+    SamplingProfiler.__name__,
+    'current_handler',
+    'profiler',
+    'registry',
+    timed.__name__,
+    track_phase.__name__
+]
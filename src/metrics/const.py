@@ -0,0 +1,23 @@
+# Границы корзин гистограмм длительности в секундах
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_HOST = '127.0.0.1'  # Точка доступа метрик слушает только локальные подключения
+DUMP_INTERVAL = 15          # Интервал записи метрик в файл в секундах
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+PROFILE_INTERVAL = 0.005     # Интервал снятия стеков профилировщиком в секундах
+PROFILE_DURATION = 30        # Длительность профилирования по умолчанию в секундах
+PROFILE_MAX_DURATION = 600
+PROFILE_TOP = 15             # Количество функций в каждом разделе сводки
+PROFILE_DIR = 'profiles'
+# Разделы сводки профилирования: префиксы модулей, функции которых в них попадают
+PROFILE_SECTIONS = {
+    'Обработчики': ('src.telegram.handlers',),
+    'Разбор и форматирование': ('src.parser', 'src.telegram.formatters'),
+    'Получение данных': ('src.telegram.utils', 'src.http_client', 'src.upstream', 'src.cache')
+}
+# Функции, в которых потоки ждут событий или задач: такие снимки не попадают в сводку
+PROFILE_IDLE_FRAMES = (
+    'selectors:', 'threading:Condition.wait', 'queue:Queue.get', 'concurrent.futures.thread:_worker'
+)
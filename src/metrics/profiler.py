@@ -0,0 +1,156 @@
+import collections
+import dataclasses
+import logging
+import os
+import sys
+import threading
+import time
+from types import FrameType
+
+from . import const
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class ProfileResult:
+    """
+    Итог одного сеанса профилирования: пути к файлам отчёта и текст сводки.
+    """
+    collapsed_path: str
+    summary_path: str
+    summary: str
+    samples: int
+
+
+class SamplingProfiler:
+    """
+    Статистический профилировщик, включаемый во время работы процесса.
+    Отдельный поток с заданным интервалом снимает стеки всех остальных потоков (``sys._current_frames``),
+    поэтому профилируемый код не изменяется и не замедляется, а выключенный профилировщик
+    не стоит ничего: нет ни потока, ни перехватчиков.
+    Результат — файл свёрнутых стеков (формат ``flamegraph.pl``, ``speedscope`` и аналогов)
+    и сводка самых затратных функций бота.
+    """
+    def __init__(
+            self,
+            interval: float = const.PROFILE_INTERVAL,
+            output_dir: str = const.PROFILE_DIR,
+            top: int = const.PROFILE_TOP,
+            sections: dict[str, tuple[str, ...]] = const.PROFILE_SECTIONS,
+            idle_frames: tuple[str, ...] = const.PROFILE_IDLE_FRAMES
+    ):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.top = top
+        self.sections = sections
+        self.idle_frames = idle_frames
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, duration: float) -> ProfileResult | None:
+        """
+        Сбор стеков в течение ``duration`` секунд в текущем потоке и запись отчёта.
+        Returns:
+            итог сеанса или ``None``, если профилирование уже выполняется
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            logger.info('Профилирование запущено', extra={'event': 'profile_start', 'duration': duration})
+            result = self._write(*self._sample(duration))
+            logger.info('Профиль записан', extra={
+                'event': 'profile_done', 'path': result.collapsed_path, 'samples': result.samples
+            })
+            return result
+        finally:
+            self._lock.release()
+
+    def start(self, duration: float) -> bool:
+        """
+        Профилирование в фоновом потоке (например, по сигналу).
+        Returns:
+            запущено ли профилирование
+        """
+        if self.running:
+            return False
+        threading.Thread(target=self.profile, args=(duration,), name='profiler', daemon=True).start()
+        return True
+
+    def _sample(self, duration: float) -> tuple[collections.Counter[tuple[str, ...]], int]:
+        """
+        Returns:
+            количество снятий каждого стека (первый элемент — имя потока) и количество снимков
+        """
+        own_ident = threading.get_ident()
+        stacks = collections.Counter()
+        ticks = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            ticks += 1
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    stacks[(thread_names.get(ident, str(ident)), *_frame_labels(frame))] += 1
+            time.sleep(self.interval)
+        return stacks, ticks
+
+    def _write(self, stacks: collections.Counter[tuple[str, ...]], ticks: int) -> ProfileResult:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base_path = os.path.join(self.output_dir, f'profile-{os.getpid()}-{time.strftime("%Y%m%d-%H%M%S")}')
+        collapsed_path = f'{base_path}.collapsed'
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{";".join(stack)} {count}\n')
+        summary = self._summary(stacks, ticks)
+        summary_path = f'{base_path}.txt'
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(summary)
+        return ProfileResult(collapsed_path, summary_path, summary, ticks)
+
+    def _summary(self, stacks: collections.Counter[tuple[str, ...]], ticks: int) -> str:
+        """
+        Самые затратные функции каждого раздела: доля снимков, в которых функция была в стеке
+        какого-либо потока (вместе с вызванными ею), и доля, в которых выполнялась она сама.
+        Ожидающие потоки (см. ``idle_frames``) не учитываются.
+        """
+        total = ticks or 1
+        inclusive = collections.Counter()
+        own = collections.Counter()
+        for stack, count in stacks.items():
+            if stack[-1].startswith(self.idle_frames):
+                continue
+            for label in set(stack[1:]):
+                inclusive[label] += count
+            own[stack[-1]] += count
+        lines = [f'Снимков: {ticks}, интервал {self.interval * 1e3:g} мс']
+        for title, prefixes in self.sections.items():
+            lines.append(f'\n{title}:')
+            section = [label for label, _ in inclusive.most_common() if label.startswith(prefixes)]
+            for label in section[:self.top]:
+                lines.append(
+                    f'{inclusive[label] / total:7.1%} {own[label] / total:7.1%}  {label}'
+                )
+        lines.append('\nСобственное время всех функций:')
+        for label, count in own.most_common(self.top):
+            lines.append(f'{count / total:7.1%}  {label}')
+        return '\n'.join(lines) + '\n'
+
+
+def _frame_labels(frame: FrameType) -> list[str]:
+    """
+    Стек вызовов от внешней функции к текущей в виде ``модуль:функция``.
+    """
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_qualname}')
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,177 @@
+import bisect
+from typing import Callable, Iterable, Iterator
+
+from . import const
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [
+        '%s="%s"' % (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """
+    Метрика с набором меток. Значения для каждого сочетания меток хранятся в дочерних объектах,
+    которые создаются при первом обращении и затем берутся из словаря. Вместо явного изменения
+    значение может вычисляться функцией в момент отдачи метрик (``set_function``),
+    не нагружая горячий путь.
+    """
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name}: ожидаются метки {self.labelnames}')
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type_name}'
+        for values, child in list(self._children.items()):
+            yield from self._render_child(_format_labels(self.labelnames, values), values, child)
+        for values, func in list(self._functions.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(func())}'
+
+    def set_function(self, func: Callable[[], float], *values: str) -> None:
+        self._functions[values] = func
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _render_child(self, labels: str, values: tuple[str, ...], child) -> Iterator[str]:
+        yield f'{self.name}{labels} {_format_value(child.value)}'
+
+
+class _Value:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """
+    Монотонно возрастающий счётчик.
+    """
+    type_name = 'counter'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(_Metric):
+    """
+    Текущее значение величины.
+    """
+    type_name = 'gauge'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _HistogramValue:
+    __slots__ = ('upper_bounds', 'counts', 'sum')
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """
+    Распределение значений по корзинам с фиксированными верхними границами.
+    """
+    type_name = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: tuple[float, ...] = const.DURATION_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _render_child(self, labels: str, values: tuple[str, ...], child: _HistogramValue) -> Iterator[str]:
+        cumulative = 0
+        for upper_bound, count in zip((*self.buckets, '+Inf'), child.counts):
+            cumulative += count
+            bucket_labels = _format_labels(self.labelnames, values, f'le="{upper_bound}"')
+            yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+        yield f'{self.name}_sum{labels} {_format_value(child.sum)}'
+        yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    """
+    Набор метрик процесса, отдаваемый в текстовом формате Prometheus.
+    """
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: tuple[float, ...] = const.DURATION_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Метрика {metric.name} уже зарегистрирована')
+        self._metrics[metric.name] = metric
+        return metric
+
+
+# Метрики процесса по умолчанию
+registry = Registry()
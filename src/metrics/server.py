@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+import os
+
+from . import const
+from .registry import Registry, registry as default_registry
+
+
+class MetricsServer:
+    """
+    Минимальный HTTP-сервер, отдающий метрики по ``GET /metrics`` в текстовом формате Prometheus,
+    и, если задан ``dump_path``, периодическая запись того же текста в файл.
+    """
+    def __init__(
+            self,
+            port: int = None,
+            host: str = const.METRICS_HOST,
+            dump_path: str = None,
+            dump_interval: float = const.DUMP_INTERVAL,
+            registry: Registry = default_registry
+    ):
+        self.port = port
+        self.host = host
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.registry = registry
+        self._server: asyncio.Server | None = None
+        self._dump_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.port is not None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.dump_path:
+            self._dump_task = asyncio.create_task(self._dump_periodically())
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._dump_task is not None:
+            self._dump_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._dump_task
+            self._dump_task = None
+            self.dump()
+
+    def dump(self) -> None:
+        """
+        Атомарная запись текущих метрик в файл.
+        """
+        temp_path = f'{self.dump_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render())
+        os.replace(temp_path, self.dump_path)
+
+    async def _dump_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.dump_interval)
+            await asyncio.to_thread(self.dump)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():  # Заголовки запроса не нужны
+                pass
+            method, path, *_ = request_line.decode('latin-1').split() or ('', '')
+            if method == 'GET' and path.split('?')[0] in ('/', '/metrics'):
+                status, content_type, body = '200 OK', const.CONTENT_TYPE, self.registry.render().encode()
+            else:
+                status, content_type, body = '404 Not Found', 'text/plain', b'Not Found\n'
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,56 @@
+import contextlib
+import contextvars
+import functools
+import time
+from typing import Callable, Iterator
+
+from .registry import registry
+
+# Обработчик, в рамках которого выполняется текущий код (фоновые задачи — ``background``)
+current_handler: contextvars.ContextVar[str] = contextvars.ContextVar('current_handler', default='background')
+# Замеряемый сейчас этап: вложенные этапы (например, форматирование цитаты внутри форматирования страницы)
+# не замеряются повторно
+_current_phase: contextvars.ContextVar[str | None] = contextvars.ContextVar('current_phase', default=None)
+
+phase_seconds = registry.histogram(
+    'bot_phase_seconds',
+    'Длительность этапов обработки: запрос к сайту-донору, разбор, форматирование, отправка в Telegram',
+    ('handler', 'phase')
+)
+
+
+@contextlib.contextmanager
+def track_phase(phase: str) -> Iterator[None]:
+    """
+    Замер этапа обработки текущего обработчика. Подходит и для кода с ``await`` внутри.
+    """
+    if _current_phase.get() is not None:
+        yield
+        return
+    token = _current_phase.set(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_seconds.labels(current_handler.get(), phase).observe(time.perf_counter() - start)
+        _current_phase.reset(token)
+
+
+def timed(phase: str) -> Callable[[Callable], Callable]:
+    """
+    Декоратор синхронной функции (в том числе свойства), замеряющий её как этап ``phase``.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_phase.get() is not None:
+                return func(*args, **kwargs)
+            token = _current_phase.set(phase)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                phase_seconds.labels(current_handler.get(), phase).observe(time.perf_counter() - start)
+                _current_phase.reset(token)
+        return wrapper
+    return decorator
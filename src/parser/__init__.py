@@ -1,14 +1,39 @@
-from ._entities.quote import Quote
-from ._entities.quote_page import QuotePage
-from ._entities.quote_types import QuoteTypes
-from ._entities.taxonomy_elem import TaxonomyElem
-from ._entities.topic import Topic
-
-
-__all__ = [
-    Quote.__name__,
-    QuotePage.__name__,
-    QuoteTypes.__name__,
-    TaxonomyElem.__name__,
-    Topic.__name__
-]
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ._entities.quote import Quote
+    from ._entities.quote_page import QuotePage
+    from ._entities.quote_types import QuoteTypes
+    from ._entities.records import QuoteRecord, QuotePageRecord
+    from ._entities.taxonomy_elem import TaxonomyElem
+    from ._entities.topic import Topic
+    from .executor import ParsingExecutor
+
+# Имя -> модуль пакета, в котором оно определено. Модули импортируются при первом обращении к имени,
+# а не при импорте пакета: так ``const`` и ``utils`` доступны процессу-диспетчеру без selectolax и классов разбора
+_EXPORTS = {
+    'ParsingExecutor': '.executor',
+    'Quote': '._entities.quote',
+    'QuotePage': '._entities.quote_page',
+    'QuoteRecord': '._entities.records',
+    'QuotePageRecord': '._entities.records',
+    'QuoteTypes': '._entities.quote_types',
+    'TaxonomyElem': '._entities.taxonomy_elem',
+    'Topic': '._entities.topic'
+}
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value  # Следующие обращения не доходят до __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_EXPORTS))
+
+
+__all__ = list(_EXPORTS)
@@ -9,34 +9,58 @@ from .taxonomy_elem import TaxonomyElem
 from .topic import Topic
 
 
-class Quote:
+@functools.cache
+def taxonomy_templates() -> dict[str, TaxonomyElem]:
     """
-    Единичная цитата.
+    Шаблоны элементов таксономии по заголовкам их страниц.
+    Загружаются из данных пакета при первом обращении и далее берутся из памяти.
     """
-    with open('src/parser/data/taxonomy_templates_by_tags.json', encoding=const.STR_ENCODING) as f:
+    with open(const.DATA_DIR / 'taxonomy_templates_by_tags.json', encoding=const.STR_ENCODING) as f:
         raw_taxonomy_templates: list = json.load(f)
-    TAXONOMY_TEMPLATES = {}
-    for template in raw_taxonomy_templates:
-        TAXONOMY_TEMPLATES[template['page_title']] = TaxonomyElem(
+    return {
+        template['page_title']: TaxonomyElem(
             emoji=template['emoji'],
             title=template['replacement'],
             content=template['content']
-        )
-    # with open('src/parser/data/taxonomy_templates_by_links.json', encoding=const.STR_ENCODING) as f:
+        ) for template in raw_taxonomy_templates
+    }
+    # with open(const.DATA_DIR / 'taxonomy_templates_by_links.json', encoding=const.STR_ENCODING) as f:
     #     raw_taxonomy_templates: list = json.load(f)
-    # TAXONOMY_TEMPLATES = {}
-    # for template in raw_taxonomy_templates:
-    #     TAXONOMY_TEMPLATES[template['rel_link']] = TaxonomyElem(
+    # return {
+    #     template['rel_link']: TaxonomyElem(
     #         emoji=template['emoji'],
     #         title=template['title']
-    #     )
+    #     ) for template in raw_taxonomy_templates
+    # }
 
+
+class Quote:
+    """
+    Единичная цитата.
+    """
     @classmethod
     def _get_taxonomy_elem(cls, key: str) -> TaxonomyElem:
         """
         Копия элемента таксономии для редактирования.
         """
-        return cls.TAXONOMY_TEMPLATES[key].copy()
+        return taxonomy_templates()[key].copy()
+
+    @staticmethod
+    def _taxonomy_key(link_tag: LexborNode) -> str:
+        """
+        Ключ шаблона элемента таксономии по ссылке на него.
+        Raises:
+            ValueError: в случае неизвестного элемента таксономии
+        """
+        key = link_tag.attributes.get('title')
+        if not key:
+            if '/kvn/' in link_tag.attributes['href']:
+                key = 'КВН'
+            elif link_tag.attributes['href'] == '/other':
+                key = 'Автор неизвестен'
+            else:
+                raise ValueError(f'Неизвестный элемент таксономии: {link_tag.attributes["href"]}')
+        return key
 
     @classmethod
     def get_original_text(cls, html_page: str) -> str:
@@ -48,7 +72,7 @@ class Quote:
 
     def __init__(
             self,
-            html_page: str = None,
+            html_page: str | bytes = None,
             article_tag: LexborNode = None
     ):
         assert html_page and not article_tag \
@@ -187,14 +211,7 @@ class Quote:
                     'div.node__content > div.field-type-taxonomy-term-reference')
                 for tag in taxonomy_tags:
                     if link_tag := tag.css_first('a'):  # Бывает, что находятся пустые div'ы без ссылок
-                        key = link_tag.attributes.get('title')
-                        if not key:
-                            if '/kvn/' in link_tag.attributes['href']:
-                                key = 'КВН'
-                            elif link_tag.attributes['href'] == '/other':
-                                key = 'Автор неизвестен'
-                            else:
-                                raise ValueError(key)
+                        key = self._taxonomy_key(link_tag)
                         taxonomy_elem = self._get_taxonomy_elem(key)
                         if key != 'Автор неизвестен':
                             for link_tag in tag.css('a'):
@@ -209,14 +226,26 @@ class Quote:
         """
         Заголовок цитаты для отображения в списке коротких цитат.
         """
-        match self.type:
+        parable_header = self._parable_header if self.type == QuoteTypes.pritcha else None
+        return self.build_header(self.type, self.taxonomy, parable_header)
+
+    @staticmethod
+    def build_header(
+            quote_type: QuoteTypes,
+            taxonomy: list[TaxonomyElem],
+            parable_header: str | None = None
+    ) -> str | None:
+        """
+        Заголовок цитаты по её типу, элементам таксономии и названию притчи.
+        """
+        match quote_type:
             case QuoteTypes.pritcha:
-                return f'Притча «{self._parable_header}»'
+                return f'Притча «{parable_header}»'
             case QuoteTypes.po:
-                return self.taxonomy[0].plain_content
+                return taxonomy[0].plain_content
             case QuoteTypes.quote:
                 authors = source = characters = None
-                for taxonomy_elem in self.taxonomy:
+                for taxonomy_elem in taxonomy:
                     match taxonomy_elem.title:
                         case 'Эпизод':
                             continue
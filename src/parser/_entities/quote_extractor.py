@@ -0,0 +1,232 @@
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+from .. import utils
+from .quote import Quote
+from .quote_page import QuotePage
+from .quote_types import QuoteTypes
+from .records import QuoteRecord, QuotePageRecord
+from .topic import Topic
+
+
+class _ArticleWalker:
+    """
+    Однократный обход тега article, собирающий всё, что ``Quote`` находит отдельными
+    CSS-запросами. Порядок и область поиска каждого элемента совпадают с соответствующим селектором.
+    """
+    def __init__(self, article_tag: LexborNode):
+        self.image_links: list[str] = []
+        self.explanation_tag: LexborNode | None = None
+        self.has_original = False
+        self.first_h2: LexborNode | None = None
+        self.series_tag: LexborNode | None = None
+        self.series_items: list[list] = []           # [div.field-item, первая ссылка внутри]
+        self.taxonomy_groups: list[list[LexborNode]] = []
+        self.first_taxonomy_link: LexborNode | None = None
+        self.topic_links: list[LexborNode] = []
+        self.body_tags: list[LexborNode] = []
+        self.body_links: list[LexborNode] = []
+
+        self._content_state = 0  # 0 — до первого div.node__content, 1 — внутри него, 2 — после
+        self._topics_state = 0   # То же для первого div.node__topics
+        self._series_state = 0   # То же для первого div.node__series
+        self._description_depth = self._body_depth = self._taxonomy_depth = 0
+        self._open_series_items: list[list] = []
+        self._open_taxonomy_groups: list[list[LexborNode]] = []
+        self._walk(article_tag, False)
+
+    def _walk(self, parent: LexborNode, parent_is_content: bool) -> None:
+        for node in parent.iter():
+            tag = node.tag
+            if tag == 'div':
+                self._walk_div(node, parent_is_content)
+                continue
+            in_content = self._content_state == 1
+            if tag == 'a':
+                self._add_link(node, in_content)
+            elif tag == 'img':
+                if in_content:
+                    self.image_links.append(node.attributes['src'])
+            elif tag == 'h2':
+                if in_content and self.first_h2 is None:
+                    self.first_h2 = node
+            self._walk(node, False)
+
+    def _walk_div(self, node: LexborNode, parent_is_content: bool) -> None:
+        classes = node.attributes.get('class')
+        classes = classes.split() if classes else ()
+        in_content = self._content_state == 1
+        is_content = 'node__content' in classes
+        entered_content = is_content and self._content_state == 0
+        entered_topics = entered_series = is_description = is_body = False
+        taxonomy_group = None
+        series_item = None
+        is_taxonomy = 'field-type-taxonomy-term-reference' in classes
+
+        if in_content:
+            if 'field-item' in classes:
+                if self._description_depth and self.explanation_tag is None:
+                    self.explanation_tag = node
+                if self._series_state == 1:
+                    series_item = [node, None]
+                    self.series_items.append(series_item)
+                    self._open_series_items.append(series_item)
+            if 'quote__original' in classes:
+                self.has_original = True
+            if 'field-name-field-description' in classes:
+                is_description = True
+                self._description_depth += 1
+            if 'node__series' in classes and self._series_state == 0:
+                entered_series = True
+                self.series_tag = node
+                self._series_state = 1
+            if 'node__topics' in classes and self._topics_state == 0:
+                entered_topics = True
+                self._topics_state = 1
+            if 'field-name-body' in classes:
+                is_body = True
+                self.body_tags.append(node)
+                self._body_depth += 1
+        if is_taxonomy:
+            self._taxonomy_depth += 1
+            if parent_is_content:
+                taxonomy_group = []
+                self.taxonomy_groups.append(taxonomy_group)
+                self._open_taxonomy_groups.append(taxonomy_group)
+        if entered_content:
+            self._content_state = 1
+
+        self._walk(node, is_content)
+
+        if entered_content:
+            self._content_state = 2
+        if is_taxonomy:
+            self._taxonomy_depth -= 1
+            if taxonomy_group is not None:
+                self._open_taxonomy_groups.pop()
+        if is_body:
+            self._body_depth -= 1
+        if entered_topics:
+            self._topics_state = 2
+        if entered_series:
+            self._series_state = 2
+        if is_description:
+            self._description_depth -= 1
+        if series_item is not None:
+            self._open_series_items.pop()
+
+    def _add_link(self, node: LexborNode, in_content: bool) -> None:
+        if in_content:
+            if self._topics_state == 1:
+                self.topic_links.append(node)
+            if self._body_depth:
+                self.body_links.append(node)
+            for series_item in self._open_series_items:
+                if series_item[1] is None:
+                    series_item[1] = node
+        for taxonomy_group in self._open_taxonomy_groups:
+            taxonomy_group.append(node)
+        if self._taxonomy_depth and self.first_taxonomy_link is None:
+            self.first_taxonomy_link = node
+
+
+def extract_quote(article_tag: LexborNode, parable_header: str = None) -> QuoteRecord:
+    """
+    Снимок цитаты, полученный за один обход тега article.
+    Результат совпадает с ``QuoteRecord.from_quote(Quote(article_tag=article_tag))``.
+    """
+    walker = _ArticleWalker(article_tag)
+    quote_class = article_tag.attributes['class']
+    if 'node-po' in quote_class:
+        quote_type = QuoteTypes.po
+    elif 'node-pritcha' in quote_class:
+        quote_type = QuoteTypes.pritcha
+    else:
+        quote_type = QuoteTypes.quote
+
+    taxonomy = []
+    match quote_type:
+        case QuoteTypes.pritcha:
+            parable_header = utils.optimize_text(parable_header or walker.first_h2.text())
+            taxonomy_elem = Quote._get_taxonomy_elem('Притча')
+            taxonomy_elem.add_content(parable_header)
+            taxonomy.append(taxonomy_elem)
+        case QuoteTypes.po:
+            taxonomy_link = walker.first_taxonomy_link
+            taxonomy_elem = Quote._get_taxonomy_elem('Фольклор')
+            taxonomy_elem.add_content(
+                text=taxonomy_link.text(),
+                url=taxonomy_link.attributes['href']
+            )
+            taxonomy.append(taxonomy_elem)
+        case QuoteTypes.quote:
+            for links in walker.taxonomy_groups:
+                if links:
+                    key = Quote._taxonomy_key(links[0])
+                    taxonomy_elem = Quote._get_taxonomy_elem(key)
+                    if key != 'Автор неизвестен':
+                        for link_tag in links:
+                            taxonomy_elem.add_content(link_tag.text(), link_tag.attributes['href'])
+                    taxonomy.append(taxonomy_elem)
+            if walker.series_tag is not None:
+                taxonomy_elem = Quote._get_taxonomy_elem('Эпизод')
+                for series_tag, link_tag in walker.series_items:
+                    if link_tag:
+                        taxonomy_elem.add_content(link_tag.text(), link_tag.attributes['href'])
+                    else:
+                        taxonomy_elem.add_content(series_tag.text())
+                taxonomy.append(taxonomy_elem)
+
+    topics, used_topic_urls = [], []
+    for link_tag in walker.topic_links + walker.body_links:
+        topic = Topic(link_tag.text(), link_tag.attributes['href'])
+        if topic.url not in used_topic_urls:
+            topics.append(topic)
+        used_topic_urls.append(topic.url)
+
+    match walker.body_tags:
+        case (text_tag,):
+            text = utils.optimize_text(text_tag.text())
+        case original_tag, translation_tag:
+            text = utils.optimize_text(original_tag.text()), utils.optimize_text(translation_tag.text())
+        case _:
+            raise ValueError('Отсутствует текст цитаты')
+
+    explanation = None
+    if walker.explanation_tag is not None:
+        explanation = utils.optimize_text(walker.explanation_tag.text())
+
+    return QuoteRecord(
+        id=article_tag.id.removeprefix('node-'),
+        type=quote_type,
+        text=text,
+        header=Quote.build_header(quote_type, taxonomy, parable_header),
+        taxonomy=taxonomy,
+        topics=topics,
+        image_links=walker.image_links,
+        explanation=explanation,
+        has_original=walker.has_original
+    )
+
+
+def extract_quote_from_html(html_page: str | bytes) -> QuoteRecord:
+    """
+    Снимок цитаты со страницы единичной цитаты.
+    """
+    tree = LexborHTMLParser(html_page).body
+    parable_header = tree.css_first('h1')
+    if parable_header is not None:
+        parable_header = parable_header.text()
+    return extract_quote(tree.css_first('article'), parable_header)
+
+
+def extract_page(html_page: str | bytes) -> QuotePageRecord:
+    """
+    Снимок страницы с цитатами, каждая из которых получена за один обход.
+    """
+    page = QuotePage(html_page)
+    return QuotePageRecord(
+        header=page.header,
+        quotes=[extract_quote(article_tag) for article_tag in page.article_tags],
+        pagination=page.pagination,
+        non_quote_search_results=page.non_quote_search_results
+    )
@@ -1,6 +1,6 @@
 import functools
 
-from selectolax.lexbor import LexborHTMLParser
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
 from .. import utils
 from .quote import Quote
@@ -10,7 +10,7 @@ class QuotePage:
     """
     Страница с цитатами.
     """
-    def __init__(self, html_page: str):
+    def __init__(self, html_page: str | bytes):
         self._tree = LexborHTMLParser(html_page)
         self._page_tag = self._tree.css_first('main > div')
 
@@ -24,17 +24,24 @@ class QuotePage:
         )
 
     @functools.cached_property
-    def quotes(self) -> list[Quote]:
+    def article_tags(self) -> list[LexborNode]:
         """
-        Список цитат, находящихся на странице.
+        Теги цитат, находящихся на странице.
         """
         no_results = self._page_tag.css_first('h2')
         if no_results and no_results.text() == 'Ваш поиск не принес результатов':
             return []
+        return self._page_tag.css('article')
+
+    @functools.cached_property
+    def quotes(self) -> list[Quote]:
+        """
+        Список цитат, находящихся на странице.
+        """
         return [
             Quote(
                 article_tag=article_tag
-            ) for article_tag in self._page_tag.css('article')
+            ) for article_tag in self.article_tags
         ]
 
     @functools.cached_property
@@ -46,10 +53,10 @@ class QuotePage:
         """
         groups = {}
         for group in self._page_tag.css('div.search__results > div.search__results__group'):
+            link_tags = group.css('a')
             content = [
-                {'text': utils.optimize_text(link_tag.text()),
-                 'url': link_tag.attributes['href']}
-                for link_tag in group.css('a')
+                {'text': text, 'url': link_tag.attributes['href']}
+                for text, link_tag in zip(utils.optimize_texts(link_tag.text() for link_tag in link_tags), link_tags)
             ]
             group_title = utils.optimize_text(
                 group.css_first('div.search__results__group__title').text()
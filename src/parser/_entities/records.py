@@ -0,0 +1,188 @@
+from .quote import Quote
+from .quote_page import QuotePage
+from .quote_types import QuoteTypes
+from .taxonomy_elem import TaxonomyElem
+from .topic import Topic
+
+
+class QuoteRecord:
+    """
+    Компактный снимок разобранной цитаты. Совместим с ``Quote`` по используемым
+    форматировщиками атрибутам, но не хранит HTML-дерево и сериализуется в словарь.
+    """
+    __slots__ = ('id', 'type', 'text', 'header', 'taxonomy', 'topics',
+                 'image_links', 'explanation', 'has_original', '_version')
+
+    def __init__(
+            self,
+            id: str,
+            type: QuoteTypes,
+            text: str | tuple[str, str],
+            header: str | None,
+            taxonomy: list[TaxonomyElem],
+            topics: list[Topic],
+            image_links: list[str],
+            explanation: str | None,
+            has_original: bool
+    ):
+        self.id = id
+        self.type = type
+        self.text = text
+        self.header = header
+        self.taxonomy = taxonomy
+        self.topics = topics
+        self.image_links = image_links
+        self.explanation = explanation
+        self.has_original = has_original
+        self._version = None
+
+    @classmethod
+    def from_quote(cls, quote: Quote) -> 'QuoteRecord':
+        """
+        Снимок цитаты: все её свойства вычисляются один раз.
+        """
+        return cls(
+            id=quote.id,
+            type=quote.type,
+            text=quote.text,
+            header=quote.header,
+            taxonomy=quote.taxonomy,
+            topics=quote.topics,
+            image_links=quote.image_links,
+            explanation=quote.explanation,
+            has_original=bool(quote.has_original)
+        )
+
+    @property
+    def rel_link(self) -> str:
+        """
+        Относительная ссылка на цитату.
+        Examples:
+            ``quote/35045``: https://citaty.info/quote/35045
+        """
+        return f'{self.type.name}/{self.id}'
+
+    @property
+    def version(self) -> int:
+        """
+        Версия содержимого (хеш всех полей): совпадает у снимков с одинаковым содержимым, например,
+        у цитаты, полученной заново без изменений. Вычисляется при первом обращении.
+        """
+        if self._version is None:
+            self._version = hash((
+                self.id, self.type, self.text, self.header, self.explanation, self.has_original,
+                tuple(self.image_links),
+                tuple((elem.emoji, elem.title, tuple(
+                    item if isinstance(item, str) else (item['text'], item['url']) for item in elem.content
+                )) for elem in self.taxonomy),
+                tuple((topic.text, topic.url) for topic in self.topics)
+            ))
+        return self._version
+
+    def as_dict(self) -> dict:
+        """
+        Представление цитаты из простых типов (для JSON и других форматов хранения).
+        """
+        return {
+            'id': self.id,
+            'type': self.type.name,
+            'text': self.text if isinstance(self.text, str) else list(self.text),
+            'header': self.header,
+            'taxonomy': [[elem.emoji, elem.title, elem.content] for elem in self.taxonomy],
+            'topics': [[topic.text, topic.url] for topic in self.topics],
+            'image_links': self.image_links,
+            'explanation': self.explanation,
+            'has_original': self.has_original
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'QuoteRecord':
+        text = data['text']
+        return cls(
+            id=data['id'],
+            type=QuoteTypes[data['type']],
+            text=text if isinstance(text, str) else tuple(text),
+            header=data['header'],
+            taxonomy=[TaxonomyElem(emoji, title, content) for emoji, title, content in data['taxonomy']],
+            topics=[Topic.restore(text, url) for text, url in data['topics']],
+            image_links=data['image_links'],
+            explanation=data['explanation'],
+            has_original=data['has_original']
+        )
+
+
+class QuotePageRecord:
+    """
+    Компактный снимок разобранной страницы с цитатами. Совместим с ``QuotePage``
+    по используемым форматировщиками атрибутам.
+    """
+    __slots__ = ('header', 'quotes', 'pagination', 'non_quote_search_results', '_version')
+
+    def __init__(
+            self,
+            header: str,
+            quotes: list[QuoteRecord],
+            pagination: list[int],
+            non_quote_search_results: dict[str, list[dict[str, str]]]
+    ):
+        self.header = header
+        self.quotes = quotes
+        self.pagination = pagination
+        self.non_quote_search_results = non_quote_search_results
+        self._version = None
+
+    @classmethod
+    def from_page(cls, page: QuotePage) -> 'QuotePageRecord':
+        return cls(
+            header=page.header,
+            quotes=[QuoteRecord.from_quote(quote) for quote in page.quotes],
+            pagination=page.pagination,
+            non_quote_search_results=page.non_quote_search_results
+        )
+
+    @property
+    def quote_links(self) -> list[str]:
+        """
+        Относительные ссылки на цитаты страницы.
+        """
+        return [quote.rel_link for quote in self.quotes]
+
+    @property
+    def version(self) -> int:
+        """
+        Версия содержимого страницы (см. ``QuoteRecord.version``).
+        """
+        if self._version is None:
+            self._version = hash((
+                self.header,
+                tuple(quote.version for quote in self.quotes),
+                tuple(self.pagination),
+                tuple(
+                    (group, tuple((link['text'], link['url']) for link in links))
+                    for group, links in self.non_quote_search_results.items()
+                )
+            ))
+        return self._version
+
+    def replace_quotes(self, quotes: list[QuoteRecord]) -> 'QuotePageRecord':
+        """
+        Копия страницы с другим списком цитат (сама запись может находиться в кеше и не должна меняться).
+        """
+        return QuotePageRecord(self.header, quotes, self.pagination, self.non_quote_search_results)
+
+    def as_dict(self) -> dict:
+        return {
+            'header': self.header,
+            'quotes': [quote.as_dict() for quote in self.quotes],
+            'pagination': self.pagination,
+            'non_quote_search_results': self.non_quote_search_results
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'QuotePageRecord':
+        return cls(
+            header=data['header'],
+            quotes=[QuoteRecord.from_dict(quote) for quote in data['quotes']],
+            pagination=data['pagination'],
+            non_quote_search_results=data['non_quote_search_results']
+        )
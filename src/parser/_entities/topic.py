@@ -4,3 +4,13 @@ class Topic:
                               .replace(' ', '_') \
                               .replace(',_', ' #')
         self.url = url
+
+    @classmethod
+    def restore(cls, text: str, url: str) -> 'Topic':
+        """
+        Восстановление хэштега из уже преобразованного текста (например, из хранилища).
+        """
+        topic = cls.__new__(cls)
+        topic.text = text
+        topic.url = url
+        return topic
@@ -1,6 +1,15 @@
+import pathlib
 import re
 
 STR_ENCODING = 'utf-8'
+DATA_DIR = pathlib.Path(__file__).parent / 'data'
+
+PARSER_MODE = 'thread'  # Где разбираются страницы: в пуле потоков (thread) или процессов (process)
+PARSER_WORKERS = 2      # Количество исполнителей пула; 0 — разбор прямо в цикле событий
+# Собирать поля цитаты за один обход тега article вместо отдельных CSS-запросов. Сам сбор полей так
+# в 1,3–2,8 раза быстрее на всех видах цитат (``python -m benchmarks.bench_extractor``); разбор HTML в дерево
+# у обоих способов общий и на единичных цитатах перекрывает выигрыш шумом замеров страницы целиком
+SINGLE_PASS_EXTRACTION = True
 
 BASE_URL = 'https://citaty.info/%s'
 SEARCH_URL = BASE_URL % 'search/site/%s'
@@ -8,6 +17,9 @@ QUOTE_URL = BASE_URL % 'quote/%s'
 AJAX_URL = BASE_URL % 'ajax/en_body/%s'
 RANDOM_URL = BASE_URL % 'random'
 
+# Для разбора единичной цитаты достаточно начала страницы до конца первого тега article
+QUOTE_END_MARKER = b'</article>'
+
 QUOTE_PATTERN = re.compile(
     fr'^{BASE_URL % ""}(?:random|(?:quote|po|proverb|pritcha|parable)/(\d+)(?:#comment(?:-form|s))?)$'
 )
@@ -17,3 +29,9 @@ GET_QUOTE_CALLBACK_PATTERN = re.compile(r'(?:quote|po|proverb|pritcha|parable)/\
 PAGE_PATTERN = re.compile(r'p(\d+)')
 
 COMMON_URL_PATTERN = re.compile(r'^https://citaty\.info/.+')
+
+# Сокращение текста (см. ``utils.optimize_text``). Шаблоны начинаются с заменяемой последовательности
+# целиком, чтобы регулярные выражения искали её так же быстро, как ``str.replace``
+SPACES_PATTERN = re.compile(r'   *')
+NEWLINES_PATTERN = re.compile(r'\n\n\n\n*')
+FRAGMENT_SEPARATOR = '\x00'  # Разделитель фрагментов при пакетном сокращении текста
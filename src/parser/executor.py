@@ -0,0 +1,80 @@
+from typing import Callable, Literal
+
+from . import const
+from ._entities.quote import Quote
+from ._entities.quote_extractor import extract_page, extract_quote_from_html
+from ._entities.quote_page import QuotePage
+from ._entities.records import QuoteRecord, QuotePageRecord
+
+
+def parse_quote(html_page: str | bytes) -> QuoteRecord:
+    """
+    Разбор страницы единичной цитаты в компактный снимок, который можно передать между процессами.
+    """
+    if const.SINGLE_PASS_EXTRACTION:
+        return extract_quote_from_html(html_page)
+    return QuoteRecord.from_quote(Quote(html_page=html_page))
+
+
+def parse_page(html_page: str | bytes) -> QuotePageRecord:
+    """
+    Разбор страницы с цитатами в компактный снимок, который можно передать между процессами.
+    """
+    if const.SINGLE_PASS_EXTRACTION:
+        return extract_page(html_page)
+    return QuotePageRecord.from_page(QuotePage(html_page=html_page))
+
+
+def parse_original(html_page: str) -> str:
+    """
+    Разбор фрагмента с оригиналом цитаты на иностранном языке.
+    """
+    return Quote.get_original_text(html_page)
+
+
+class ParsingExecutor:
+    """
+    Разбор HTML-страниц вне цикла событий: в пуле потоков (Lexbor отпускает GIL во время разбора)
+    или в пуле процессов. При нулевом количестве исполнителей страницы разбираются на месте.
+    """
+    def __init__(
+            self,
+            mode: Literal['thread', 'process'] = const.PARSER_MODE,
+            workers: int = const.PARSER_WORKERS
+    ):
+        self.mode = mode
+        self.workers = workers
+        self._executor = None
+
+    async def quote(self, html_page: str | bytes) -> QuoteRecord:
+        return await self._run(parse_quote, html_page)
+
+    async def page(self, html_page: str | bytes) -> QuotePageRecord:
+        return await self._run(parse_page, html_page)
+
+    async def original(self, html_page: str) -> str:
+        return await self._run(parse_original, html_page)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func: Callable, html_page: str | bytes):
+        if self.workers <= 0:
+            return func(html_page)
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, html_page)
+
+    def _get_executor(self):
+        """
+        Пул создаётся при первом разборе: исполнитель, заменённый до начала работы, не оставляет
+        потоков или процессов. Процессам пула, которым нужны только функции разбора, эти модули ни к чему.
+        """
+        if self._executor is None:
+            import concurrent.futures
+            if self.mode == 'process':
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='parser')
+        return self._executor
@@ -1,15 +1,44 @@
+from typing import Iterable
+
+from . import const
+
+
 def optimize_text(text: str) -> str:
     """
     Сокращение текста путём замены некоторых символов.
     """
-    cyclic_replacement_sequences = {'  ': ' ', '\n\n\n': '\n\n'}
-    ordinary_replacement_sequences = {'...': '…', ' – ': ' — ', '**': '@@', '@*': '@@', '\n ': '\n'}
-    text = text.strip()
-    for old_seq, new_seq in cyclic_replacement_sequences.items():
-        while old_seq in text:
-            text = text.replace(old_seq, new_seq)
-    for old_seq, new_seq in ordinary_replacement_sequences.items():
-        text = text.replace(old_seq, new_seq)
+    return _replace_sequences(text.strip())
+
+
+def optimize_texts(texts: Iterable[str]) -> list[str]:
+    """
+    Сокращение нескольких фрагментов текста за один проход (результат совпадает с ``optimize_text``
+    для каждого из них).
+    """
+    texts = [text.strip() for text in texts]
+    joined = const.FRAGMENT_SEPARATOR.join(texts)
+    if joined.count(const.FRAGMENT_SEPARATOR) != len(texts) - 1:  # Разделитель встретился в самом тексте
+        return [_replace_sequences(text) for text in texts]
+    return _replace_sequences(joined).split(const.FRAGMENT_SEPARATOR)
+
+
+def _replace_sequences(text: str) -> str:
+    """
+    Повторяющиеся пробелы и переводы строк схлопываются за один проход, а каждая замена
+    выполняется, только если заменяемая последовательность есть в тексте.
+    """
+    if '  ' in text:
+        text = const.SPACES_PATTERN.sub(' ', text)
+    if '\n\n\n' in text:
+        text = const.NEWLINES_PATTERN.sub('\n\n', text)
+    if '...' in text:
+        text = text.replace('...', '…')
+    if ' – ' in text:
+        text = text.replace(' – ', ' — ')
+    if '*' in text:
+        text = text.replace('**', '@@').replace('@*', '@@')
+    if '\n ' in text:
+        text = text.replace('\n ', '\n')
     return text
 
 
@@ -0,0 +1,9 @@
+from .index import QuoteIndex
+from .normalization import stem, tokenize
+
+
+__all__ = [
+    QuoteIndex.__name__,
+    stem.__name__,
+    tokenize.__name__
+]
@@ -0,0 +1,60 @@
+SEARCH_LOCAL = True          # Отвечать ли на поисковые запросы из локального индекса, если в нём достаточно цитат
+MIN_LOCAL_HITS = 10          # Столько найденных цитат нужно, чтобы не обращаться к поиску сайта-донора
+PAGE_SIZE = 10               # Цитат на странице результатов (как в поиске сайта-донора)
+PAGINATION_WINDOW = 3        # Количество ссылок на соседние страницы в каждую сторону
+SEARCH_HEADER = 'Результаты поиска'
+
+MAX_INDEXED_QUOTES = 100_000  # При превышении из индекса удаляются цитаты, добавленные раньше всех
+COMPACTION_RATIO = 0.5        # Доля удалённых записей, при которой списки вхождений пересобираются
+MAX_PREFIX_TERMS = 50         # Ограничение количества слов, начинающихся с последнего слова запроса
+VOCABULARY_INSERT_RATIO = 64  # Новые слова вставляются в словарь по одному, если словарь во столько раз больше
+PREFIX_WEIGHT = 0.5           # Вес совпадения только по началу слова
+AUTOSAVE_INTERVAL = 10 * 60   # Интервал сохранения индекса на диск в секундах
+
+# Результаты поиска для листания страниц: сколько первых цитат ранжируется и запоминается, сколько запросов
+# и на сколько секунд (цитаты, добавленные в индекс за это время, в запомненных результатах не появятся)
+RESULTS_DEPTH = PAGE_SIZE * (PAGINATION_WINDOW + 1)
+RESULTS_CACHE_SIZE = 1000
+RESULTS_TTL = 60
+
+# Параметры ранжирования BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Вес слова в зависимости от поля цитаты, в котором оно встретилось
+FIELD_WEIGHTS = {
+    'header': 2.0,
+    'taxonomy': 1.5,
+    'topics': 1.5,
+    'text': 1.0,
+    'original': 1.0
+}
+
+MIN_STEM_LENGTH = 3
+STEM_CACHE_SIZE = 100_000  # Количество запоминаемых основ слов
+# Окончания русских слов, отбрасываемые при нормализации (проверяются от длинных к коротким)
+RU_ENDINGS = (
+    'иями', 'ями', 'ами', 'его', 'ого', 'ему', 'ому', 'ыми', 'ими', 'иях', 'ией', 'ием', 'ость', 'ости',
+    'ешь', 'ете', 'ишь', 'ите', 'ала', 'али', 'ало', 'ила', 'или', 'ило', 'ела', 'ели', 'ело',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю', 'ом', 'ем', 'ах', 'ях',
+    'ам', 'ям', 'ов', 'ев', 'ия', 'ью', 'ть', 'ет', 'ут', 'ют', 'ит', 'ат', 'ят', 'им', 'ым', 'ал', 'ил', 'ел',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й'
+)
+RU_REFLEXIVE_ENDINGS = ('ся', 'сь')
+EN_ENDINGS = ("'s", 'ies', 'es', 's')
+
+STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так', 'его',
+    'но', 'да', 'ты', 'к', 'у', 'же', 'вы', 'за', 'бы', 'по', 'только', 'ее', 'мне', 'было', 'вот', 'от',
+    'меня', 'еще', 'нет', 'о', 'из', 'ему', 'ли', 'если', 'уже', 'или', 'ни', 'быть', 'был', 'до', 'вас',
+    'нибудь', 'уж', 'вам', 'там', 'потом', 'себя', 'ничего', 'ей', 'может', 'они', 'тут', 'где', 'есть',
+    'надо', 'ней', 'для', 'мы', 'тебя', 'их', 'чем', 'была', 'сам', 'чтоб', 'без', 'будто', 'чего', 'раз',
+    'тоже', 'себе', 'под', 'будет', 'ж', 'тогда', 'кто', 'этот', 'того', 'потому', 'этого', 'какой', 'ним',
+    'здесь', 'этом', 'один', 'мой', 'тем', 'чтобы', 'нее', 'были', 'куда', 'зачем', 'всех', 'можно', 'при',
+    'об', 'другой', 'после', 'над', 'больше', 'тот', 'через', 'эти', 'нас', 'про', 'всего', 'них', 'какая',
+    'много', 'разве', 'эту', 'моя', 'свою', 'этой', 'перед', 'иногда', 'лучше', 'чуть', 'том', 'нельзя',
+    'такой', 'им', 'более', 'всегда', 'конечно', 'всю', 'между', 'это', 'который', 'которые', 'которая',
+    'которого', 'которой', 'котором', 'которую', 'которым', 'которых', 'которыми', 'свой', 'своих', 'очень',
+    'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'is', 'it', 'that', 'for', 'on', 'with', 'as', 'be',
+    'at', 'by', 'this', 'are', 'was', 'i', 'you', 'he', 'she', 'we', 'they', 'not', 'but'
+))
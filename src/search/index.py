@@ -0,0 +1,348 @@
+import array
+import asyncio
+import bisect
+import collections
+import contextlib
+import heapq
+import json
+import math
+import os
+from typing import Iterable
+
+from ..cache import TTLCache
+from ..parser import QuoteRecord, QuotePageRecord
+from ..parser import const as parser_const
+from . import const
+from .normalization import tokenize
+
+INDEX_FORMAT_VERSION = 1
+
+
+class QuoteIndex:
+    """
+    Полнотекстовый индекс разобранных цитат в памяти процесса: текст, оригинал, заголовок,
+    элементы таксономии и темы. Поддерживает добавление и обновление цитат по мере их разбора,
+    ранжирование (BM25 с весами полей), поиск по началу последнего слова запроса (для инлайн-режима,
+    где запрос приходит по мере набора) и сохранение на диск.
+
+    Списки вхождений хранятся компактно — массивами номеров документов и весов. Обновлённые и вытесненные
+    цитаты только помечаются удалёнными, а списки пересобираются, когда таких записей становится много.
+    """
+    def __init__(self, max_quotes: int = const.MAX_INDEXED_QUOTES):
+        self.max_quotes = max_quotes
+        self._docs: list[QuoteRecord | None] = []
+        self._originals: dict[str, str] = {}          # ID цитаты -> текст оригинала
+        self._doc_ids: dict[str, int] = {}            # Относительная ссылка -> номер документа
+        self._rel_links: dict[str, str] = {}          # ID цитаты -> относительная ссылка
+        self._lengths = array.array('f')
+        self._postings: dict[str, tuple[array.array, array.array]] = {}
+        self._vocabulary: list[str] = []              # Слова для поиска по началу слова (см. ``_sorted_vocabulary``)
+        self._vocabulary_sorted = 0                   # Длина отсортированного начала ``_vocabulary``
+        self._total_length = 0.0
+        self._oldest = 0                              # Номер самого старого документа, который может быть жив
+        self._results = TTLCache(max_size=const.RESULTS_CACHE_SIZE, sizeof=lambda _: 1)  # Запрос -> первые результаты
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __contains__(self, rel_link: str) -> bool:
+        return rel_link in self._doc_ids
+
+    def add(self, quote: QuoteRecord, replace: bool = True) -> None:
+        """
+        Добавление цитаты или замена ранее добавленной версии (если ``replace`` не сброшен:
+        цитаты из списков на страницах бывают неполными и не должны заменять полученные по прямой ссылке).
+        """
+        if quote.rel_link in self._doc_ids:
+            if not replace:
+                return
+            self._delete(self._doc_ids[quote.rel_link])
+        doc_id = len(self._docs)
+        self._docs.append(quote)
+        self._doc_ids[quote.rel_link] = doc_id
+        self._rel_links[quote.id] = quote.rel_link
+        frequencies = self._term_frequencies(quote)
+        length = sum(frequencies.values())
+        self._lengths.append(length)
+        self._total_length += length
+        for term, weight in frequencies.items():
+            if (posting := self._postings.get(term)) is None:
+                posting = self._postings[term] = (array.array('I'), array.array('f'))
+                self._vocabulary.append(term)
+            posting[0].append(doc_id)
+            posting[1].append(weight)
+        while len(self._doc_ids) > self.max_quotes:
+            self._evict_oldest()
+        self._compact_if_needed()
+
+    def add_many(self, quotes: Iterable[QuoteRecord], replace: bool = True) -> None:
+        for quote in quotes:
+            self.add(quote, replace)
+
+    def add_original(self, quote_id: str, text: str) -> None:
+        """
+        Оригинал цитаты на иностранном языке (загружается отдельно от самой цитаты).
+        Оригиналы цитат, которых нет в индексе, не запоминаются.
+        """
+        if (rel_link := self._rel_links.get(quote_id)) is None or self._originals.get(quote_id) == text:
+            return
+        self._originals[quote_id] = text
+        self.add(self._docs[self._doc_ids[rel_link]])
+
+    def search(self, query: str, prefix: bool = True, limit: int = None) -> list[QuoteRecord]:
+        """
+        Цитаты, содержащие все слова запроса, от наиболее к наименее подходящим (не больше ``limit``).
+        Последнее слово запроса с ``prefix`` может быть началом слова.
+        """
+        return self._ranked(query, prefix, limit)[1]
+
+    def page(
+            self,
+            query: str,
+            page: str = None,
+            min_hits: int = const.MIN_LOCAL_HITS,
+            page_size: int = const.PAGE_SIZE
+    ) -> QuotePageRecord | None:
+        """
+        Страница результатов поиска в том же виде, что и разобранная страница поиска сайта-донора
+        (``page`` — номер страницы, начиная с нуля, как в параметре ``page`` сайта).
+        Ранжируются только цитаты первых страниц, и они запоминаются на ``RESULTS_TTL`` секунд,
+        так что листание результатов не повторяет поиск.
+        Returns:
+            страница или ``None``, если найдено меньше ``min_hits`` цитат или такой страницы нет
+        """
+        current = int(page or 0) + 1
+        needed = current * page_size
+        results = self._results.get(query)
+        if results is None or len(results[1]) < min(needed, results[0]):
+            results = self._ranked(query, True, max(needed, const.RESULTS_DEPTH))
+            self._results.set(query, results, const.RESULTS_TTL)
+        found, quotes = results
+        if found < min_hits:
+            return None
+        page_count = math.ceil(found / page_size)
+        if current > page_count:
+            return None
+        first = max(1, current - const.PAGINATION_WINDOW)
+        last = min(page_count, current + const.PAGINATION_WINDOW)
+        return QuotePageRecord(
+            header=const.SEARCH_HEADER,
+            quotes=quotes[(current - 1) * page_size:needed],
+            pagination=[num for num in range(first, last + 1) if num != current],
+            non_quote_search_results={}
+        )
+
+    def merge(self, other: 'QuoteIndex') -> None:
+        """
+        Добавление цитат и оригиналов другого индекса, заменяющих имеющиеся версии.
+        """
+        for quote in other.quotes():
+            if (original := other._originals.get(quote.id)) is not None:
+                self._originals[quote.id] = original
+            self.add(quote)
+        self._sorted_vocabulary()  # Сортировка один раз на всю пачку, а не при первом поиске пользователя
+
+    def save(self, path: str) -> None:
+        """
+        Атомарная запись индексированных цитат в файл (JSON Lines). Списки вхождений не сохраняются:
+        при загрузке они строятся заново.
+        """
+        _write(path, self.quotes(), self._originals)
+
+    def load(self, path: str) -> int:
+        """
+        Добавление в индекс цитат, сохранённых ``save``. Файл другой версии формата игнорируется.
+        Returns:
+            количество загруженных цитат
+        """
+        loaded = 0
+        with open(path, encoding=parser_const.STR_ENCODING) as f:
+            if json.loads(f.readline() or '{}').get('version') != INDEX_FORMAT_VERSION:
+                return 0
+            for line in f:
+                data = json.loads(line)
+                if data['original']:
+                    self._originals[data['quote']['id']] = data['original']
+                self.add(QuoteRecord.from_dict(data['quote']))
+                loaded += 1
+        self._sorted_vocabulary()
+        return loaded
+
+    async def autosave(self, path: str, interval: float = const.AUTOSAVE_INTERVAL) -> None:
+        """
+        Периодическое сохранение индекса в фоновом потоке (при отмене задачи индекс сохраняется ещё раз).
+        """
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                # Копии списков: индекс продолжает изменяться, пока файл пишется в другом потоке
+                await asyncio.to_thread(_write, path, self.quotes(), dict(self._originals))
+        finally:
+            with contextlib.suppress(OSError):
+                self.save(path)
+
+    def quotes(self) -> list[QuoteRecord]:
+        """
+        Индексированные цитаты от добавленных раньше к добавленным позже.
+        """
+        return [quote for quote in self._docs[self._oldest:] if quote is not None]
+
+    def _ranked(self, query: str, prefix: bool, limit: int | None) -> tuple[int, list[QuoteRecord]]:
+        """
+        Количество найденных цитат и первые ``limit`` из них по убыванию оценки.
+        """
+        scores = self._scores(query, prefix)
+        if limit is None:
+            ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], -doc_id))
+        else:
+            ranked = heapq.nsmallest(limit, scores, key=lambda doc_id: (-scores[doc_id], -doc_id))
+        return len(scores), [self._docs[doc_id] for doc_id in ranked]
+
+    def _scores(self, query: str, prefix: bool) -> dict[int, float]:
+        """
+        Оценки BM25 документов, содержащих все слова запроса.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {}
+        queries = [{term: 1.0} for term in terms]
+        if prefix:
+            queries[-1] = self._prefix_variants(terms[-1])
+        # Сначала редкие слова: документы, не содержащие их, не придётся оценивать по частым
+        queries.sort(key=lambda variants: sum(len(self._postings.get(term, ((),))[0]) for term in variants))
+        docs, lengths = self._docs, self._lengths
+        live_count = len(self._doc_ids) or 1
+        k1, b = const.BM25_K1, const.BM25_B
+        # Знаменатель BM25 без веса слова: k1 * (1 - b + b * длина / средняя длина)
+        norm_base, norm_factor = k1 * (1 - b), k1 * b / (self._total_length / live_count or 1.0)
+        scores = None
+        for variants in queries:
+            term_scores = {}
+            for variant, variant_weight in variants.items():
+                doc_ids, weights = self._postings.get(variant, ((), ()))
+                matched, live_postings = {}, 0
+                for doc_id, weight in zip(doc_ids, weights):
+                    if docs[doc_id] is None:
+                        continue
+                    live_postings += 1
+                    if scores is None or doc_id in scores:
+                        matched[doc_id] = weight / (weight + norm_base + norm_factor * lengths[doc_id])
+                # Удалённые, но ещё не вычищенные документы не делают слово более частым
+                idf = math.log(1 + (live_count - live_postings + 0.5) / (live_postings + 0.5))
+                factor = variant_weight * idf * (k1 + 1)
+                for doc_id, score in matched.items():
+                    score *= factor
+                    if score > term_scores.get(doc_id, 0.0):
+                        term_scores[doc_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in term_scores.items()}
+            if not scores:
+                return {}
+        return scores
+
+    def _term_frequencies(self, quote: QuoteRecord) -> dict[str, float]:
+        text = quote.text if isinstance(quote.text, str) else ' '.join(quote.text)
+        fields = {
+            'header': quote.header or '',
+            'taxonomy': ' '.join(
+                f'{elem.title} {" ".join(item if isinstance(item, str) else item["text"] for item in elem.content)}'
+                for elem in quote.taxonomy
+            ),
+            'topics': ' '.join(topic.text.replace('_', ' ') for topic in quote.topics),
+            'text': text,
+            'original': self._originals.get(quote.id, '')
+        }
+        frequencies = collections.defaultdict(float)
+        for field, field_text in fields.items():
+            weight = const.FIELD_WEIGHTS[field]
+            for term in tokenize(field_text):
+                frequencies[term] += weight
+        return frequencies
+
+    def _prefix_variants(self, prefix: str) -> dict[str, float]:
+        """
+        Слова индекса, начинающиеся с ``prefix``, с весами (полное совпадение весомее).
+        """
+        variants = {}
+        vocabulary = self._sorted_vocabulary()
+        start = bisect.bisect_left(vocabulary, prefix)
+        for term in vocabulary[start:start + const.MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            variants[term] = 1.0 if term == prefix else const.PREFIX_WEIGHT
+        return variants
+
+    def _sorted_vocabulary(self) -> list[str]:
+        """
+        Отсортированные слова индекса. Новые слова добавляются в конец без сортировки (иначе загрузка индекса
+        квадратична по размеру словаря) и встраиваются при первом поиске по началу слова после их добавления.
+        """
+        vocabulary = self._vocabulary
+        if (new_count := len(vocabulary) - self._vocabulary_sorted) > 0:
+            if new_count * const.VOCABULARY_INSERT_RATIO < self._vocabulary_sorted:
+                # Немногие новые слова вставляются по одному, без повторного сравнения всего словаря
+                new_terms = vocabulary[self._vocabulary_sorted:]
+                del vocabulary[self._vocabulary_sorted:]
+                for term in new_terms:
+                    bisect.insort(vocabulary, term)
+            else:
+                vocabulary.sort()
+            self._vocabulary_sorted = len(vocabulary)
+        return vocabulary
+
+    def _delete(self, doc_id: int) -> None:
+        quote = self._docs[doc_id]
+        self._docs[doc_id] = None
+        del self._doc_ids[quote.rel_link]
+        if self._rel_links.get(quote.id) == quote.rel_link:
+            del self._rel_links[quote.id]
+        self._total_length -= self._lengths[doc_id]
+
+    def _evict_oldest(self) -> None:
+        while self._docs[self._oldest] is None:
+            self._oldest += 1
+        self._originals.pop(self._docs[self._oldest].id, None)
+        self._delete(self._oldest)
+
+    def _compact_if_needed(self) -> None:
+        """
+        Пересборка списков вхождений без удалённых документов с новой нумерацией.
+        """
+        deleted = len(self._docs) - len(self._doc_ids)
+        if not deleted or deleted < const.COMPACTION_RATIO * len(self._docs):
+            return
+        new_ids = array.array('i', [-1]) * len(self._docs)
+        docs, lengths = [], array.array('f')
+        for doc_id, quote in enumerate(self._docs):
+            if quote is not None:
+                new_ids[doc_id] = len(docs)
+                docs.append(quote)
+                lengths.append(self._lengths[doc_id])
+        postings = {}
+        for term, (doc_ids, weights) in self._postings.items():
+            new_doc_ids, new_weights = array.array('I'), array.array('f')
+            for doc_id, weight in zip(doc_ids, weights):
+                if (new_id := new_ids[doc_id]) >= 0:
+                    new_doc_ids.append(new_id)
+                    new_weights.append(weight)
+            if new_doc_ids:
+                postings[term] = (new_doc_ids, new_weights)
+        self._docs = docs
+        self._lengths = lengths
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+        self._vocabulary_sorted = len(self._vocabulary)
+        self._doc_ids = {quote.rel_link: doc_id for doc_id, quote in enumerate(docs)}
+        self._oldest = 0
+
+
+def _write(path: str, quotes: list[QuoteRecord], originals: dict[str, str]) -> None:
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding=parser_const.STR_ENCODING) as f:
+        f.write(json.dumps({'version': INDEX_FORMAT_VERSION}) + '\n')
+        for quote in quotes:
+            f.write(json.dumps({'quote': quote.as_dict(), 'original': originals.get(quote.id)}, ensure_ascii=False))
+            f.write('\n')
+    os.replace(temp_path, path)
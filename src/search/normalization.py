@@ -0,0 +1,52 @@
+import functools
+import re
+
+from . import const
+
+WORD_PATTERN = re.compile(r'[^\W\d_]+|\d+')
+CYRILLIC_PATTERN = re.compile(r'[а-я]')
+
+
+def _endings_by_length(endings: tuple[str, ...]) -> list[tuple[int, frozenset[str]]]:
+    """
+    Окончания, сгруппированные по длине от большей к меньшей: проверка слова — несколько поисков в множествах.
+    """
+    lengths = sorted({len(ending) for ending in endings}, reverse=True)
+    return [(length, frozenset(ending for ending in endings if len(ending) == length)) for length in lengths]
+
+
+RU_ENDINGS = _endings_by_length(const.RU_ENDINGS)
+EN_ENDINGS = _endings_by_length(const.EN_ENDINGS)
+
+
+@functools.lru_cache(maxsize=const.STEM_CACHE_SIZE)
+def stem(word: str) -> str:
+    """
+    Упрощённое выделение основы слова: отбрасывание одного типичного окончания
+    (у русских глаголов — ещё и возвратной частицы), если после этого остаётся не меньше ``MIN_STEM_LENGTH`` букв.
+    Examples:
+        ``котами``, ``коты``, ``кот`` → ``кот``; ``улыбается`` → ``улыба``; ``quotes`` → ``quot``
+    """
+    if CYRILLIC_PATTERN.match(word):
+        for ending in const.RU_REFLEXIVE_ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= const.MIN_STEM_LENGTH:
+                word = word[:-len(ending)]
+                break
+        endings = RU_ENDINGS
+    else:
+        endings = EN_ENDINGS
+    for length, group in endings:
+        if len(word) - length >= const.MIN_STEM_LENGTH and word[-length:] in group:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Нормализованные слова текста для индекса и запросов: нижний регистр, «ё» как «е»,
+    без знаков препинания и служебных слов, с отброшенными окончаниями.
+    """
+    return [
+        stem(word) for word in WORD_PATTERN.findall(text.lower().replace('ё', 'е'))
+        if word not in const.STOP_WORDS
+    ]
@@ -1,4 +1,6 @@
 import json
+import pathlib
+
 from ..parser import const
 
 MAX_ROW_BUTTON_COUNT = 8
@@ -6,10 +8,35 @@ RESULT_CACHE_TIME = 120
 ERROR_CACHE_TIME = 30
 MAX_CALLBACK_DATA_LENGTH = 64
 MAX_CALLBACK_ANSWER_LENGTH = 200
+MAX_MESSAGE_LENGTH = 4096
+INLINE_REFRESH_TIMEOUT = 5  # Время на обновление цитат страницы до ответа на инлайн-запрос
+REFRESH_CONCURRENCY = 5     # Количество цитат страницы, обновляемых одновременно
+WORKER_QUEUE_SIZE = 1000    # Ограничение очереди обновлений каждого процесса-обработчика
+
+INLINE_DEBOUNCE = 0.3        # Пауза перед запросом к сайту-донору, за которую пользователь может дописать запрос
+INLINE_CACHE_TIME = 5 * 60   # Сколько Telegram хранит ответ на инлайн-запрос (не дольше времени жизни страницы)
+INLINE_REUSE_MIN_RESULTS = 5  # Столько цитат прошлого ответа должно подойти, чтобы показать их без запросов
+INLINE_ANSWER_TTL = 60       # Сколько последний ответ пользователю может использоваться для следующих запросов
+INLINE_MAX_USERS = 10_000    # Количество пользователей, последние ответы которым хранятся в памяти
+
+# Ошибки Telegram (или их начала), которыми он отвергает file_id, а не загружаемое по ссылке изображение.
+# Номер изображения в группе (FILE_REFERENCE_0_EXPIRED) Pyrogram не распознаёт и передаёт в тексте ошибки
+FILE_ID_ERRORS = ('FILE_ID_INVALID', 'FILE_REFERENCE_', 'MEDIA_INVALID')
+
+CRAWL_INTERVAL = 10 * 60             # Интервал между обходами списков цитат в секундах
+CRAWL_FULL_PASS_INTERVAL = 6 * 60 * 60  # Интервал полных обходов (без остановки на уже известных цитатах)
+CRAWL_MAX_PAGES = 20                 # Ограничение глубины обхода каждого списка
+CRAWL_REQUEST_INTERVAL = 1.0         # Пауза между запросами обхода в секундах
+CRAWL_CHECKPOINT_PAGES = 5           # Состояние обхода сохраняется каждые столько страниц
 
 QUOTE_SHORT_TEXT_LENGTH = 250
+FORMATTER_VERSION = 1       # Увеличивается при изменении вида сообщений, чтобы не использовать старые представления
+RENDER_CACHE_SIZE = 20_000  # Количество цитат и страниц, готовые представления которых хранятся в памяти
+RENDER_CACHE_TTL = 6 * 60 * 60
+
+DATA_DIR = pathlib.Path(__file__).parent / 'data'
 
-with open('src/telegram/data/command_templates.json', encoding=const.STR_ENCODING) as f:
+with open(DATA_DIR / 'command_templates.json', encoding=const.STR_ENCODING) as f:
     MULTIPLE_COMMAND_LINKS: dict = json.load(f)
 for key, value in MULTIPLE_COMMAND_LINKS.items():
     MULTIPLE_COMMAND_LINKS[key] = const.BASE_URL % value
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Iterable
+
+from ..cache import utils as cache_utils
+from ..metrics import registry
+from ..parser import const as parser_const
+from ..upstream import Priority
+from . import const as tg_const
+from . import utils as tg_utils
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT_VERSION = 1
+
+crawled_pages = registry.counter('crawler_pages_total', 'Страницы списков, обработанные при обходе', ('result',))
+crawled_quotes = registry.counter('crawler_quotes_total', 'Новые цитаты, полученные при обходе списков')
+
+
+class Crawler:
+    """
+    Фоновый обход списков цитат (команд бота) страница за страницей по пагинации,
+    поддерживающий их локальную копию в кешах, постоянном хранилище и поисковом индексе:
+    обработчики отдают эти страницы и цитаты с них без запросов к сайту-донору.
+
+    Запросы выполняются с фоновым приоритетом и паузами между ними. Поиск новых цитат в списке останавливается
+    на первой странице без них (кроме периодических полных обходов), но страницы до глубины последнего полного
+    обхода продолжают обновляться, чтобы не устаревать между обходами. Состояние обхода и известные ID цитат
+    сохраняются в ``state_path``, так что прерванный обход продолжается после перезапуска.
+
+    Копия списков хранится в кеше процесса, в котором выполняется обход; другим процессам-обработчикам
+    она доступна только через постоянное хранилище (``STORE_PATH``).
+    """
+    def __init__(
+            self,
+            listings: Iterable[str],
+            state_path: str = None,
+            interval: float = tg_const.CRAWL_INTERVAL,
+            full_pass_interval: float = tg_const.CRAWL_FULL_PASS_INTERVAL,
+            max_pages: int = tg_const.CRAWL_MAX_PAGES,
+            request_interval: float = tg_const.CRAWL_REQUEST_INTERVAL
+    ):
+        # Случайные цитаты не кешируются, и копировать их бессмысленно
+        self.listings = [url for url in dict.fromkeys(listings) if cache_utils.url_ttl(url)]
+        self.state_path = state_path
+        self.interval = interval
+        self.full_pass_interval = full_pass_interval
+        self.max_pages = max_pages
+        self.request_interval = request_interval
+        self.known_ids: set[str] = set()
+        # Ссылка на список -> следующая страница, завершён ли обход, время и глубина последнего полного обхода
+        self.progress: dict[str, dict] = {}
+        self.pass_duration = 0.0  # Длительность последнего обхода: страницы должны оставаться свежими до следующего
+        if state_path and os.path.exists(state_path):
+            self._load_state()
+
+    async def run(self) -> None:
+        """
+        Обходы с интервалом ``interval``, пока задача не будет отменена.
+        """
+        try:
+            while True:
+                await self.crawl()
+                await asyncio.sleep(self.interval)
+        finally:
+            if self.state_path:
+                self._save_state(self._state())
+
+    async def crawl(self) -> None:
+        """
+        Один обход всех списков.
+        """
+        started = time.monotonic()
+        new_quotes = 0
+        for url in self.listings:
+            try:
+                new_quotes += await self.crawl_listing(url)
+            except Exception:  # Страница, которую не удалось разобрать, будет запрошена при следующем обходе
+                logger.exception('Ошибка при обходе списка', extra={'event': 'crawl_error', 'url': url})
+        self.pass_duration = time.monotonic() - started
+        logger.info('Обход списков завершён', extra={
+            'event': 'crawl_done', 'new_quotes': new_quotes, 'duration_s': round(self.pass_duration, 1)
+        })
+
+    async def crawl_listing(self, url: str) -> int:
+        """
+        Обход одного списка с сохранённой страницы (если прошлый обход был прерван) или с первой.
+        Returns:
+            количество новых цитат
+        """
+        progress = self.progress.setdefault(url, {'next_page': 0, 'complete': False, 'full_pass_at': 0})
+        full_pass = not progress['complete'] or time.time() - progress['full_pass_at'] > self.full_pass_interval
+        page_num = 0 if progress['complete'] else progress['next_page']
+        progress.update(next_page=page_num, complete=False)
+        keep_fresh = self.interval + self.pass_duration  # Время до следующего обновления этих же страниц
+        new_quotes = 0
+        while page_num < self.max_pages:
+            quote_page, requested = await tg_utils.mirror_page(
+                url, str(page_num) if page_num else None, keep_fresh
+            )
+            if requested:
+                await asyncio.sleep(self.request_interval)
+            if quote_page is None:  # Ошибка сайта-донора: обход продолжится с этой страницы
+                crawled_pages.labels('error').inc()
+                break
+            crawled_pages.labels('ok' if requested else 'fresh').inc()
+            page_new_quotes = 0
+            for quote in quote_page.quotes:
+                if quote.id in self.known_ids:
+                    continue
+                try:
+                    if await tg_utils.get_quote(parser_const.BASE_URL % quote.rel_link, priority=Priority.background):
+                        self.known_ids.add(quote.id)
+                        page_new_quotes += 1
+                except Exception:  # Ошибка разбора уже записана в журнал, цитата будет запрошена снова
+                    pass
+                await asyncio.sleep(self.request_interval)
+            crawled_quotes.labels().inc(page_new_quotes)
+            new_quotes += page_new_quotes
+            page_num += 1
+            progress['next_page'] = page_num
+            if page_num % tg_const.CRAWL_CHECKPOINT_PAGES == 0:
+                await self.checkpoint()
+            # Без новых цитат обход продолжается только для обновления страниц, пройденных полным обходом
+            if page_num + 1 not in quote_page.pagination \
+                    or not (full_pass or page_new_quotes or page_num < progress.get('depth', 0)):
+                self._complete(progress, full_pass, page_num)
+                break
+        else:
+            self._complete(progress, full_pass, page_num)
+        await self.checkpoint()
+        return new_quotes
+
+    @staticmethod
+    def _complete(progress: dict, full_pass: bool, depth: int) -> None:
+        progress['complete'] = True
+        if full_pass:
+            progress.update(full_pass_at=time.time(), depth=depth)
+
+    async def checkpoint(self) -> None:
+        if self.state_path:
+            await asyncio.to_thread(self._save_state, self._state())
+
+    def _state(self) -> dict:
+        """
+        Копия состояния для записи в другом потоке.
+        """
+        return {
+            'version': STATE_FORMAT_VERSION,
+            'progress': {url: dict(progress) for url, progress in self.progress.items()},
+            'known_ids': list(self.known_ids)
+        }
+
+    def _save_state(self, state: dict) -> None:
+        temp_path = f'{self.state_path}.tmp'
+        with open(temp_path, 'w', encoding=parser_const.STR_ENCODING) as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _load_state(self) -> None:
+        try:
+            with open(self.state_path, encoding=parser_const.STR_ENCODING) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            logger.exception('Не удалось загрузить состояние обхода', extra={'event': 'crawl_state_error'})
+            return
+        if state.get('version') == STATE_FORMAT_VERSION:
+            self.progress = state['progress']
+            self.known_ids = set(state['known_ids'])
@@ -1,46 +1,56 @@
 from pyrogram.types import InputMediaPhoto, InlineKeyboardMarkup, InlineKeyboardButton
 
 from .. import const as tg_const
-from src.parser import Quote, TaxonomyElem
+from src.metrics import timed
+from src.parser import Quote, QuoteRecord, TaxonomyElem
 from src.parser import const as parser_const
+from .render_cache import render_cache
 
 
 class TgQuoteFormatter:
-    def __init__(self, quote: Quote):
+    """
+    Представление цитаты в Telegram. Текст и клавиатура строятся один раз для каждой
+    версии содержимого цитаты и при повторных показах берутся из кеша (см. ``render_cache``).
+    """
+    def __init__(self, quote: Quote | QuoteRecord):
         self._quote = quote
+        self._render_key = ('quote', quote.rel_link)
+        self._version = getattr(quote, 'version', None)  # У ``Quote`` версии нет, и его представления не кешируются
 
     @staticmethod
     def _format_taxonomy_elem(elem: TaxonomyElem) -> str:
-        text = f'{elem.emoji} **{elem.title}:** '
-        for content_item in elem.content:
-            if isinstance(content_item, dict):
-                text += f'[{content_item["text"]}]({content_item["url"]}), '
-            else:
-                text += f'{content_item}, '
-        return text.removesuffix(', ')
+        content = ', '.join(
+            f'[{content_item["text"]}]({content_item["url"]})' if isinstance(content_item, dict) else content_item
+            for content_item in elem.content
+        )
+        return f'{elem.emoji} **{elem.title}:** {content}'
 
     @property
+    @timed('format')
     def text(self) -> str:
-        text = self._quote.text
-        if isinstance(text, tuple):
-            text = f'**Оригинал:**\n{text[0]}\n\n**Перевод:**\n{text[1]}'
-        text += '\n\n'
-        text += '\n'.join(
-            self._format_taxonomy_elem(taxonomy_elem)
-            for taxonomy_elem in self._quote.taxonomy
-        )
-        text += '\n\n'
-        text += ' '.join(
-            f'[{topic.text}]({topic.url})' for topic in self._quote.topics
-        )
-        return text
+        return render_cache.render(self._render_key, self._version, 'text', self._build_text)
 
     @property
+    @timed('format')
     def media(self) -> list[InputMediaPhoto]:
         return [InputMediaPhoto(url) for url in self._quote.image_links]
 
     @property
+    @timed('format')
     def reply_markup(self) -> InlineKeyboardMarkup:
+        return render_cache.render(self._render_key, self._version, 'reply_markup', self._build_reply_markup)
+
+    def _build_text(self) -> str:
+        text = self._quote.text
+        if isinstance(text, tuple):
+            text = f'**Оригинал:**\n{text[0]}\n\n**Перевод:**\n{text[1]}'
+        return '\n\n'.join((
+            text,
+            '\n'.join(self._format_taxonomy_elem(taxonomy_elem) for taxonomy_elem in self._quote.taxonomy),
+            ' '.join(f'[{topic.text}]({topic.url})' for topic in self._quote.topics)
+        ))
+
+    def _build_reply_markup(self) -> InlineKeyboardMarkup:
         row = []
         if self._quote.explanation:
             explanation = self._quote.explanation.encode(parser_const.STR_ENCODING)
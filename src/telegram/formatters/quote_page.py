@@ -1,17 +1,29 @@
+from typing import Hashable
+
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, \
     InlineQueryResultArticle, InputTextMessageContent
 
-from src.parser import Quote, QuotePage, utils
+from src.metrics import timed
+from src.parser import Quote, QuotePage, QuoteRecord, QuotePageRecord, utils
 from .. import const as tg_const
 from .quote import TgQuoteFormatter
+from .render_cache import render_cache
 
 
 class TgPageFormatter:
-    def __init__(self, quote_page: QuotePage):
+    """
+    Представление страницы с цитатами в Telegram. Представления страницы, для которой указан
+    ``key`` (ссылка и номер страницы), кешируются по нему и версии содержимого (см. ``render_cache``).
+    """
+    def __init__(self, quote_page: QuotePage | QuotePageRecord, key: Hashable = None):
         self._page = quote_page
+        self._render_key = self._version = None
+        if key is not None:
+            self._render_key = ('page', key)
+            self._version = getattr(quote_page, 'version', None)
 
     @staticmethod
-    def quote_short_text(quote: Quote, include_header=True):
+    def quote_short_text(quote: Quote | QuoteRecord, include_header=True):
         text = quote.text
         if isinstance(text, tuple):
             text = f'{text[0]}\n\n{text[1]}'
@@ -20,23 +32,42 @@ class TgPageFormatter:
         return utils.trim_text(text, tg_const.QUOTE_SHORT_TEXT_LENGTH)
 
     @property
+    @timed('format')
     def text(self) -> str:
+        return render_cache.render(self._render_key, self._version, 'text', self._build_text)
+
+    @property
+    @timed('format')
+    def reply_markup(self) -> InlineKeyboardMarkup | None:
+        return render_cache.render(self._render_key, self._version, 'reply_markup', self._build_reply_markup)
+
+    @timed('format')
+    def inline_results(self, query: str) -> list[InlineQueryResultArticle]:
+        if not self._page.quotes:
+            return [InlineQueryResultArticle(
+                title=query,
+                description=tg_const.NOTHING_FOUND_MSG,
+                input_message_content=InputTextMessageContent(
+                    message_text=f'__{query}__\n\n{tg_const.NOTHING_FOUND_MSG}'
+                )
+            )]
+        # Результаты с цитатами не зависят от запроса
+        return render_cache.render(self._render_key, self._version, 'inline_results', self._build_inline_results)
+
+    def _build_text(self) -> str:
         extra_links = self._page.non_quote_search_results
         if not self._page.quotes and not extra_links:
             return tg_const.NOTHING_FOUND_MSG
-        text = f'**{self._page.header}**\n'
+        parts = [f'**{self._page.header}**\n']
         for num, quote in enumerate(self._page.quotes, 1):
-            text += f'\n**{num}.** {self.quote_short_text(quote)}\n'
-        for group in extra_links:
-            text += f'\n**{group}**'
-            for link in extra_links[group]:
-                text += f'\n[{link["text"]}]({link["url"]})'
-            text += '\n'
-        text = text.replace('** **', ' ')
-        return text
+            parts.append(f'\n**{num}.** {self.quote_short_text(quote)}\n')
+        for group, links in extra_links.items():
+            parts.append(f'\n**{group}**')
+            parts.extend(f'\n[{link["text"]}]({link["url"]})' for link in links)
+            parts.append('\n')
+        return ''.join(parts).replace('** **', ' ')
 
-    @property
-    def reply_markup(self) -> InlineKeyboardMarkup | None:
+    def _build_reply_markup(self) -> InlineKeyboardMarkup | None:
         if not self._page.quotes:
             return None
         quote_rows = ([], [])
@@ -58,28 +89,19 @@ class TgPageFormatter:
             for row in (*quote_rows, pagination_row)
         ])
 
-    def inline_results(self, query: str) -> list[InlineQueryResultArticle]:
+    def _build_inline_results(self) -> list[InlineQueryResultArticle]:
         results = []
-        if not self._page.quotes:
+        for quote in self._page.quotes:
+            formatted_quote = TgQuoteFormatter(quote)
             results.append(InlineQueryResultArticle(
-                title=query,
-                description=tg_const.NOTHING_FOUND_MSG,
+                title=quote.header or self._page.header,
+                description=self.quote_short_text(quote, include_header=False),
                 input_message_content=InputTextMessageContent(
-                    message_text=f'__{query}__\n\n{tg_const.NOTHING_FOUND_MSG}'
-                )
+                    message_text=formatted_quote.text,
+                    disable_web_page_preview=True
+                ),
+                reply_markup=formatted_quote.reply_markup
             ))
-        else:
-            for quote in self._page.quotes:
-                formatted_quote = TgQuoteFormatter(quote)
-                results.append(InlineQueryResultArticle(
-                    title=quote.header or self._page.header,
-                    description=self.quote_short_text(quote, include_header=False),
-                    input_message_content=InputTextMessageContent(
-                        message_text=formatted_quote.text,
-                        disable_web_page_preview=True
-                    ),
-                    reply_markup=formatted_quote.reply_markup
-                ))
         return results
 
     def inline_offset(self, page: str | None):
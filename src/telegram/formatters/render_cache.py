@@ -0,0 +1,59 @@
+import functools
+from typing import Any, Callable, Hashable
+
+from src.cache import TTLCache
+from src.metrics import registry
+from .. import const as tg_const
+
+
+class RenderCache:
+    """
+    Кеш готовых представлений цитат и страниц (текста сообщения, клавиатуры, результатов инлайн-запроса).
+    Ключ — вид объекта и его адрес (относительная ссылка цитаты, ссылка и номер страницы) вместе с версией
+    форматирования, а запись хранит версию содержимого объекта (``QuoteRecord.version``): если по тому же адресу
+    получено другое содержимое, представления строятся заново. Сами объекты в кеше не хранятся.
+    """
+    def __init__(self, max_size: int = tg_const.RENDER_CACHE_SIZE, ttl: float = tg_const.RENDER_CACHE_TTL):
+        self.ttl = ttl
+        self._cache = TTLCache(max_size=max_size, sizeof=lambda _: 1)
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache)}
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def render(self, key: Hashable | None, version: int | None, part: str, build: Callable[[], Any]) -> Any:
+        """
+        Часть ``part`` представления объекта с адресом ``key`` и версией содержимого ``version``:
+        из кеша или построенная ``build``. Без адреса или версии представление не кешируется.
+        """
+        if key is None or version is None:
+            self.misses += 1
+            return build()
+        key = (tg_const.FORMATTER_VERSION, key)
+        entry = self._cache.get(key)
+        if entry is None or entry[0] != version:
+            entry = (version, {})
+            self._cache.set(key, entry, self.ttl)
+        parts = entry[1]
+        if part in parts:
+            self.hits += 1
+            return parts[part]
+        self.misses += 1
+        value = parts[part] = build()
+        return value
+
+
+render_cache = RenderCache()
+
+render_cache_requests = registry.counter(
+    'render_cache_requests_total', 'Обращения к кешу готовых представлений по результату', ('result',)
+)
+for result in ('hits', 'misses'):
+    render_cache_requests.set_function(functools.partial(getattr, render_cache, result), result)
@@ -1,11 +1,22 @@
+import asyncio
+import contextlib
+import functools
+
+import httpx
+
 from pyrogram import Client
+from pyrogram.enums import ParseMode
 from pyrogram.types import Message, CallbackQuery, InlineQuery
 
-from ..parser import Quote, QuotePage
+from ..cache import utils as cache_utils
+from ..metrics import profiler
+from ..metrics import const as metrics_const
+from ..parser import QuotePageRecord
 from ..parser import utils as parser_utils
 from ..parser import const as parser_const
 from .formatters.quote import TgQuoteFormatter
 from .formatters.quote_page import TgPageFormatter
+from .inline import inline_supervisor
 from . import utils as tg_utils
 from . import const as tg_const
 
@@ -31,10 +42,11 @@ async def single_quote(_, msg: Message):
         url = parser_const.RANDOM_URL
     else:
         url = msg.text
-    if response := await tg_utils.http_request(url, msg):
-        quote = TgQuoteFormatter(Quote(html_page=response.text))
+    if raw_quote := await tg_utils.get_quote(url, msg):
+        quote = TgQuoteFormatter(raw_quote)
         if quote.media:
-            quote_image_msg_group = await msg.reply_media_group(
+            quote_image_msg_group = await tg_utils.send_media_group(
+                msg.reply_media_group,
                 media=quote.media,
                 disable_notification=True
             )
@@ -51,15 +63,16 @@ async def quote_by_callback(app: Client, query: CallbackQuery):
     """
     Цитата по относительной ссылке из коллбэка.
     """
-    if response := await tg_utils.http_request(
+    if raw_quote := await tg_utils.get_quote(
             url=parser_const.BASE_URL % query.data,
             callback_query=query
     ):
         await query.answer(cache_time=tg_const.RESULT_CACHE_TIME)
-        quote = TgQuoteFormatter(Quote(html_page=response.text))
+        quote = TgQuoteFormatter(raw_quote)
         reply_to_message_id = None
         if quote.media:
-            messages = await app.send_media_group(
+            messages = await tg_utils.send_media_group(
+                app.send_media_group,
                 chat_id=query.from_user.id,
                 media=quote.media,
                 disable_notification=True
@@ -87,23 +100,25 @@ async def multiple_quotes(_, msg: Message):
         url = msg.text
     else:
         url = parser_const.SEARCH_URL % msg.text
-    if response := await tg_utils.http_request(
+    if raw_quote_page := await tg_utils.get_page(
             url=url,
             message=msg
     ):
-        quote_page = TgPageFormatter(QuotePage(html_page=response.text))
+        quote_page = TgPageFormatter(raw_quote_page, (url, None))
         await msg.reply(
             text=quote_page.text,
             quote=True,
             reply_markup=quote_page.reply_markup,
             disable_web_page_preview=True
         )
+        tg_utils.prefetch_page(raw_quote_page, url)
 
 
 async def multiple_quotes_inline(_, query: InlineQuery):
     """
     Список цитат по соответствующим им командам,
     ссылке на страницу с цитатами или поисковому запросу.
+    Запросы одного пользователя, набирающего текст, обрабатываются через ``inline_supervisor``.
     """
     if not query.query:
         return
@@ -116,18 +131,57 @@ async def multiple_quotes_inline(_, query: InlineQuery):
     else:
         url = parser_const.SEARCH_URL % query.query
     page = query.offset or None
-    if response := await tg_utils.http_request(
-            url=url,
-            page=page if page != '0' else None
-    ):
-        raw_quote_page = QuotePage(html_page=response.text)
+    page = page if page != '0' else None
+    raw_quote_page = reused = None
+    # До паузы проверяются только кеш и прошлый ответ: поиск в локальном индексе выполняется
+    # уже после неё, чтобы не искать по каждому набранному символу
+    if not refresh_flag:
+        raw_quote_page = tg_utils.cached_page(url, page)
+        if raw_quote_page is None and not query.offset and url.startswith(parser_const.SEARCH_URL % ''):
+            raw_quote_page = reused = inline_supervisor.reuse(query.from_user.id, query.query)
+    await inline_supervisor.run(
+        query.from_user.id,
+        functools.partial(_answer_inline, query, url, page, raw_quote_page, refresh_flag, reused is not None),
+        debounce=raw_quote_page is None and not query.offset
+    )
+
+
+async def _answer_inline(
+        query: InlineQuery,
+        url: str,
+        page: str | None,
+        raw_quote_page: QuotePageRecord | None,
+        refresh_flag: bool,
+        reused: bool
+):
+    """
+    Ответ на инлайн-запрос готовой страницей или страницей, полученной по ссылке.
+    Ответы не зависят от пользователя, поэтому Telegram может показывать их и другим пользователям.
+    """
+    if raw_quote_page is None:
+        raw_quote_page = await tg_utils.get_page(url=url, page=page)
+        if raw_quote_page is None:
+            return
         if refresh_flag:
-            await tg_utils.refresh_page_quotes(raw_quote_page, page)
-        quote_page = TgPageFormatter(raw_quote_page)
-        await query.answer(
-            results=quote_page.inline_results(query.query),
-            next_offset=quote_page.inline_offset(page)
-        )
+            raw_quote_page = await tg_utils.refresh_page_quotes(raw_quote_page)
+    if not page and not reused:
+        inline_supervisor.remember(query.from_user.id, query.query, raw_quote_page)
+    # Подборку из прошлого ответа Telegram не кеширует: следующий такой же запрос получит полный ответ
+    cache_time = 0
+    if not reused:
+        with contextlib.suppress(httpx.InvalidURL):
+            cache_time = min(tg_const.INLINE_CACHE_TIME, cache_utils.url_ttl(url))
+    # Подборка из прошлого ответа отличается от страницы по той же ссылке и не кешируется
+    quote_page = TgPageFormatter(raw_quote_page, (url, page) if not reused else None)
+    # За подборкой при прокрутке следует полная первая страница (смещение "0"), а не вторая:
+    # иначе цитаты первой страницы, не попавшие в подборку, не были бы показаны
+    next_offset = '0' if reused else quote_page.inline_offset(query.offset or None)
+    await query.answer(
+        results=quote_page.inline_results(query.query),
+        cache_time=cache_time,
+        is_personal=False,
+        next_offset=next_offset
+    )
 
 
 async def turn_page(_, query: CallbackQuery):
@@ -150,17 +204,19 @@ async def turn_page(_, query: CallbackQuery):
         url = request
     else:
         url = parser_const.SEARCH_URL % request
-    if response := await tg_utils.http_request(
+    page = page if page != '0' else None
+    if raw_quote_page := await tg_utils.get_page(
             url=url,
             callback_query=query,
-            page=page if page != '0' else None
+            page=page
     ):
-        quote_page = TgPageFormatter(QuotePage(html_page=response.text))
+        quote_page = TgPageFormatter(raw_quote_page, (url, page))
         await query.message.edit(
             text=quote_page.text,
             reply_markup=quote_page.reply_markup,
             disable_web_page_preview=True
         )
+        tg_utils.prefetch_page(raw_quote_page, url, page)
 
 
 async def original(_, query: CallbackQuery):
@@ -168,14 +224,7 @@ async def original(_, query: CallbackQuery):
     Оригинал цитаты на иностранном языке
     по ID из коллбэка.
     """
-    quote_id = query.data[1:]
-    if response := await tg_utils.http_request(
-            url=parser_const.AJAX_URL % quote_id,
-            callback_query=query
-    ):
-        original_text = Quote.get_original_text(
-            html_page=response.json()[1]['data']
-        )
+    if original_text := await tg_utils.get_original(query.data[1:], query):
         original_text = parser_utils.trim_text(original_text, tg_const.MAX_CALLBACK_ANSWER_LENGTH)
         await query.answer(
             text=original_text,
@@ -190,11 +239,10 @@ async def explanation(_, query: CallbackQuery):
     по относительной ссылке из коллбэка.
     """
     rel_link = query.data[1:]
-    if response := await tg_utils.http_request(
+    if quote := await tg_utils.get_quote(
             url=parser_const.BASE_URL % rel_link,
             callback_query=query
     ):
-        quote = Quote(html_page=response.text)
         explanation_text = parser_utils.trim_text(quote.explanation, tg_const.MAX_CALLBACK_ANSWER_LENGTH)
         await query.answer(
             text=explanation_text,
@@ -215,3 +263,23 @@ async def callback_echo(_, query: CallbackQuery):
         show_alert=True,
         cache_time=tg_const.RESULT_CACHE_TIME
     )
+
+
+async def profile(_, msg: Message):
+    """
+    Профилирование процесса бота по команде администратора ``/profile [секунды]``:
+    в ответ присылаются сводка самых затратных функций и файл свёрнутых стеков для построения flame graph.
+    """
+    duration = metrics_const.PROFILE_DURATION
+    if len(msg.command) > 1 and msg.command[1].isdigit():
+        duration = min(int(msg.command[1]), metrics_const.PROFILE_MAX_DURATION)
+    await msg.reply(text=f'Профилирование запущено на {duration} с.', quote=True)
+    result = await asyncio.to_thread(profiler.profile, duration)
+    if result is None:
+        await msg.reply(text='Профилирование уже выполняется.', quote=True)
+        return
+    await msg.reply(
+        text=parser_utils.trim_text(result.summary, tg_const.MAX_MESSAGE_LENGTH),
+        parse_mode=ParseMode.DISABLED
+    )
+    await msg.reply_document(document=result.collapsed_path)
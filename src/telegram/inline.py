@@ -0,0 +1,110 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from ..cache import TTLCache
+from ..metrics import registry
+from ..parser import QuoteRecord, QuotePageRecord
+from ..search import tokenize
+from . import const as tg_const
+
+inline_queries = registry.counter(
+    'inline_queries_total', 'Инлайн-запросы по результату: отвечены, заменены более новыми, отвечены повторно', ('result',)
+)
+
+
+class InlineSupervisor:
+    """
+    Обработка инлайн-запросов по пользователям. Пока пользователь набирает запрос, Telegram присылает его
+    после каждого изменения, а нужен только ответ на последний: запрос, требующий обращения к сайту-донору,
+    выполняется после короткой паузы (и не выполняется вовсе, если за неё пришёл новый), а выполняющийся
+    запрос пользователя отменяется, как только приходит следующий.
+
+    Последний ответ пользователю запоминается: если новый запрос — продолжение предыдущего,
+    подходящие под него цитаты из прошлого ответа показываются сразу, без запросов. Для сокращённого запроса
+    прошлый ответ не годится: он содержит лишь часть подходящих цитат.
+    """
+    def __init__(
+            self,
+            debounce: float = tg_const.INLINE_DEBOUNCE,
+            max_users: int = tg_const.INLINE_MAX_USERS,
+            answer_ttl: float = tg_const.INLINE_ANSWER_TTL
+    ):
+        self.debounce = debounce
+        self.answer_ttl = answer_ttl
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._answers = TTLCache(max_size=max_users, sizeof=lambda _: 1)  # ID пользователя -> запрос и страница
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, user_id: int, func: Callable[[], Awaitable], debounce: bool = True) -> bool:
+        """
+        Выполнение ``func`` (после паузы, если указан ``debounce``) с отменой предыдущего запроса пользователя.
+        Returns:
+            ``False``, если запрос был заменён более новым до того, как на него ответили
+        """
+        if (previous_task := self._tasks.get(user_id)) is not None:
+            previous_task.cancel()
+        task = asyncio.create_task(self._run(func, debounce))
+        self._tasks[user_id] = task
+        try:
+            await task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():  # Отменён сам обработчик, а не заменён запрос
+                task.cancel()
+                raise
+            inline_queries.labels('superseded').inc()
+            return False
+        finally:
+            if self._tasks.get(user_id) is task:
+                del self._tasks[user_id]
+        inline_queries.labels('answered').inc()
+        return True
+
+    def remember(self, user_id: int, query: str, quote_page: QuotePageRecord) -> None:
+        """
+        Первая страница ответа на запрос пользователя для повторного использования ``reuse``.
+        """
+        self._answers.set(user_id, (query, quote_page), self.answer_ttl)
+
+    def reuse(self, user_id: int, query: str) -> QuotePageRecord | None:
+        """
+        Страница из цитат последнего ответа пользователю, подходящих под ``query``, если запрос —
+        продолжение предыдущего и таких цитат не меньше ``INLINE_REUSE_MIN_RESULTS``.
+        """
+        if (answer := self._answers.get(user_id)) is None:
+            return None
+        previous_query, quote_page = answer
+        query, previous_query = query.strip().lower(), previous_query.strip().lower()
+        if not query.startswith(previous_query):
+            return None
+        if not (terms := tokenize(query)):
+            return None
+        quotes = [quote for quote in quote_page.quotes if _matches(quote, terms)]
+        if len(quotes) < tg_const.INLINE_REUSE_MIN_RESULTS:
+            return None
+        inline_queries.labels('reused').inc()
+        return QuotePageRecord(
+            header=quote_page.header,
+            quotes=quotes,
+            pagination=[],
+            non_quote_search_results={}
+        )
+
+    async def _run(self, func: Callable[[], Awaitable], debounce: bool) -> None:
+        if debounce:
+            await asyncio.sleep(self.debounce)
+        await func()
+
+
+def _matches(quote: QuoteRecord, terms: list[str]) -> bool:
+    """
+    Содержит ли цитата (текст или заголовок) все слова запроса, последнее — хотя бы как начало слова.
+    """
+    text = quote.text if isinstance(quote.text, str) else ' '.join(quote.text)
+    words = set(tokenize(f'{quote.header or ""} {text}'))
+    *full_terms, last_term = terms
+    return all(term in words for term in full_terms) and any(word.startswith(last_term) for word in words)
+
+
+inline_supervisor = InlineSupervisor()
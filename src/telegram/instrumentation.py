@@ -0,0 +1,65 @@
+import functools
+import logging
+import time
+from typing import Awaitable, Callable
+
+import pyrogram
+from pyrogram import Client
+
+from ..logs import mark_logged, new_request_id, request_id
+from ..metrics import current_handler, registry, track_phase
+
+logger = logging.getLogger(__name__)
+
+handler_seconds = registry.histogram('bot_handler_seconds', 'Полная длительность обработки обновлений', ('handler',))
+handler_errors = registry.counter('bot_handler_errors_total', 'Необработанные исключения в обработчиках', ('handler',))
+handlers_in_flight = registry.gauge('bot_handlers_in_flight', 'Выполняющиеся обработчики', ('handler',))
+
+
+def instrumented(callback: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """
+    Обёртка обработчика pyrogram, замеряющая его длительность, количество ошибок и одновременных вызовов.
+    Имя обработчика становится меткой этапов, замеренных внутри него (см. ``metrics.track_phase``),
+    а каждое обновление получает идентификатор, которым помечаются все записи журнала о его обработке.
+    """
+    name = callback.__name__.rstrip('_')
+    seconds = handler_seconds.labels(name)
+    errors = handler_errors.labels(name)
+    in_flight = handlers_in_flight.labels(name)
+
+    @functools.wraps(callback)
+    async def wrapper(client: Client, update):
+        handler_token = current_handler.set(name)
+        request_token = request_id.set(new_request_id())
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            result = await callback(client, update)
+        except (pyrogram.StopPropagation, pyrogram.ContinuePropagation):
+            raise
+        except Exception as e:
+            errors.inc()
+            logger.exception('Ошибка при обработке обновления', extra={'event': 'handler_error'})
+            # Запись диспетчера pyrogram о том же исключении, уже без контекста обновления, отбрасывается
+            mark_logged(e)
+            raise
+        else:
+            logger.debug('Обновление обработано', extra={
+                'event': 'handled', 'duration_ms': round((time.perf_counter() - start) * 1e3, 1)
+            })
+            return result
+        finally:
+            seconds.observe(time.perf_counter() - start)
+            in_flight.dec()
+            request_id.reset(request_token)
+            current_handler.reset(handler_token)
+    return wrapper
+
+
+class InstrumentedClient(Client):
+    """
+    Клиент pyrogram, замеряющий все вызовы API Telegram как этап отправки текущего обработчика.
+    """
+    async def invoke(self, *args, **kwargs):
+        with track_phase('send'):
+            return await super().invoke(*args, **kwargs)
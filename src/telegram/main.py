@@ -1,72 +1,247 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import signal
 import sys
 
 from dotenv import dotenv_values
-from pyrogram import filters
-from pyrogram.handlers import MessageHandler, CallbackQueryHandler, InlineQueryHandler
+from pyrogram import Client, filters, idle
+from pyrogram.handlers import MessageHandler, CallbackQueryHandler, InlineQueryHandler, RawUpdateHandler
+from pyrogram.handlers.handler import Handler
 
-from .handlers import *
 from . import const as tg_const
+from . import workers
+from .instrumentation import InstrumentedClient, instrumented
+from ..logs import setup_logging
+from ..logs import const as log_const
+from ..metrics import MetricsServer, profiler
+from ..metrics import const as metrics_const
 from ..parser import const as parser_const
 
 str_query_filter = filters.create(
     lambda _, __, callback_query: isinstance(callback_query.data, str)
 )
 
-handlers = (
-    MessageHandler(help_, filters.command(['start', 'help'])),
-    MessageHandler(
-        single_quote,
-        filters.command('random')
-        | filters.regex(parser_const.QUOTE_PATTERN)
-    ),
-    MessageHandler(
-        multiple_quotes,
-        filters.command(list(tg_const.MULTIPLE_COMMAND_LINKS))
-        | filters.text
-    ),
-
-    CallbackQueryHandler(
-        turn_page,
-        str_query_filter
-        & filters.regex(parser_const.PAGE_PATTERN)
-    ),
-    CallbackQueryHandler(
-        original,
-        str_query_filter
-        & filters.regex(parser_const.ORIGINAL_CALLBACK_PATTERN)
-    ),
-    CallbackQueryHandler(
-        explanation,
-        str_query_filter
-        & filters.regex(parser_const.EXPLANATION_CALLBACK_PATTERN)
-    ),
-    CallbackQueryHandler(
-        quote_by_callback,
-        str_query_filter
-        & filters.regex(parser_const.GET_QUOTE_CALLBACK_PATTERN)
-    ),
-    CallbackQueryHandler(callback_echo),
-
-    InlineQueryHandler(multiple_quotes_inline)
-)
 
-if __name__ == '__main__':
-    TEST_MODE = False
-    credentials = dotenv_values()
-    api_id = credentials['API_ID']
-    api_hash = credentials['API_HASH']
-    if TEST_MODE:
+def create_handlers(credentials: dict) -> tuple[Handler, ...]:
+    """
+    Обработчики обновлений. Команды администратора (``ADMIN_ID``) проверяются раньше остальных,
+    иначе их перехватил бы обработчик текстовых запросов.
+    Модули обработчиков (а с ними разбор страниц, кеши и клиент сайта-донора) импортируются здесь,
+    а не при запуске: процессу-диспетчеру они не нужны.
+    """
+    from .handlers import (
+        callback_echo, explanation, help_, multiple_quotes, multiple_quotes_inline, original, profile,
+        quote_by_callback, single_quote, turn_page
+    )
+
+    admin_handlers = ()
+    if admin_id := credentials.get('ADMIN_ID'):
+        admin_handlers = (MessageHandler(profile, filters.command('profile') & filters.user(int(admin_id))),)
+    return admin_handlers + (
+        MessageHandler(help_, filters.command(['start', 'help'])),
+        MessageHandler(
+            single_quote,
+            filters.command('random')
+            | filters.regex(parser_const.QUOTE_PATTERN)
+        ),
+        MessageHandler(
+            multiple_quotes,
+            filters.command(list(tg_const.MULTIPLE_COMMAND_LINKS))
+            | filters.text
+        ),
+
+        CallbackQueryHandler(
+            turn_page,
+            str_query_filter
+            & filters.regex(parser_const.PAGE_PATTERN)
+        ),
+        CallbackQueryHandler(
+            original,
+            str_query_filter
+            & filters.regex(parser_const.ORIGINAL_CALLBACK_PATTERN)
+        ),
+        CallbackQueryHandler(
+            explanation,
+            str_query_filter
+            & filters.regex(parser_const.EXPLANATION_CALLBACK_PATTERN)
+        ),
+        CallbackQueryHandler(
+            quote_by_callback,
+            str_query_filter
+            & filters.regex(parser_const.GET_QUOTE_CALLBACK_PATTERN)
+        ),
+        CallbackQueryHandler(callback_echo),
+
+        InlineQueryHandler(multiple_quotes_inline)
+    )
+
+
+def configure(credentials: dict, worker_count: int = 1, worker_index: int = None) -> None:
+    """
+    Настройка журнала, разбора страниц, постоянного хранилища, ограничения нагрузки на сайт-донор
+    и цикла событий в текущем процессе. Процессы-обработчики делят между собой допустимую частоту запросов
+    и пишут журнал каждый в свой файл.
+    """
+    from . import utils as tg_utils
+    from .. import http_client
+    from ..cache import SqliteStore
+    from ..parser import ParsingExecutor
+    from ..upstream import AdaptiveLimiter
+    from ..upstream import const as upstream_const
+
+    log_path = credentials.get('LOG_FILE')
+    if log_path and worker_index is not None:
+        log_path = f'{log_path}.{worker_index}'
+    setup_logging(log_path, credentials.get('LOG_LEVEL') or log_const.LOG_LEVEL)
+    if parser_workers := credentials.get('PARSER_WORKERS'):
+        tg_utils.parsing_executor.shutdown()
+        tg_utils.parsing_executor = ParsingExecutor(
+            mode=credentials.get('PARSER_MODE', parser_const.PARSER_MODE),
+            workers=int(parser_workers)
+        )
+    if store_path := credentials.get('STORE_PATH'):
+        tg_utils.quote_store = SqliteStore(store_path)
+        tg_utils.quote_store.warm(tg_utils.quote_cache, tg_utils.page_cache, tg_utils.photo_cache)
+    if worker_count > 1:
+        http_client.upstream_limiter = AdaptiveLimiter(
+            rate=upstream_const.REQUEST_RATE / worker_count,
+            burst=max(1, upstream_const.REQUEST_BURST // worker_count)
+        )
+
+    if sys.platform != 'win32':
+        import uvloop
+        uvloop.install()
+        # Профилирование по сигналу: kill -USR1 {pid процесса}
+        signal.signal(signal.SIGUSR1, lambda *_: profiler.start(metrics_const.PROFILE_DURATION))
+
+
+def create_client(credentials: dict, test_mode: bool, name_suffix: str = '', **kwargs) -> Client:
+    if test_mode:
         name = 'TestBot'
         bot_token = credentials['TEST_TOKEN']
     else:
         name = 'Bot'
         bot_token = credentials['TOKEN']
+    return InstrumentedClient(
+        name + name_suffix,
+        credentials['API_ID'],
+        credentials['API_HASH'],
+        bot_token=bot_token,
+        test_mode=test_mode,
+        **kwargs
+    )
 
-    if sys.platform != 'win32':
-        import uvloop
-        uvloop.install()
 
-    app = Client(name, api_id, api_hash, bot_token=bot_token, test_mode=TEST_MODE)
-    for handler in handlers:
+def add_handlers(app: Client, credentials: dict) -> None:
+    for handler in create_handlers(credentials):
+        handler.callback = instrumented(handler.callback)
         app.add_handler(handler)
-    app.run()
+
+
+def create_metrics_server(credentials: dict, worker_index: int = None) -> MetricsServer:
+    """
+    Точка доступа метрик по ``METRICS_PORT`` и их запись в ``METRICS_FILE`` (если заданы).
+    Процессы-обработчики используют следующие по порядку порты и файлы с номером процесса.
+    """
+    port = credentials.get('METRICS_PORT')
+    dump_path = credentials.get('METRICS_FILE')
+    if worker_index is not None:
+        port = port and int(port) + worker_index + 1
+        dump_path = dump_path and f'{dump_path}.{worker_index}'
+    return MetricsServer(port=int(port) if port else None, dump_path=dump_path)
+
+
+def run_worker(index: int, queue: multiprocessing.Queue, credentials: dict, test_mode: bool, worker_count: int):
+    """
+    Процесс-обработчик: получает обновления от диспетчера и отвечает на них через собственную сессию.
+    """
+    configure(credentials, worker_count, index)
+    app = create_client(credentials, test_mode, f'-worker{index}', no_updates=True)
+    add_handlers(app, credentials)
+    metrics_server = create_metrics_server(credentials, index)
+
+    async def serve():
+        async with app, background_tasks(metrics_server, credentials, index):
+            await workers.consume_updates(app, queue)
+
+    app.run(serve())
+
+
+@contextlib.asynccontextmanager
+async def background_tasks(metrics_server: MetricsServer, credentials: dict = None, worker_index: int = None):
+    """
+    Фоновые задачи на время работы бота: точка доступа метрик, а в процессах, обрабатывающих обновления
+    (переданы ``credentials``), — сохранение поискового индекса по ``SEARCH_INDEX_FILE``
+    и обход списков цитат по ``CRAWL_STATE_FILE`` (только в первом процессе-обработчике и, если их
+    несколько, только с ``STORE_PATH``, через который копия списков доступна остальным).
+    """
+    await metrics_server.start()
+    tasks = []
+    if credentials is not None:
+        from . import utils as tg_utils
+        if search_index_path := credentials.get('SEARCH_INDEX_FILE'):
+            if worker_index is not None:
+                search_index_path = f'{search_index_path}.{worker_index}'
+            tasks.append(asyncio.create_task(tg_utils.serve_search_index(search_index_path)))
+        if (crawl_state_path := credentials.get('CRAWL_STATE_FILE')) and not worker_index:
+            if worker_index is not None and not credentials.get('STORE_PATH'):
+                # Копия списков осталась бы в памяти только одного из процессов
+                logging.warning(
+                    'Обход списков при нескольких процессах-обработчиках требует STORE_PATH и не запущен',
+                    extra={'event': 'crawl_disabled'}
+                )
+            else:
+                from .crawler import Crawler
+                crawler = Crawler(tg_const.MULTIPLE_COMMAND_LINKS.values(), crawl_state_path)
+                tasks.append(asyncio.create_task(crawler.run()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await metrics_server.stop()
+
+
+def run(app: Client, metrics_server: MetricsServer, credentials: dict = None) -> None:
+    async def serve():
+        async with app, background_tasks(metrics_server, credentials):
+            await idle()
+
+    app.run(serve())
+
+
+if __name__ == '__main__':
+    TEST_MODE = False
+    credentials = dotenv_values()
+    worker_count = int(credentials.get('BOT_WORKERS') or 1)
+
+    if worker_count > 1:
+        # Диспетчер только получает обновления и распределяет их по процессам-обработчикам
+        queues = workers.create_queues(worker_count)
+        context = multiprocessing.get_context('spawn')
+        processes = [
+            context.Process(
+                target=run_worker,
+                args=(index, queue, credentials, TEST_MODE, worker_count),
+                name=f'bot-worker{index}',
+                daemon=True
+            ) for index, queue in enumerate(queues)
+        ]
+        setup_logging(credentials.get('LOG_FILE'), credentials.get('LOG_LEVEL') or log_const.LOG_LEVEL)
+        for process in processes:
+            process.start()
+        app = create_client(credentials, TEST_MODE)
+        app.add_handler(RawUpdateHandler(workers.UpdateRouter(queues).route))
+        run(app, create_metrics_server(credentials))
+        for queue in queues:
+            queue.put(None)
+        for process in processes:
+            process.join()
+    else:
+        configure(credentials)
+        app = create_client(credentials, TEST_MODE)
+        add_handlers(app, credentials)
+        run(app, create_metrics_server(credentials), credentials)
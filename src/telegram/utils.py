@@ -1,29 +1,114 @@
 import asyncio
+import copy
+import functools
+import logging
+import os
+import urllib.parse
+import weakref
+from typing import Awaitable, Callable
 
 import httpx
 from pyrogram.enums import ChatAction
-from pyrogram.types import Message, CallbackQuery
+from pyrogram.errors import BadRequest
+from pyrogram.types import Message, CallbackQuery, InputMediaPhoto
 
-from ..http_client import http_client
-from ..parser import Quote, QuotePage, QuoteTypes
+from ..cache import CacheEntry, Prefetcher, QuoteStore, TTLCache
+from ..cache import const as cache_const
+from ..cache import utils as cache_utils
+from .. import http_client
+from ..metrics import registry, track_phase
+from ..parser import ParsingExecutor, QuoteRecord, QuotePageRecord, QuoteTypes
 from ..parser import const as parser_const
+from ..search import QuoteIndex
+from ..search import const as search_const
+from ..upstream import Priority, RequestPriority, SingleFlight
 from . import const as tg_const
 
+logger = logging.getLogger(__name__)
+
+# Кеш успешных ответов сайта-донора, которые не разбираются в цитаты и страницы (оригиналы цитат):
+# цитаты и страницы кешируются уже разобранными. Может быть заменён любым объектом
+# с методами ``get(key)`` и ``set(key, value, ttl)`` или отключён присваиванием ``None``
+response_cache = TTLCache(
+    max_size=cache_const.RESPONSE_CACHE_SIZE,
+    sizeof=lambda response: len(response.content)
+)
+# Кеши разобранных цитат и страниц: повторный показ не требует ни запроса, ни парсинга
+quote_cache = TTLCache(max_size=cache_const.QUOTE_CACHE_SIZE, sizeof=lambda _: 1)
+page_cache = TTLCache(max_size=cache_const.PAGE_CACHE_SIZE, sizeof=lambda _: 1)
+# Ссылка на изображение цитаты -> file_id, полученный от Telegram при первой отправке
+photo_cache = TTLCache(max_size=cache_const.PHOTO_CACHE_SIZE, sizeof=lambda _: 1)
+# Необязательное постоянное хранилище разобранных цитат и страниц, общее для процессов бота (см. ``main``)
+quote_store: QuoteStore | None = None
+# Фоновая загрузка цитат, которые пользователь вероятно откроет следующими
+prefetcher = Prefetcher()
+# Одновременные запросы одной и той же страницы выполняются и разбираются единожды. Запрос, который больше
+# никто не ждёт (например, заменённый инлайн-запрос), отменяется, а уже начатый разбор доводится до конца
+in_flight_requests = SingleFlight(cancel_abandoned=True)
+in_flight_parsing = SingleFlight()
+# Приоритеты выполняющихся запросов: фоновый запрос, результата которого начал ждать пользователь, ускоряется
+flight_priorities: weakref.WeakValueDictionary[tuple, RequestPriority] = weakref.WeakValueDictionary()
+# Разбор страниц вне цикла событий (см. ``main``)
+parsing_executor = ParsingExecutor()
+# Полнотекстовый индекс всех разобранных цитат: поиск без запроса к сайту-донору
+search_index = QuoteIndex()
+
+parse_errors = registry.counter('parse_errors_total', 'Ошибки разбора страниц сайта-донора', ('kind',))
+cache_requests = registry.counter(
+    'cache_requests_total', 'Обращения к кешам в памяти по результату', ('cache', 'result')
+)
+cache_entries = registry.gauge('cache_entries', 'Количество записей в кешах в памяти', ('cache',))
+for cache_name, cache in (
+        ('response', response_cache), ('quote', quote_cache), ('page', page_cache), ('photo', photo_cache)
+):
+    for result in ('hits', 'stale_hits', 'misses', 'evictions'):
+        cache_requests.set_function(functools.partial(getattr, cache, result), cache_name, result)
+    cache_entries.set_function(cache.__len__, cache_name)
+in_flight = registry.gauge('in_flight', 'Выполняющиеся запросы и разборы страниц', ('kind',))
+in_flight.set_function(in_flight_requests.__len__, 'requests')
+in_flight.set_function(in_flight_parsing.__len__, 'parsing')
+in_flight.set_function(lambda: prefetcher.stats['queued'], 'prefetch_queue')
+search_index_quotes = registry.gauge('search_index_quotes', 'Количество цитат в локальном поисковом индексе')
+search_index_quotes.set_function(lambda: len(search_index))
+local_searches = registry.counter(
+    'local_searches_total', 'Поисковые запросы по результату поиска в локальном индексе', ('result',)
+)
+
+
+async def _parse(kind: str, key, func):
+    """
+    Разбор страницы (одновременные разборы одной страницы выполняются единожды) с учётом ошибок.
+    """
+    try:
+        with track_phase('parse'):
+            return await in_flight_parsing.do((kind, key), func)
+    except Exception:
+        parse_errors.labels(kind).inc()
+        logger.exception('Не удалось разобрать страницу', extra={'event': 'parse_error', 'kind': kind, 'key': key})
+        raise
+
 
 async def http_request(
         url: str,
         message: Message = None,
         callback_query: CallbackQuery = None,
-        page: str = None
+        page: str = None,
+        priority: Priority = Priority.interactive,
+        headers: dict = None,
+        stop_marker: bytes = None,
+        cache_response: bool = False
 ) -> httpx.Response | None:
     """
     Получает HTML-страницу, правильно взаимодействуя с Telegram (включая обработку исключений).
+    С ``cache_response`` успешные ответы кешируются с учётом вида страницы (см. ``cache.utils.url_ttl``) —
+    только для ответов, которые не попадают в кеши разобранных цитат и страниц.
+    На условный запрос (с заголовками ``headers``) может быть возвращён ответ 304.
+    С ``stop_marker`` страница загружается только до него.
     """
     assert not (message and callback_query)
-    if message:
-        await message.reply_chat_action(ChatAction.TYPING)
     try:
         url = httpx.URL(url)
+        key = cache_utils.cache_key(url, page)
     except httpx.InvalidURL:
         if message:
             await message.reply(text=tg_const.BAD_REQUEST_MSG)
@@ -33,11 +118,41 @@ async def http_request(
                 cache_time=tg_const.ERROR_CACHE_TIME
             )
         return
-    response = await http_client.get(
+    use_response_cache = cache_response and response_cache is not None and stop_marker is None
+    if use_response_cache and (response := response_cache.get(key)) is not None:
+        return response
+    if message:
+        await message.reply_chat_action(ChatAction.TYPING)
+    ttl = cache_utils.url_ttl(url)
+    flight_key = (key, bool(headers), stop_marker)
+    request_priority = flight_priorities.get(flight_key) if ttl and flight_key in in_flight_requests else None
+    if request_priority is not None:  # Запрос уже выполняется: с приоритетом не ниже нашего
+        request_priority.raise_to(priority)
+    else:
+        request_priority = RequestPriority(priority)
+        if ttl:
+            flight_priorities[flight_key] = request_priority
+    fetch = functools.partial(
+        http_client.get,
         url=url,
         params={'page': page} if page else None,
+        priority=request_priority,
+        headers=headers,
+        stop_marker=stop_marker
     )
-    if response.status_code == httpx.codes.OK:
+    try:
+        with track_phase('fetch'):
+            if ttl:  # Случайные цитаты должны отличаться даже для одновременных запросов
+                response = await in_flight_requests.do(flight_key, fetch)
+            else:
+                response = await fetch()
+    except httpx.HTTPError:
+        response = None
+    if response is not None and response.status_code == httpx.codes.OK:
+        if use_response_cache:
+            response_cache.set(key, response, ttl)
+        return response
+    if response is not None and headers and response.status_code == httpx.codes.NOT_MODIFIED:
         return response
     if message:
         await message.reply(text=tg_const.BAD_REQUEST_MSG)
@@ -48,21 +163,327 @@ async def http_request(
         )
 
 
-async def refresh_page_quotes(quote_page: QuotePage, page: str):
+async def get_quote(
+        url: str,
+        message: Message = None,
+        callback_query: CallbackQuery = None,
+        priority: Priority = Priority.interactive
+) -> QuoteRecord | None:
+    """
+    Разобранная цитата по ссылке: из кеша, постоянного хранилища или со страницы сайта-донора.
+    Цитата, сохранённая в хранилище дольше времени жизни в кеше (например, до перезапуска),
+    отдаётся сразу и обновляется в фоне.
+    """
+    try:
+        key = cache_utils.cache_key(url)
+    except httpx.InvalidURL:
+        key = None
+    if key and (quote := quote_cache.get(key)) is not None:
+        return quote
+    if key and quote_store is not None and (ttl := cache_utils.url_ttl(key)):
+        if stored := await quote_store.get_quote(key, cache_const.STORE_MAX_AGE):
+            quote, age = stored
+            if age < ttl:
+                quote_cache.set(key, quote, ttl - age)
+            else:  # Устаревшая цитата из хранилища отдаётся сразу и обновляется в фоне
+                prefetcher.schedule(key, functools.partial(_fetch_quote, url, key, priority=Priority.background))
+            search_index.add(quote, replace=False)
+            return quote
+    return await _fetch_quote(url, key, message, callback_query, priority)
+
+
+async def _fetch_quote(
+        url: str,
+        key: str | None,
+        message: Message = None,
+        callback_query: CallbackQuery = None,
+        priority: Priority = Priority.interactive
+) -> QuoteRecord | None:
+    """
+    Получение и разбор страницы цитаты с сайта-донора с сохранением в кеш, хранилище и поисковый индекс.
+    """
+    if response := await http_request(
+            url, message, callback_query,
+            priority=priority,
+            stop_marker=parser_const.QUOTE_END_MARKER
+    ):
+        if key in quote_cache:  # Уже получена и разобрана одновременным запросом
+            return quote_cache.get(key)
+        quote = await _parse(
+            'quote',
+            key if key and cache_utils.url_ttl(key) else id(response),
+            functools.partial(parsing_executor.quote, response.content)
+        )
+        quote_key = cache_utils.cache_key(parser_const.BASE_URL % quote.rel_link)
+        ttl = cache_utils.url_ttl(quote_key)
+        quote_cache.set(quote_key, quote, ttl)
+        source_url = None
+        if key != quote_key and cache_utils.url_ttl(key):
+            source_url = key
+            quote_cache.set(key, quote, ttl)
+        search_index.add(quote)
+        if quote_store is not None:
+            await quote_store.put_quote(quote, source_url)
+        return quote
+
+
+async def get_original(quote_id: str, callback_query: CallbackQuery = None) -> str | None:
+    """
+    Оригинал цитаты на иностранном языке по ID цитаты.
+    Одновременные запросы и разборы одного и того же оригинала выполняются единожды.
+    """
+    if response := await http_request(
+            url=parser_const.AJAX_URL % quote_id,
+            callback_query=callback_query,
+            cache_response=True
+    ):
+        original_text = await _parse(
+            'original',
+            quote_id,
+            functools.partial(parsing_executor.original, response.json()[1]['data'])
+        )
+        search_index.add_original(quote_id, original_text)
+        return original_text
+
+
+async def get_page(
+        url: str,
+        message: Message = None,
+        callback_query: CallbackQuery = None,
+        page: str = None,
+        priority: Priority = Priority.interactive
+) -> QuotePageRecord | None:
+    """
+    Разобранная страница с цитатами по ссылке: из кеша, постоянного хранилища или с сайта-донора.
+    Недавно устаревшая страница отдаётся сразу и обновляется в фоне, а более старая
+    перед использованием проверяется на изменения условным запросом. Устаревшая страница
+    из хранилища (например, сохранённая до перезапуска) отдаётся сразу и обновляется в фоне.
+    """
+    try:
+        key = cache_utils.cache_key(url, page)
+    except httpx.InvalidURL:
+        key = None
+    entry = page_cache.lookup(key) if key else None
+    if entry is not None:
+        if entry.fresh:
+            return entry.value
+        if entry.staleness < cache_const.STALE_WHILE_REVALIDATE:
+            prefetcher.schedule(key, functools.partial(
+                _fetch_page, url, key, entry, page=page, priority=Priority.background
+            ))
+            return entry.value
+    elif (local_page := search_local(url, page)) is not None:
+        return local_page
+    elif key and quote_store is not None and (ttl := cache_utils.url_ttl(key)):
+        if stored := await quote_store.get_page(key, cache_const.STORE_MAX_AGE):
+            quote_page, age = stored
+            if age < ttl:
+                page_cache.set(key, quote_page, ttl - age, cache_const.STALE_TTL)
+            else:  # Устаревшая страница из хранилища отдаётся сразу и обновляется в фоне
+                prefetcher.schedule(key, functools.partial(
+                    _fetch_page, url, key, None, page=page, priority=Priority.background
+                ))
+            search_index.add_many(quote_page.quotes, replace=False)
+            return quote_page
+    return await _fetch_page(url, key, entry, message, callback_query, page, priority)
+
+
+async def _fetch_page(
+        url: str,
+        key: str | None,
+        stale_entry: CacheEntry | None,
+        message: Message = None,
+        callback_query: CallbackQuery = None,
+        page: str = None,
+        priority: Priority = Priority.interactive,
+        min_ttl: float = 0
+) -> QuotePageRecord | None:
+    """
+    Получение и разбор страницы с сайта-донора. Если в кеше есть прежняя версия страницы (устаревшая
+    или обновляемая заранее), запрос выполняется условным, и при ответе 304 её время жизни просто продлевается.
+    Кешируемая страница хранится в кеше не меньше ``min_ttl`` секунд.
+    """
+    headers = cache_utils.conditional_headers(stale_entry.meta) if stale_entry is not None else None
+    if response := await http_request(url, message, callback_query, page, priority, headers):
+        ttl = cache_utils.url_ttl(key) if key else 0
+        if ttl:
+            ttl = max(ttl, min_ttl)
+        if key in page_cache and (entry := page_cache.lookup(key)) is not stale_entry:
+            # Уже получена и разобрана одновременным запросом
+            if min_ttl:
+                page_cache.touch(key, ttl, cache_const.STALE_TTL)
+            return entry.value
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            page_cache.touch(key, ttl, cache_const.STALE_TTL)
+            quote_page = stale_entry.value
+        else:
+            quote_page = await _parse(
+                'page',
+                key or id(response),
+                functools.partial(parsing_executor.page, response.content)
+            )
+            search_index.add_many(quote_page.quotes, replace=False)
+            page_cache.set(key, quote_page, ttl, cache_const.STALE_TTL, cache_utils.validators(response))
+        if ttl and quote_store is not None:
+            await quote_store.put_page(key, quote_page)
+        return quote_page
+
+
+async def mirror_page(url: str, page: str = None, keep_fresh: float = 0) -> tuple[QuotePageRecord | None, bool]:
+    """
+    Обновление страницы в кеше, хранилище и поисковом индексе фоновым запросом
+    (условным, если в кеше есть устаревшая версия) для поддержания локальной копии списков цитат.
+    Страница из кеша, которая останется свежей ещё ``keep_fresh`` секунд (до следующего обновления),
+    повторно не запрашивается, а полученная хранится в кеше вдвое дольше — с запасом на задержку обновления.
+    Returns:
+        страница (``None`` при ошибке сайта-донора) и был ли выполнен запрос
+    """
+    key = cache_utils.cache_key(url, page)
+    entry = page_cache.lookup(key)
+    if entry is not None and entry.remaining > keep_fresh:
+        return entry.value, False
+    quote_page = await _fetch_page(url, key, entry, page=page, priority=Priority.background, min_ttl=2 * keep_fresh)
+    return quote_page, True
+
+
+def search_local(url: str, page: str = None) -> QuotePageRecord | None:
+    """
+    Страница результатов поиска из локального индекса, если ``url`` — ссылка на поиск сайта-донора
+    и в индексе достаточно подходящих цитат. Иначе поиск выполняется сайтом-донором.
+    """
+    search_prefix = parser_const.SEARCH_URL % ''
+    if not search_const.SEARCH_LOCAL or not url.startswith(search_prefix):
+        return None
+    quote_page = search_index.page(urllib.parse.unquote(url.removeprefix(search_prefix)), page)
+    local_searches.labels('hit' if quote_page is not None else 'miss').inc()
+    return quote_page
+
+
+def cached_page(url: str, page: str = None) -> QuotePageRecord | None:
+    """
+    Свежая страница из кеша. Поиск в локальном индексе сюда не входит: он дороже и выполняется ``get_page``.
+    """
+    try:
+        key = cache_utils.cache_key(url, page)
+    except httpx.InvalidURL:
+        return None
+    if (entry := page_cache.lookup(key)) is not None and entry.fresh:
+        return entry.value
+    return None
+
+
+def prefetch_page(quote_page: QuotePageRecord, url: str, page: str = None) -> None:
+    """
+    Фоновая загрузка цитат, показанных на странице списком, и следующей страницы пагинации.
+    """
+    for rel_link in quote_page.quote_links:
+        quote_url = parser_const.BASE_URL % rel_link
+        if cache_utils.cache_key(quote_url) not in quote_cache:
+            prefetcher.schedule(quote_url, functools.partial(get_quote, quote_url, priority=Priority.background))
+    next_page = str(int(page or 0) + 1)
+    if cache_const.PREFETCH_NEXT_PAGE and int(next_page) + 1 in quote_page.pagination:
+        key = cache_utils.cache_key(url, next_page)
+        if key not in page_cache:
+            prefetcher.schedule(key, functools.partial(
+                get_page, url, page=next_page, priority=Priority.background
+            ))
+
+
+async def serve_search_index(path: str) -> None:
+    """
+    Загрузка сохранённого поискового индекса в фоновом потоке (не задерживая запуск бота)
+    и его периодическое сохранение, пока задача не будет отменена.
+    """
+    global search_index
+    if os.path.exists(path):
+        loaded_index = QuoteIndex()
+        try:
+            await asyncio.to_thread(loaded_index.load, path)
+        except (OSError, ValueError, KeyError):
+            logger.exception('Не удалось загрузить поисковый индекс', extra={'event': 'search_index_error'})
+        else:
+            loaded_index.merge(search_index)  # Цитаты и оригиналы, полученные за время загрузки
+            search_index = loaded_index
+    await search_index.autosave(path)
+
+
+async def send_media_group(
+        send: Callable[..., Awaitable[list[Message]]],
+        media: list[InputMediaPhoto],
+        **kwargs
+) -> list[Message]:
+    """
+    Отправка изображений цитаты группой через ``send`` (``Message.reply_media_group`` или ``Client.send_media_group``).
+    Изображения, отправленные ранее, передаются по file_id, и Telegram не загружает их с сайта-донора заново,
+    а file_id новых изображений запоминаются по ответу Telegram (в кеше и постоянном хранилище).
+    """
+    urls = [item.media for item in media]
+    file_ids = {url: file_id for url in urls if (file_id := photo_cache.get(url)) is not None}
+    if quote_store is not None and (missing := [url for url in urls if url not in file_ids]):
+        stored_file_ids = await quote_store.get_file_ids(missing)
+        for url, file_id in stored_file_ids.items():
+            photo_cache.set(url, file_id, cache_const.PHOTO_TTL)
+        file_ids |= stored_file_ids
+    try:
+        messages = await send(media=[_with_file_id(item, file_ids) for item in media], **kwargs)
+    except BadRequest as e:
+        if not file_ids or not _is_file_id_error(e):
+            raise  # Ошибка изображения по ссылке: сохранённые file_id остаются действительными
+        # file_id другого бота (например, тестового) или удалённого файла: изображения отправляются по ссылкам
+        logger.warning('Сохранённые file_id не приняты Telegram: %s', e.ID or e.value, extra={'event': 'photo_file_id_rejected'})
+        for url in file_ids:
+            photo_cache.pop(url)
+        if quote_store is not None:
+            await quote_store.delete_file_ids(list(file_ids))
+        file_ids = {}
+        messages = await send(media=media, **kwargs)
+    new_file_ids = {
+        url: message.photo.file_id for url, message in zip(urls, messages)
+        if url not in file_ids and message.photo is not None
+    }
+    if new_file_ids:
+        for url, file_id in new_file_ids.items():
+            photo_cache.set(url, file_id, cache_const.PHOTO_TTL)
+        if quote_store is not None:
+            await quote_store.put_file_ids(new_file_ids)
+    return messages
+
+
+def _is_file_id_error(error: BadRequest) -> bool:
+    description = f'{error.ID} {error.value}'
+    return any(marker in description for marker in tg_const.FILE_ID_ERRORS)
+
+
+def _with_file_id(item: InputMediaPhoto, file_ids: dict[str, str]) -> InputMediaPhoto:
+    if (file_id := file_ids.get(item.media)) is None:
+        return item
+    item = copy.copy(item)
+    item.media = file_id
+    return item
+
+
+async def refresh_page_quotes(quote_page: QuotePageRecord) -> QuotePageRecord:
     """
     Обновляет список цитат (не пословиц или притч) на странице, получая их по прямым ссылкам.
     Нужно, чтобы избежать багов парсинга, связанных с отсутствием элементов таксономии на странице
     и невозможностью правильно вычленить общий таксономический элемент.
+    Цитаты, которые не удалось получить вовремя или без ошибок, остаются в том виде, в каком они есть на странице.
     """
-    response_tasks = {}
+    semaphore = asyncio.Semaphore(tg_const.REFRESH_CONCURRENCY)
+    deadline = asyncio.get_running_loop().time() + tg_const.INLINE_REFRESH_TIMEOUT
+
+    async def refresh(quote: QuoteRecord) -> QuoteRecord:
+        if quote.type != QuoteTypes.quote:
+            return quote
+        url = parser_const.BASE_URL % quote.rel_link
+        if (cached_quote := quote_cache.get(cache_utils.cache_key(url))) is not None:
+            return cached_quote
+        try:
+            async with asyncio.timeout_at(deadline), semaphore:
+                return await get_quote(url, priority=Priority.background) or quote
+        except Exception:  # Ошибка одной цитаты не должна лишать ответа весь запрос
+            return quote
+
     async with asyncio.TaskGroup() as tg:
-        for num, quote in enumerate(quote_page.quotes):
-            if quote.type == QuoteTypes.quote:
-                response_tasks[num] = tg.create_task(http_request(
-                    url=parser_const.BASE_URL % quote.rel_link,
-                    page=page if page != '0' else None
-                ))
-    for num, response_task in response_tasks.items():
-        quote_page.quotes[num] = Quote(
-            html_page=response_task.result().text
-        )
+        quote_tasks = [tg.create_task(refresh(quote)) for quote in quote_page.quotes]
+    return quote_page.replace_quotes([quote_task.result() for quote_task in quote_tasks])
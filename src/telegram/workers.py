@@ -0,0 +1,98 @@
+import asyncio
+import io
+import logging
+import multiprocessing.queues
+
+from pyrogram import Client, utils as pyrogram_utils
+from pyrogram.raw.core import TLObject
+
+from ..metrics import registry
+from . import const as tg_const
+
+dispatched_updates = registry.counter(
+    'dispatcher_updates_total', 'Обновления, распределённые диспетчером по процессам-обработчикам', ('result',)
+)
+
+# Сериализованное обновление: само обновление и упомянутые в нём пользователи и чаты
+Packet = tuple[bytes, list[bytes], list[bytes]]
+
+
+def pack(update: TLObject, users: dict, chats: dict) -> Packet:
+    """
+    Сериализация необработанного обновления для передачи в другой процесс.
+    """
+    return update.write(), [user.write() for user in users.values()], [chat.write() for chat in chats.values()]
+
+
+def unpack(packet: Packet) -> tuple[TLObject, dict, dict]:
+    update, users, chats = packet
+    users = [TLObject.read(io.BytesIO(user)) for user in users]
+    chats = [TLObject.read(io.BytesIO(chat)) for chat in chats]
+    return (
+        TLObject.read(io.BytesIO(update)),
+        {user.id: user for user in users},
+        {chat.id: chat for chat in chats}
+    )
+
+
+def shard_key(update: TLObject) -> int:
+    """
+    Идентификатор чата (или пользователя), к которому относится обновление.
+    Обновления одного чата всегда попадают в один процесс, сохраняя порядок обработки.
+    """
+    message = getattr(update, 'message', None)
+    peer = getattr(message, 'peer_id', None) or getattr(update, 'peer', None)
+    if peer is not None:
+        return pyrogram_utils.get_peer_id(peer)
+    return getattr(update, 'user_id', 0)
+
+
+class UpdateRouter:
+    """
+    Распределение обновлений, полученных процессом-диспетчером, по очередям процессов-обработчиков.
+    Метод ``route`` используется как обработчик ``RawUpdateHandler``.
+    """
+    def __init__(self, queues: list[multiprocessing.queues.Queue]):
+        self.queues = queues
+        self.routed = self.dropped = 0
+        dispatched_updates.set_function(lambda: self.routed, 'routed')
+        dispatched_updates.set_function(lambda: self.dropped, 'dropped')
+
+    async def route(self, _: Client, update: TLObject, users: dict, chats: dict) -> None:
+        queue = self.queues[shard_key(update) % len(self.queues)]
+        try:
+            queue.put_nowait(pack(update, users, chats))
+        except multiprocessing.queues.Full:
+            self.dropped += 1
+            logging.warning('Очередь обработчика переполнена, обновление отброшено')
+        else:
+            self.routed += 1
+
+
+async def consume_updates(app: Client, queue: multiprocessing.queues.Queue) -> None:
+    """
+    Передача обновлений из очереди процесса-обработчика обработчикам клиента ``app``.
+    Клиент создаётся с ``no_updates=True``: обновления ему присылает только диспетчер,
+    поэтому задачи обработки запускаются здесь, а не при старте клиента. Публичного способа сделать это
+    у Pyrogram нет, поэтому используются внутренние атрибуты ``Dispatcher`` версии, закреплённой в requirements.txt.
+    """
+    dispatcher = app.dispatcher
+    for _ in range(app.workers):
+        lock = asyncio.Lock()
+        dispatcher.locks_list.append(lock)
+        dispatcher.handler_worker_tasks.append(asyncio.create_task(dispatcher.handler_worker(lock)))
+    loop = asyncio.get_running_loop()
+    while (packet := await loop.run_in_executor(None, queue.get)) is not None:
+        update, users, chats = unpack(packet)
+        # Хеши доступа нужны, чтобы отвечать в чаты, о которых этот процесс ещё не знает
+        await app.fetch_peers(list(users.values()) + list(chats.values()))
+        await dispatcher.updates_queue.put((update, users, chats))
+    for _ in dispatcher.handler_worker_tasks:
+        dispatcher.updates_queue.put_nowait(None)
+    await asyncio.gather(*dispatcher.handler_worker_tasks)
+    dispatcher.handler_worker_tasks.clear()
+
+
+def create_queues(count: int) -> list[multiprocessing.queues.Queue]:
+    context = multiprocessing.get_context('spawn')
+    return [context.Queue(tg_const.WORKER_QUEUE_SIZE) for _ in range(count)]
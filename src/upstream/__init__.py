@@ -0,0 +1,14 @@
+from .limiter import AdaptiveLimiter, Priority, RequestPriority, TokenBucket
+from .retry import LatencyTracker, RetryBudget
+from .single_flight import SingleFlight
+
+
+__all__ = [
+    AdaptiveLimiter.__name__,
+    LatencyTracker.__name__,
+    Priority.__name__,
+    RequestPriority.__name__,
+    RetryBudget.__name__,
+    SingleFlight.__name__,
+    TokenBucket.__name__
+]
@@ -0,0 +1,29 @@
+MAX_CONNECTIONS = 20            # Ограничение пула соединений с сайтом-донором
+MAX_KEEPALIVE_CONNECTIONS = 10  # Соединения, которые держатся открытыми между запросами
+KEEPALIVE_EXPIRY = 30.0         # Время жизни неиспользуемого соединения в секундах
+
+REQUEST_RATE = 10.0             # Средняя частота запросов в секунду
+REQUEST_BURST = 20              # Количество запросов, которое можно выполнить разом после простоя
+
+INITIAL_WINDOW = 4.0            # Начальное количество одновременных запросов
+MIN_WINDOW = 1.0
+MAX_WINDOW = 16.0
+WINDOW_DECREASE_FACTOR = 0.5    # Во сколько раз сужается окно при перегрузке
+LATENCY_TOLERANCE = 2.0         # Во сколько раз задержка должна превысить обычную, чтобы считаться перегрузкой
+LATENCY_SMOOTHING = 0.1         # Вес нового значения в скользящем среднем задержки
+BACKGROUND_SHARE = 0.5          # Доля окна, доступная фоновым запросам
+
+OVERLOAD_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+MAX_RETRIES = 2                 # Повторы GET-запроса после первой неудачной попытки
+RETRY_BASE_DELAY = 0.2          # Базовая задержка перед повтором в секундах (удваивается с каждой попыткой)
+RETRY_MAX_DELAY = 2.0
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+RETRY_BUDGET_RATIO = 0.1        # Доля повторов (и дублирующих запросов) от общего количества запросов
+RETRY_BUDGET_MIN_RATE = 1.0     # Повторы в секунду, разрешённые независимо от количества запросов
+RETRY_BUDGET_MAX = 10.0         # Ограничение накопленного запаса повторов
+
+HEDGING_ENABLED = True          # Дублировать ли медленные запросы, ответ на которые ждёт пользователь
+HEDGING_QUANTILE = 0.95         # Запрос дублируется, если его задержка превысила этот квантиль
+LATENCY_SAMPLES = 200           # Количество последних задержек для расчёта квантиля
+MIN_LATENCY_SAMPLES = 20        # Минимальное количество задержек, при котором начинается дублирование
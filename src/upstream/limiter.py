@@ -0,0 +1,217 @@
+import asyncio
+import contextlib
+import enum
+import heapq
+import itertools
+import time
+from typing import AsyncIterator
+
+from . import const
+
+
+class Priority(enum.IntEnum):
+    """
+    Приоритет запроса к сайту-донору: запросы, ответ на которые ждёт пользователь,
+    выполняются раньше фоновых (обновление цитат для инлайн-режима, предзагрузка).
+    """
+    interactive = 0
+    background = 1
+
+
+class RequestPriority:
+    """
+    Приоритет запроса, который можно повысить, пока запрос ждёт в очереди ограничителя:
+    например, когда результата фоновой загрузки начал ждать пользователь.
+    """
+    __slots__ = ('value', '_waiting', '__weakref__')
+
+    def __init__(self, value: Priority = Priority.interactive):
+        self.value = value
+        self._waiting: list[tuple['AdaptiveLimiter', asyncio.Future]] = []
+
+    def raise_to(self, value: Priority) -> None:
+        if value >= self.value:
+            return
+        self.value = value
+        for limiter, future in self._waiting:
+            limiter._reprioritize(future, value)
+
+
+class TokenBucket:
+    """
+    Ограничение средней частоты событий с допустимым всплеском ``burst``.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self) -> None:
+        """
+        Ожидание очередного токена. Токены резервируются сразу,
+        поэтому одновременные вызовы обслуживаются в порядке очереди.
+        """
+        self._refill()
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+class _Slot:
+    __slots__ = ('failed',)
+
+    def __init__(self):
+        self.failed = False
+
+
+class AdaptiveLimiter:
+    """
+    Ограничитель нагрузки на сайт-донор: частота запросов ограничивается ``TokenBucket``,
+    а количество одновременных запросов — окном, которое по принципу AIMD растёт
+    на единицу за каждое окно успешных запросов и сужается при ошибках или росте задержки.
+    """
+    def __init__(
+            self,
+            rate: float = const.REQUEST_RATE,
+            burst: int = const.REQUEST_BURST,
+            initial_window: float = const.INITIAL_WINDOW,
+            min_window: float = const.MIN_WINDOW,
+            max_window: float = const.MAX_WINDOW
+    ):
+        self._bucket = TokenBucket(rate, burst)
+        self.window = initial_window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._latency: float | None = None
+        self._last_decrease = 0.0
+        self.successes = self.failures = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: Priority | RequestPriority = Priority.interactive) -> AsyncIterator[_Slot]:
+        """
+        Выполнение запроса в пределах ограничений. Исключение внутри блока или
+        ``slot.failed = True`` (например, при ответе 503) считаются признаками перегрузки,
+        а отменённые запросы не учитываются вовсе. Приоритет ``RequestPriority`` может быть повышен, пока запрос ждёт в очереди.
+        """
+        await self._acquire(priority)
+        slot = _Slot()
+        started_at = time.monotonic()
+        completed = False
+        try:
+            yield slot
+            completed = True
+        except Exception:
+            slot.failed = True
+            completed = True
+            raise
+        finally:
+            self.in_flight -= 1
+            if completed:  # Отменённая попытка (например, проигравшая дублирующая) — ни успех, ни перегрузка
+                self._record(time.monotonic() - started_at, slot.failed)
+            self._wake()
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            'window': self.window,
+            'in_flight': self.in_flight,
+            'waiting': len(self._waiters),
+            'tokens': self._bucket.tokens,
+            'latency': self._latency or 0.0,
+            'successes': self.successes,
+            'failures': self.failures
+        }
+
+    def _limit(self, priority: Priority) -> int:
+        window = self.window if priority == Priority.interactive else self.window * const.BACKGROUND_SHARE
+        return max(1, int(window))
+
+    async def _acquire(self, priority: Priority | RequestPriority) -> None:
+        request_priority = priority if isinstance(priority, RequestPriority) else None
+        if request_priority is not None:
+            priority = request_priority.value
+        if not self._waiters and self.in_flight < self._limit(priority):
+            self.in_flight += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._order), future))
+            if request_priority is not None:
+                request_priority._waiting.append((self, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():  # Место уже выделено — освобождаем его
+                    self.in_flight -= 1
+                    self._wake()
+                else:
+                    self._discard(future)
+                raise
+            finally:
+                if request_priority is not None:
+                    request_priority._waiting.remove((self, future))
+        try:
+            await self._bucket.acquire()
+        except asyncio.CancelledError:
+            self.in_flight -= 1
+            self._wake()
+            raise
+
+    def _discard(self, future: asyncio.Future) -> None:
+        self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+        heapq.heapify(self._waiters)
+
+    def _reprioritize(self, future: asyncio.Future, priority: Priority) -> None:
+        self._waiters = [
+            (priority if waiter_future is future else waiter_priority, order, waiter_future)
+            for waiter_priority, order, waiter_future in self._waiters
+        ]
+        heapq.heapify(self._waiters)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self._limit(priority):
+                break
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _record(self, latency: float, failed: bool) -> None:
+        now = time.monotonic()
+        overloaded = failed or (
+            self._latency is not None and latency > self._latency * const.LATENCY_TOLERANCE
+        )
+        if failed:
+            self.failures += 1
+        else:
+            self.successes += 1
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency += (latency - self._latency) * const.LATENCY_SMOOTHING
+        if overloaded:
+            # Не чаще одного сужения за время обычного запроса: ответы на запросы,
+            # отправленные до предыдущего сужения, не должны сужать окно повторно
+            if now - self._last_decrease > (self._latency or 0.0):
+                self.window = max(self.min_window, self.window * const.WINDOW_DECREASE_FACTOR)
+                self._last_decrease = now
+        else:
+            self.window = min(self.max_window, self.window + 1 / self.window)
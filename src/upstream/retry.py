@@ -0,0 +1,106 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from . import const
+
+
+class RetryBudget:
+    """
+    Общий для всех запросов запас повторов: каждый запрос пополняет его на ``ratio``,
+    а каждый повтор расходует единицу. Не даёт повторам многократно усилить нагрузку
+    на сайт-донор, когда тот и так не справляется.
+    """
+    def __init__(
+            self,
+            ratio: float = const.RETRY_BUDGET_RATIO,
+            min_rate: float = const.RETRY_BUDGET_MIN_RATE,
+            max_balance: float = const.RETRY_BUDGET_MAX
+    ):
+        self.ratio = ratio
+        self.min_rate = min_rate
+        self.max_balance = max_balance
+        self._balance = max_balance
+        self._updated_at = time.monotonic()
+        self.spent = self.denied = 0
+
+    def deposit(self) -> None:
+        """
+        Учёт очередного запроса (не повтора).
+        """
+        self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Разрешение на повтор, если запас не исчерпан.
+        """
+        now = time.monotonic()
+        self._balance = min(self.max_balance, self._balance + (now - self._updated_at) * self.min_rate)
+        self._updated_at = now
+        if self._balance < 1:
+            self.denied += 1
+            return False
+        self._balance -= 1
+        self.spent += 1
+        return True
+
+
+class LatencyTracker:
+    """
+    Скользящее окно последних задержек успешных запросов.
+    """
+    def __init__(self, size: int = const.LATENCY_SAMPLES):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Квантиль задержки или ``None``, если задержек пока недостаточно.
+        """
+        if len(self._samples) < const.MIN_LATENCY_SAMPLES:
+            return None
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Задержка перед повтором номер ``attempt`` (начиная с 1): экспоненциальная
+    со случайным разбросом от нуля, чтобы повторы разных запросов не совпадали по времени.
+    """
+    return random.uniform(0, min(const.RETRY_MAX_DELAY, const.RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def hedged(
+        func: Callable[[], Awaitable[Any]],
+        delay: float | None,
+        may_hedge: Callable[[], bool]
+) -> Any:
+    """
+    Результат ``func()``. Если он не получен за ``delay`` секунд и ``may_hedge()`` разрешает,
+    параллельно выполняется второй такой же вызов, и возвращается первый успешный результат.
+    """
+    first = asyncio.ensure_future(func())
+    if delay is None:
+        return await first
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and may_hedge():
+            tasks.add(asyncio.ensure_future(func()))
+        while True:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None or not tasks:
+                    return task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов: пока выполняется вызов с некоторым ключом,
+    все остальные вызовы с тем же ключом дожидаются его результата (или исключения),
+    а не выполняют собственный.
+
+    С ``cancel_abandoned`` вызов отменяется, когда отменены все его ожидающие (например, запрос пользователя
+    заменён более новым): иначе он продолжается до конца, и его результат достаётся только следующим вызовам.
+    """
+    def __init__(self, cancel_abandoned: bool = False):
+        self.cancel_abandoned = cancel_abandoned
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}
+        self.calls = self.shared = self.abandoned = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Результат ``func()``, общий для всех одновременных вызовов с ключом ``key``.
+        Отмена одного из ожидающих не отменяет сам вызов для остальных.
+        """
+        task = self._calls.get(key)
+        if task is not None and (task.cancelled() or task.cancelling()):
+            task = None  # Отменённый вызов ещё не забыт: к нему нельзя присоединяться
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done_task: self._forget(key, done_task))
+        else:
+            self.shared += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if self.cancel_abandoned and not task.done():
+                    self.abandoned += 1
+                    task.cancel()
+                    if self._calls.get(key) is task:  # Следующий вызов начнёт новый, а не дождётся отмены этого
+                        del self._calls[key]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Исключение уже доставлено ожидающим, если они были
@@ -0,0 +1,36 @@
+import httpx
+
+# Заголовки, которые неверны для ответа, собранного из уже распакованного начала тела
+_BODY_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding'})
+
+
+async def read_until(response: httpx.Response, marker: bytes) -> tuple[bytes, bool]:
+    """
+    Чтение тела ответа по частям до первого вхождения ``marker`` включительно.
+    Returns:
+            *начало тела* и ``True``, если ``marker`` найден
+
+            *тело целиком* и ``False`` в противном случае
+    """
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        search_from = max(0, len(buffer) - len(marker) + 1)
+        buffer += chunk
+        if (index := buffer.find(marker, search_from)) != -1:
+            return bytes(buffer[:index + len(marker)]), True
+    return bytes(buffer), False
+
+
+def truncated_response(response: httpx.Response, content: bytes) -> httpx.Response:
+    """
+    Ответ с тем же статусом, заголовками и запросом, но с телом ``content``.
+    """
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=[
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in _BODY_HEADERS
+        ],
+        content=content,
+        request=response.request
+    )
@@ -0,0 +1,65 @@
+"""
+Фоновый обход списков: страницы, пройденные полным обходом, не устаревают между обходами.
+"""
+import asyncio
+
+from src.cache import utils as cache_utils
+from src.parser import QuotePageRecord, QuoteRecord, QuoteTypes
+from src.telegram import utils as tg_utils
+from src.telegram.crawler import Crawler
+
+LISTING = 'https://citaty.info/man/test'
+PAGES = 5
+
+
+def listing_page(page_num: int) -> QuotePageRecord:
+    quote = QuoteRecord(
+        id=str(page_num), type=QuoteTypes.quote, text='Цитата', header=None,
+        taxonomy=[], topics=[], image_links=[], explanation=None, has_original=False
+    )
+    return QuotePageRecord(
+        header='Список', quotes=[quote], pagination=list(range(1, PAGES + 1)), non_quote_search_results={}
+    )
+
+
+def test_incremental_pass_refreshes_pages_of_full_pass(monkeypatch):
+    visited = []
+
+    async def mirror_page(url, page=None, keep_fresh=0):
+        visited.append((page, keep_fresh))
+        return listing_page(int(page or 0)), True
+
+    async def get_quote(url, **_):
+        return True
+
+    monkeypatch.setattr(tg_utils, 'mirror_page', mirror_page)
+    monkeypatch.setattr(tg_utils, 'get_quote', get_quote)
+    crawler = Crawler([LISTING], interval=600, request_interval=0)
+
+    asyncio.run(crawler.crawl())
+    assert [page for page, _ in visited] == [None, '1', '2', '3', '4']
+    assert crawler.progress[LISTING]['depth'] == PAGES
+
+    visited.clear()
+    asyncio.run(crawler.crawl())  # Новых цитат нет, но страницы обновляются до глубины полного обхода
+    assert [page for page, _ in visited] == [None, '1', '2', '3', '4']
+    assert all(keep_fresh >= crawler.interval for _, keep_fresh in visited)
+
+
+def test_mirror_page_skips_pages_fresh_until_next_pass(monkeypatch):
+    fetched = []
+
+    async def fetch_page(url, key, entry, page=None, priority=None, min_ttl=0):
+        fetched.append(min_ttl)
+        return listing_page(0)
+
+    monkeypatch.setattr(tg_utils, '_fetch_page', fetch_page)
+    key = cache_utils.cache_key(LISTING)
+    tg_utils.page_cache.set(key, listing_page(0), 100)
+    try:
+        _, requested = asyncio.run(tg_utils.mirror_page(LISTING, keep_fresh=50))
+        assert not requested and fetched == []
+        _, requested = asyncio.run(tg_utils.mirror_page(LISTING, keep_fresh=200))
+        assert requested and fetched == [400]  # Обновлённая страница хранится с запасом
+    finally:
+        tg_utils.page_cache.pop(key)
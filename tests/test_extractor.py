@@ -0,0 +1,29 @@
+"""
+Однопроходный разбор (``quote_extractor``) должен давать те же снимки цитат и страниц,
+что и разбор через свойства ``Quote`` и ``QuotePage``, на всех сохранённых страницах сайта-донора.
+"""
+from pathlib import Path
+
+import pytest
+
+from src.parser import Quote, QuotePage, QuoteRecord, QuotePageRecord
+from src.parser._entities.quote_extractor import extract_page, extract_quote_from_html
+
+FIXTURES = sorted((Path(__file__).parents[1] / 'benchmarks' / 'fixtures').glob('*.html'))
+
+
+@pytest.mark.parametrize('path', FIXTURES, ids=lambda path: path.stem)
+def test_single_pass_matches_properties(path: Path):
+    html_page = path.read_text('utf-8')
+    if path.name.startswith('page_'):
+        expected = QuotePageRecord.from_page(QuotePage(html_page))
+        actual = extract_page(html_page)
+    else:
+        expected = QuoteRecord.from_quote(Quote(html_page=html_page))
+        actual = extract_quote_from_html(html_page)
+    assert actual.as_dict() == expected.as_dict()
+
+
+def test_fixtures_cover_all_quote_types():
+    names = {path.stem for path in FIXTURES}
+    assert {'po', 'pritcha', 'quote_original', 'quote_series', 'page_search', 'page_category'} <= names
@@ -0,0 +1,134 @@
+"""
+Запросы к сайту-донору через подменённый транспорт: повторы неудачных попыток, запас повторов
+и дублирование медленных запросов.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src import http_client
+from src.upstream import AdaptiveLimiter, LatencyTracker, Priority, RetryBudget
+from src.upstream import const, retry
+
+URL = 'https://citaty.info/quote/1'
+
+
+class Transport:
+    """
+    Транспорт, отвечающий по очереди заданными ответами (код состояния, исключение или пауза и код).
+    """
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = self.cancelled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        delay, status = response if isinstance(response, tuple) else (0, response)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return httpx.Response(status, text=f'{status} #{self.requests}')
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Подмена клиента и общих для запросов ограничителя, запаса повторов и задержек на свежие экземпляры.
+    """
+    def install(transport: Transport, budget: RetryBudget = None, latency: LatencyTracker = None):
+        monkeypatch.setattr(http_client, 'http_client', httpx.AsyncClient(transport=httpx.MockTransport(transport)))
+        monkeypatch.setattr(http_client, 'upstream_limiter', AdaptiveLimiter(rate=1000.0, burst=1000))
+        monkeypatch.setattr(http_client, 'retry_budget', budget or RetryBudget())
+        monkeypatch.setattr(http_client, 'upstream_latency', latency or LatencyTracker())
+        return transport
+
+    monkeypatch.setattr(retry, 'backoff_delay', lambda attempt: 0)
+    return install
+
+
+def test_retryable_status_is_retried(upstream):
+    transport = upstream(Transport(503, 200))
+    response = asyncio.run(http_client.get(URL))
+    assert response.status_code == 200 and transport.requests == 2
+
+
+def test_connection_error_is_retried(upstream):
+    transport = upstream(Transport(httpx.ConnectError('отказ'), 200))
+    assert asyncio.run(http_client.get(URL)).status_code == 200
+    assert transport.requests == 2
+
+
+def test_retries_are_limited(upstream):
+    transport = upstream(Transport(503))
+    assert asyncio.run(http_client.get(URL)).status_code == 503
+    assert transport.requests == 1 + const.MAX_RETRIES
+
+
+def test_non_retryable_status_is_returned(upstream):
+    transport = upstream(Transport(404))
+    assert asyncio.run(http_client.get(URL)).status_code == 404
+    assert transport.requests == 1
+
+
+def test_exhausted_budget_stops_retries(upstream):
+    budget = RetryBudget(ratio=0, min_rate=0, max_balance=1)
+    transport = upstream(Transport(503), budget)
+
+    async def run():
+        first = await http_client.get(URL)  # Единственный повтор из запаса
+        second = await http_client.get(URL)  # Запас исчерпан: повторов нет
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status_code == second.status_code == 503
+    assert transport.requests == 3
+    assert budget.spent == 1 and budget.denied == 2
+
+
+def test_exhausted_budget_reraises_connection_error(upstream):
+    upstream(Transport(httpx.ConnectError('отказ')), RetryBudget(ratio=0, min_rate=0, max_balance=0))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(http_client.get(URL))
+
+
+def test_slow_request_is_hedged(upstream):
+    latency = LatencyTracker()
+    for _ in range(const.MIN_LATENCY_SAMPLES):
+        latency.add(0.01)
+    transport = upstream(Transport((5, 200), (0, 200)), latency=latency)
+
+    async def run():
+        response = await asyncio.wait_for(http_client.get(URL), 2)
+        await asyncio.sleep(0)  # Отмена проигравшего запроса доходит до транспорта
+        return response
+
+    response = asyncio.run(run())
+    assert response.text == '200 #2'  # Ответ на дублирующий запрос
+    assert transport.requests == 2 and transport.cancelled == 1
+    assert http_client.upstream_limiter.in_flight == 0
+
+
+def test_background_requests_are_not_hedged(upstream):
+    latency = LatencyTracker()
+    for _ in range(const.MIN_LATENCY_SAMPLES):
+        latency.add(0.001)
+    transport = upstream(Transport((0.05, 200), (0, 200)), latency=latency)
+    response = asyncio.run(http_client.get(URL, priority=Priority.background))
+    assert response.text == '200 #1' and transport.requests == 1
+
+
+def test_hedging_respects_budget():
+    budget = RetryBudget(ratio=0, min_rate=0, max_balance=0)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 'первый'
+
+    assert asyncio.run(retry.hedged(slow, 0.001, budget.withdraw)) == 'первый'
+    assert budget.denied == 1
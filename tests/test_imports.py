@@ -0,0 +1,24 @@
+"""
+Процессу-диспетчеру не нужны разбор страниц, кеши и клиент сайта-донора: они загружаются только обработчиками.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+WORKER_ONLY_MODULES = ('selectolax', 'src.parser._entities', 'src.parser.executor', 'src.cache', 'src.http_client')
+
+
+def test_dispatcher_does_not_import_parser():
+    code = 'import sys, src.telegram.main; print(*sys.modules, sep="\\n")'
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=Path(__file__).parents[1], capture_output=True, text=True, check=True
+    ).stdout
+    loaded = [module for module in output.split() if module.startswith(WORKER_ONLY_MODULES)]
+    assert loaded == []
+
+
+def test_parser_exports_are_loaded_on_access():
+    from src import parser
+
+    assert parser.QuoteRecord.__module__ == 'src.parser._entities.records'
+    assert set(parser.__all__) <= set(dir(parser))
@@ -0,0 +1,90 @@
+"""
+Инлайн-запросы: повторное использование прошлого ответа и поиск в локальном индексе только после паузы.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.parser import QuotePageRecord, QuoteRecord, QuoteTypes
+from src.parser import const as parser_const
+from src.telegram import handlers
+from src.telegram import utils as tg_utils
+from src.telegram.inline import InlineSupervisor
+
+USER_ID = 1
+
+
+@pytest.fixture(autouse=True)
+def supervisor(monkeypatch):
+    supervisor = InlineSupervisor(debounce=0.01)
+    monkeypatch.setattr(handlers, 'inline_supervisor', supervisor)
+    return supervisor
+
+
+def search_page(count: int = 10) -> QuotePageRecord:
+    quotes = [
+        QuoteRecord(
+            id=str(quote_id), type=QuoteTypes.quote, text=f'Кот номер {quote_id}', header=None,
+            taxonomy=[], topics=[], image_links=[], explanation=None, has_original=False
+        )
+        for quote_id in range(count)
+    ]
+    return QuotePageRecord(header='Поиск', quotes=quotes, pagination=[1, 2], non_quote_search_results={})
+
+
+class FakeInlineQuery:
+    def __init__(self, text: str, offset: str = ''):
+        self.query = text
+        self.offset = offset
+        self.from_user = SimpleNamespace(id=USER_ID)
+        self.answers = []
+
+    async def answer(self, results: list, next_offset: str = None, **_):
+        self.answers.append((results, next_offset))
+
+
+def test_reuse_only_for_continued_query(supervisor):
+    supervisor.remember(USER_ID, 'кот', search_page())
+    assert len(supervisor.reuse(USER_ID, 'кот номе').quotes) == 10
+    supervisor.remember(USER_ID, 'кот номер', search_page())
+    assert supervisor.reuse(USER_ID, 'кот') is None
+
+
+def test_local_search_runs_after_debounce(monkeypatch):
+    searched = []
+
+    def search_local(url, page=None):
+        searched.append(url)
+        return search_page()
+
+    async def get_page(url, page=None, **_):
+        return search_local(url, page)
+
+    monkeypatch.setattr(tg_utils, 'search_local', search_local)
+    monkeypatch.setattr(tg_utils, 'get_page', get_page)
+
+    async def type_query():
+        queries = [FakeInlineQuery(text) for text in ('ко', 'кош', 'кошк')]
+        tasks = [asyncio.create_task(handlers.multiple_quotes_inline(None, query)) for query in queries]
+        await asyncio.gather(*tasks)
+        return queries
+
+    queries = asyncio.run(type_query())
+    assert searched == [parser_const.SEARCH_URL % 'кошк']
+    assert [len(query.answers) for query in queries] == [0, 0, 1]
+
+
+def test_reused_answer_continues_with_first_page(monkeypatch, supervisor):
+    async def get_page(url, page=None, **_):
+        return search_page()
+
+    monkeypatch.setattr(tg_utils, 'get_page', get_page)
+    supervisor.remember(USER_ID, 'кот', search_page())
+    reused_query = FakeInlineQuery('кот номер')
+    asyncio.run(handlers.multiple_quotes_inline(None, reused_query))
+    assert reused_query.answers[0][1] == '0'
+    next_query = FakeInlineQuery('кот номер', offset='0')
+    asyncio.run(handlers.multiple_quotes_inline(None, next_query))
+    assert next_query.answers[0][1] == '1'
+
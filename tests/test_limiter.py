@@ -0,0 +1,222 @@
+"""
+Ограничитель нагрузки на сайт-донор: окно AIMD и его границы, порядок выдачи мест по приоритету,
+освобождение места при отмене запроса и ограничение частоты ``TokenBucket``.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.upstream import AdaptiveLimiter, Priority, RequestPriority, TokenBucket
+from src.upstream import const
+
+
+@pytest.fixture(autouse=True)
+def steady_latency(monkeypatch):
+    # Задержки пустых запросов в тестах случайны: рост задержки не должен считаться перегрузкой
+    monkeypatch.setattr(const, 'LATENCY_TOLERANCE', float('inf'))
+
+
+def limiter(window: float = 4.0, min_window: float = 1.0, max_window: float = 16.0) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        rate=1000.0, burst=1000, initial_window=window, min_window=min_window, max_window=max_window
+    )
+
+
+async def request(upstream: AdaptiveLimiter, failed: bool = False, priority=Priority.interactive) -> None:
+    async with upstream.slot(priority) as slot:
+        slot.failed = failed
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_window_grows_by_one_per_window_of_successes():
+    async def run():
+        upstream = limiter(window=4.0)
+        for _ in range(4):
+            await request(upstream)
+        return upstream
+
+    upstream = asyncio.run(run())
+    assert 4.9 < upstream.window < 5.0
+    assert upstream.successes == 4 and upstream.in_flight == 0
+
+
+def test_window_is_bounded_above():
+    async def run():
+        upstream = limiter(window=15.0, max_window=16.0)
+        for _ in range(100):
+            await request(upstream)
+        return upstream
+
+    assert asyncio.run(run()).window == 16.0
+
+
+@pytest.mark.parametrize('status_failure', [True, False], ids=['overload_status', 'exception'])
+def test_window_shrinks_on_overload(status_failure):
+    async def run():
+        upstream = limiter(window=8.0)
+        if status_failure:  # Так http_client отмечает ответы 429 и 5xx
+            await request(upstream, failed=True)
+        else:
+            with pytest.raises(ConnectionError):
+                async with upstream.slot():
+                    raise ConnectionError
+        return upstream
+
+    upstream = asyncio.run(run())
+    assert upstream.window == 8.0 * const.WINDOW_DECREASE_FACTOR
+    assert upstream.failures == 1 and upstream.in_flight == 0
+
+
+def test_window_is_bounded_below():
+    async def run():
+        upstream = limiter(window=8.0, min_window=2.0)
+        for _ in range(10):
+            await request(upstream, failed=True)
+            await asyncio.sleep(0.001)  # Сужения не чаще одного за время обычного запроса
+        return upstream
+
+    assert asyncio.run(run()).window == 2.0
+
+
+def test_interactive_requests_go_first():
+    async def run():
+        upstream = limiter(window=1.0)
+        order = []
+        release = asyncio.Event()
+
+        async def holder():
+            async with upstream.slot():
+                await release.wait()
+
+        async def waiter(name: str, priority):
+            async with upstream.slot(priority):
+                order.append(name)
+
+        held = asyncio.create_task(holder())
+        await settle()
+        waiters = [
+            asyncio.create_task(waiter('prefetch', Priority.background)),
+            asyncio.create_task(waiter('raised', RequestPriority(Priority.background))),
+            asyncio.create_task(waiter('interactive', Priority.interactive))
+        ]
+        await settle()
+        assert upstream.stats['waiting'] == 3
+        release.set()
+        await asyncio.gather(held, *waiters)
+        return order
+
+    assert asyncio.run(run()) == ['interactive', 'prefetch', 'raised']
+
+
+def test_raised_priority_overtakes_queue():
+    async def run():
+        upstream = limiter(window=1.0)
+        order = []
+        release = asyncio.Event()
+        raised = RequestPriority(Priority.background)
+
+        async def holder():
+            async with upstream.slot():
+                await release.wait()
+
+        async def waiter(name: str, priority):
+            async with upstream.slot(priority):
+                order.append(name)
+
+        held = asyncio.create_task(holder())
+        await settle()
+        waiters = [
+            asyncio.create_task(waiter('prefetch', Priority.background)),
+            asyncio.create_task(waiter('raised', raised))
+        ]
+        await settle()
+        raised.raise_to(Priority.interactive)  # Результата фоновой загрузки начал ждать пользователь
+        release.set()
+        await asyncio.gather(held, *waiters)
+        return order
+
+    assert asyncio.run(run()) == ['raised', 'prefetch']
+
+
+def test_slot_is_released_when_holder_is_cancelled():
+    async def run():
+        upstream = limiter(window=1.0)
+        entered = asyncio.Event()
+
+        async def holder():
+            async with upstream.slot():
+                entered.set()
+                await asyncio.sleep(10)
+
+        held = asyncio.create_task(holder())
+        await entered.wait()
+        queued = asyncio.create_task(request(upstream))
+        await settle()
+        assert upstream.stats['waiting'] == 1
+        held.cancel()
+        await asyncio.wait_for(queued, 1)  # Освободившееся место досталось ожидающему
+        return upstream
+
+    upstream = asyncio.run(run())
+    assert upstream.in_flight == 0
+    assert upstream.failures == 0 and upstream.successes == 1  # Отменённый запрос не учитывается
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def run():
+        upstream = limiter(window=1.0)
+        release = asyncio.Event()
+
+        async def holder():
+            async with upstream.slot():
+                await release.wait()
+
+        held = asyncio.create_task(holder())
+        await settle()
+        queued = asyncio.create_task(request(upstream))
+        await settle()
+        queued.cancel()
+        await settle()
+        assert upstream.stats['waiting'] == 0 and upstream.in_flight == 1
+        release.set()
+        await held
+        await request(upstream)
+        return upstream
+
+    upstream = asyncio.run(run())
+    assert upstream.in_flight == 0 and upstream.successes == 2
+
+
+def test_slot_is_released_when_cancelled_waiting_for_token():
+    async def run():
+        upstream = AdaptiveLimiter(rate=1.0, burst=1, initial_window=4.0)
+        await request(upstream)  # Единственный токен израсходован
+        queued = asyncio.create_task(request(upstream))
+        await settle()
+        assert upstream.in_flight == 1  # Место выдано, токен ещё не получен
+        queued.cancel()
+        await settle()
+        return upstream
+
+    assert asyncio.run(run()).in_flight == 0
+
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    async def run():
+        bucket = TokenBucket(rate=50.0, burst=3)
+        started_at = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        burst_time = time.monotonic() - started_at
+        for _ in range(2):
+            await bucket.acquire()
+        return burst_time, time.monotonic() - started_at
+
+    burst_time, total_time = asyncio.run(run())
+    assert burst_time < 0.01
+    assert total_time >= 2 / 50.0 * 0.9
@@ -0,0 +1,69 @@
+"""
+Журнал: исключения обработчиков записываются один раз, фоновый писатель останавливается повторно без ошибок.
+"""
+import asyncio
+import logging
+import queue
+
+import pytest
+
+from src.logs import LoggedExceptionFilter, StoppableQueueListener
+from src.telegram.instrumentation import instrumented
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.addFilter(LoggedExceptionFilter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    handler = ListHandler()
+    root = logging.getLogger()
+    root.addHandler(handler)
+    yield handler.records
+    root.removeHandler(handler)
+
+
+def test_handler_error_is_reraised_and_logged_once(records):
+    @instrumented
+    async def failing(_, __):
+        raise ValueError('сбой')
+
+    async def dispatch():
+        # Так же, как диспетчер pyrogram: исключение обработчика записывается ещё раз
+        try:
+            await failing(None, None)
+        except Exception as e:
+            logging.getLogger('pyrogram.dispatcher').exception(e)
+            raise
+
+    with pytest.raises(ValueError, match='сбой'):
+        asyncio.run(dispatch())
+    errors = [record for record in records if record.exc_info]
+    assert [record.name for record in errors] == ['src.telegram.instrumentation']
+
+
+def test_unrelated_errors_are_logged(records):
+    try:
+        raise KeyError('ключ')
+    except KeyError:
+        logging.getLogger('pyrogram.dispatcher').exception('ошибка')
+    assert len(records) == 1
+
+
+def test_listener_stops_once():
+    written = ListHandler()
+    log_queue = queue.Queue()
+    listener = StoppableQueueListener(log_queue, written)
+    listener.stop()  # Ещё не запущен
+    listener.start()
+    log_queue.put(logging.makeLogRecord({'msg': 'запись'}))
+    listener.stop()
+    listener.stop()
+    assert [record.msg for record in written.records] == ['запись']
@@ -0,0 +1,55 @@
+"""
+Отправка изображений цитат: сохранённые file_id сбрасываются, только если Telegram отверг именно их.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pyrogram.errors import BadRequest, FileReferenceExpired, MediaInvalid, WebpageCurlFailed
+from pyrogram.types import InputMediaPhoto
+
+from src.telegram import utils as tg_utils
+
+CACHED_URL = 'https://citaty.info/files/cached.jpg'
+NEW_URL = 'https://citaty.info/files/new.jpg'
+
+
+@pytest.fixture(autouse=True)
+def photo_cache(monkeypatch):
+    monkeypatch.setattr(tg_utils, 'quote_store', None)
+    tg_utils.photo_cache.clear()
+    tg_utils.photo_cache.set(CACHED_URL, 'cached-file-id', 60)
+    yield tg_utils.photo_cache
+    tg_utils.photo_cache.clear()
+
+
+def sender(error: BadRequest):
+    calls = []
+
+    async def send(media: list[InputMediaPhoto], **_):
+        calls.append([item.media for item in media])
+        if len(calls) == 1:
+            raise error
+        return [SimpleNamespace(photo=SimpleNamespace(file_id=f'id-{url}')) for url in calls[-1]]
+
+    return send, calls
+
+
+@pytest.mark.parametrize('error', [
+    MediaInvalid(), FileReferenceExpired(), BadRequest('[400 FILE_REFERENCE_0_EXPIRED]')
+], ids=['media_invalid', 'file_reference', 'file_reference_indexed'])
+def test_rejected_file_ids_are_dropped(photo_cache, error):
+    send, calls = sender(error)
+    media = [InputMediaPhoto(CACHED_URL), InputMediaPhoto(NEW_URL)]
+    asyncio.run(tg_utils.send_media_group(send, media))
+    assert calls == [['cached-file-id', NEW_URL], [CACHED_URL, NEW_URL]]
+    assert photo_cache.get(CACHED_URL) == f'id-{CACHED_URL}'
+
+
+def test_url_error_keeps_file_ids(photo_cache):
+    send, calls = sender(WebpageCurlFailed())
+    media = [InputMediaPhoto(CACHED_URL), InputMediaPhoto(NEW_URL)]
+    with pytest.raises(WebpageCurlFailed):
+        asyncio.run(tg_utils.send_media_group(send, media))
+    assert calls == [['cached-file-id', NEW_URL]]
+    assert photo_cache.get(CACHED_URL) == 'cached-file-id'
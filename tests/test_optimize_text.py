@@ -0,0 +1,82 @@
+"""
+Однопроходное сокращение текста (``optimize_text`` и ``optimize_texts``) должно совпадать с прежней
+реализацией с циклами замен на текстах страниц-образцов и на случайных строках из «трудных» последовательностей.
+"""
+import random
+from pathlib import Path
+
+import pytest
+from selectolax.lexbor import LexborHTMLParser
+
+from src.parser import utils
+
+FIXTURES_DIR = Path(__file__).parents[1] / 'benchmarks' / 'fixtures'
+FUZZ_ITERATIONS = 100_000
+FUZZ_ALPHABET = (' ', '\n', '.', '–', '*', '@', 'а', '\t', '…', ' – ', '...', '\x00')
+BATCH_SIZE = 7
+
+
+def reference_optimize_text(text: str) -> str:
+    """
+    Прежняя реализация с циклами замен — эталон поведения.
+    """
+    cyclic_replacement_sequences = {'  ': ' ', '\n\n\n': '\n\n'}
+    ordinary_replacement_sequences = {'...': '…', ' – ': ' — ', '**': '@@', '@*': '@@', '\n ': '\n'}
+    text = text.strip()
+    for old_seq, new_seq in cyclic_replacement_sequences.items():
+        while old_seq in text:
+            text = text.replace(old_seq, new_seq)
+    for old_seq, new_seq in ordinary_replacement_sequences.items():
+        text = text.replace(old_seq, new_seq)
+    return text
+
+
+def fixture_fragments() -> list[str]:
+    """
+    Тексты всех элементов страниц-образцов — то, что парсер передаёт в ``optimize_text``.
+    """
+    fragments = []
+    for path in sorted(FIXTURES_DIR.glob('*.html')):
+        tree = LexborHTMLParser(path.read_text('utf-8'))
+        fragments.extend(node.text() for node in tree.body.traverse() if node.tag in ('a', 'p', 'div', 'h1', 'h2'))
+    return fragments
+
+
+def fuzz_fragments(count: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    return [''.join(rnd.choice(FUZZ_ALPHABET) for _ in range(rnd.randint(0, 16))) for _ in range(count)]
+
+
+@pytest.fixture(scope='module')
+def fuzz() -> list[str]:
+    return fuzz_fragments(FUZZ_ITERATIONS)
+
+
+@pytest.mark.parametrize('text', [
+    '', '   ', 'а  \n\n\n\n а', '....', ' – – ', '***@*', '\n \n  \n', 'а\t…\x00...'
+])
+def test_known_sequences(text):
+    assert utils.optimize_text(text) == reference_optimize_text(text)
+
+
+def test_fixture_texts_match_reference():
+    fragments = fixture_fragments()
+    assert fragments
+    assert [utils.optimize_text(text) for text in fragments] == [reference_optimize_text(text) for text in fragments]
+    assert utils.optimize_texts(fragments) == [reference_optimize_text(text) for text in fragments]
+
+
+def test_fuzz_matches_reference(fuzz):
+    for text in fuzz:
+        assert utils.optimize_text(text) == reference_optimize_text(text), text
+
+
+def test_fuzz_batches_match_reference(fuzz):
+    for start in range(0, len(fuzz), BATCH_SIZE):
+        batch = fuzz[start:start + BATCH_SIZE]
+        assert utils.optimize_texts(batch) == [reference_optimize_text(text) for text in batch], batch
+
+
+def test_batch_accepts_iterator():
+    texts = ['а  б', '...', '']
+    assert utils.optimize_texts(iter(texts)) == [reference_optimize_text(text) for text in texts]
@@ -0,0 +1,84 @@
+"""
+Кеш готовых представлений: попадания для заново полученных записей с тем же содержимым,
+пересборка при изменении содержимого, отсутствие кеширования без адреса и хранения самих записей.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.parser import QuotePageRecord, QuoteRecord
+from src.parser.executor import parse_page, parse_quote
+from src.telegram.formatters.quote import TgQuoteFormatter
+from src.telegram.formatters.quote_page import TgPageFormatter
+from src.telegram.formatters.render_cache import RenderCache, render_cache
+
+FIXTURES_DIR = Path(__file__).parents[1] / 'benchmarks' / 'fixtures'
+PAGE = (FIXTURES_DIR / 'page_search.html').read_text('utf-8')
+QUOTE = (FIXTURES_DIR / 'quote_picture.html').read_text('utf-8')
+KEY = ('https://citaty.info/search/site/кот', None)
+
+
+@pytest.fixture(autouse=True)
+def clear_render_cache():
+    render_cache.clear()
+    yield
+    render_cache.clear()
+
+
+def test_version_is_stable_across_records():
+    page = parse_page(PAGE)
+    assert parse_page(PAGE).version == page.version
+    assert QuotePageRecord.from_dict(page.as_dict()).version == page.version
+    quote = parse_quote(QUOTE)
+    assert QuoteRecord.from_dict(quote.as_dict()).version == quote.version
+
+
+def test_version_changes_with_content():
+    quote = parse_quote(QUOTE)
+    changed = QuoteRecord.from_dict({**quote.as_dict(), 'text': quote.text + '!'})
+    assert changed.version != quote.version
+
+
+def test_page_rendered_once_for_equal_content():
+    text = TgPageFormatter(parse_page(PAGE), KEY).text
+    misses = render_cache.misses
+    assert TgPageFormatter(parse_page(PAGE), KEY).text == text
+    assert render_cache.misses == misses
+
+
+def test_changed_content_is_rendered_again():
+    page = parse_page(PAGE)
+    TgPageFormatter(page, KEY).text
+    data = page.as_dict()
+    data['header'] = 'Другой заголовок'
+    changed = QuotePageRecord.from_dict(data)
+    assert TgPageFormatter(changed, KEY).text == TgPageFormatter(changed).text
+    assert 'Другой заголовок' in TgPageFormatter(changed, KEY).text
+
+
+def test_page_without_key_is_not_cached():
+    page = parse_page(PAGE)
+    TgPageFormatter(page).text
+    misses = render_cache.misses
+    TgPageFormatter(page).text
+    assert render_cache.misses == misses + 1
+    assert len(render_cache) == 0
+
+
+def test_quote_is_keyed_by_link():
+    quote = parse_quote(QUOTE)
+    TgQuoteFormatter(quote).text
+    hits = render_cache.hits
+    TgQuoteFormatter(parse_quote(QUOTE)).text
+    assert render_cache.hits == hits + 1
+    assert len(render_cache) == 1
+
+
+def test_records_are_not_retained():
+    cache = RenderCache()
+    page = parse_page(PAGE)
+    references = sys.getrefcount(page)
+    cache.render(KEY, page.version, 'text', lambda: page.header)
+    assert sys.getrefcount(page) == references
+    assert cache.render(KEY, parse_page(PAGE).version, 'text', lambda: 'другой') == page.header
@@ -0,0 +1,166 @@
+"""
+Локальный поисковый индекс: нормализация слов, ранжирование, вытеснение и пересборка списков вхождений.
+"""
+import pytest
+
+from src.parser import QuoteRecord, QuoteTypes
+from src.search import QuoteIndex, stem, tokenize
+
+
+def make_quote(quote_id: int, text: str, header: str = None) -> QuoteRecord:
+    return QuoteRecord(
+        id=str(quote_id), type=QuoteTypes.quote, text=text, header=header,
+        taxonomy=[], topics=[], image_links=[], explanation=None, has_original=False
+    )
+
+
+def ids(quotes: list[QuoteRecord]) -> list[str]:
+    return [quote.id for quote in quotes]
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('котами', 'кот'), ('коты', 'кот'), ('кот', 'кот'), ('улыбается', 'улыба'), ('quotes', 'quot'), ('мир', 'мир')
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+
+def test_tokenize_normalizes_and_drops_stop_words():
+    assert tokenize('Ёлки, и ЕЛКИ в лесу!') == ['елк', 'елк', 'лес']
+    assert tokenize('The cats') == ['cat']
+    assert tokenize('и в на') == []
+
+
+def test_search_requires_all_terms_and_ranks_by_relevance():
+    index = QuoteIndex()
+    index.add(make_quote(1, 'Любовь и дружба'))
+    index.add(make_quote(2, 'Любовь, любовь, любовь'))
+    index.add(make_quote(3, 'Дружба'))
+    assert ids(index.search('любовь')) == ['2', '1']
+    assert ids(index.search('любовь дружба')) == ['1']
+    assert index.search('ненависть') == []
+
+
+def test_header_weighs_more_than_text():
+    index = QuoteIndex()
+    index.add(make_quote(1, 'Свобода выбора'))
+    index.add(make_quote(2, 'Выбор', header='Свобода'))
+    assert ids(index.search('свобода')) == ['2', '1']
+
+
+def test_prefix_search_for_last_word():
+    index = QuoteIndex()
+    index.add(make_quote(1, 'Свобода'))
+    index.add(make_quote(2, 'Свет'))
+    assert ids(index.search('сво')) == ['1']
+    assert index.search('сво', prefix=False) == []
+
+
+def test_limit_keeps_ranking():
+    index = QuoteIndex()
+    for num in range(1, 21):
+        index.add(make_quote(num, 'слово ' * num))
+    full = index.search('слово')
+    assert ids(index.search('слово', limit=5)) == ids(full[:5])
+
+
+def test_replace_and_keep_existing_version():
+    index = QuoteIndex()
+    index.add(make_quote(1, 'Старый текст'))
+    index.add(make_quote(1, 'Новый текст'), replace=False)
+    assert ids(index.search('старый')) == ['1']
+    index.add(make_quote(1, 'Новый текст'))
+    assert index.search('старый') == []
+    assert ids(index.search('новый')) == ['1']
+    assert len(index) == 1
+
+
+def test_original_text_is_searchable():
+    index = QuoteIndex()
+    index.add(make_quote(1, 'Быть или не быть'))
+    index.add_original('1', 'To be or not to be, that is the question')
+    assert ids(index.search('question')) == ['1']
+
+
+def test_eviction_of_oldest_quotes():
+    index = QuoteIndex(max_quotes=3)
+    for num in range(1, 6):
+        index.add(make_quote(num, f'цитата номер{num}'))
+    assert len(index) == 3
+    assert ids(index.quotes()) == ['3', '4', '5']
+    assert index.search('номер1') == []
+    assert ids(index.search('номер5')) == ['5']
+
+
+def test_compaction_renumbers_documents():
+    index = QuoteIndex(max_quotes=100)
+    for num in range(10):
+        index.add(make_quote(num, f'общее старое {num}'))
+    for num in range(9):  # Каждая замена помечает старую версию удалённой
+        index.add(make_quote(num, f'общее новое {num}'))
+    assert len(index._docs) == 19
+    index.add(make_quote(9, 'общее новое 9'))  # Удалённых стало не меньше половины
+    assert len(index._docs) == len(index) == 10
+    assert index.search('старое') == []
+    assert ids(index.search('новое 3')) == ['3']
+    assert sorted(ids(index.search('общее')), key=int) == [str(num) for num in range(10)]
+
+
+def test_idf_ignores_deleted_documents():
+    index, fresh = QuoteIndex(), QuoteIndex()
+    for num in range(4):
+        index.add(make_quote(num, 'редкое слово'))
+    fresh.add(make_quote(0, 'редкое слово'))
+    for num in range(1, 4):
+        index.add(make_quote(num, 'частое слово'))  # Старые версии ещё не вычищены
+        fresh.add(make_quote(num, 'частое слово'))
+    assert len(index._docs) > len(index)
+    assert sorted(index._scores('редкое', False).values()) == sorted(fresh._scores('редкое', False).values())
+
+
+def test_page_and_cached_page_turns():
+    index = QuoteIndex()
+    for num in range(25):
+        index.add(make_quote(num, 'мудрость ' * (num + 1)))
+    first = index.page('мудрость', min_hits=10, page_size=10)
+    assert ids(first.quotes) == [str(num) for num in range(24, 14, -1)]
+    assert first.pagination == [2, 3]
+    third = index.page('мудрость', '2', min_hits=10, page_size=10)
+    assert ids(third.quotes) == [str(num) for num in range(4, -1, -1)]
+    assert index.page('мудрость', '3', min_hits=10, page_size=10) is None
+    assert index.page('мудрость', min_hits=30) is None
+
+
+def test_merge_keeps_originals_added_during_load():
+    loaded = QuoteIndex()
+    loaded.add(make_quote(1, 'Загружено с диска'))
+    loaded.add_original('1', 'Loaded from disk')
+    current = QuoteIndex()
+    current.add(make_quote(2, 'Разобрано при запуске'))
+    current.add_original('2', 'Parsed at startup')
+    loaded.merge(current)
+    assert ids(loaded.search('loaded')) == ['1']
+    assert ids(loaded.search('parsed')) == ['2']
+    assert len(loaded) == 2
+
+
+def test_originals_are_kept_only_for_indexed_quotes():
+    index = QuoteIndex(max_quotes=2)
+    index.add_original('1', 'Not indexed yet')
+    assert not index._originals and not index.search('indexed')
+    for num in range(1, 4):
+        index.add(make_quote(num, f'цитата номер{num}'))
+        index.add_original(str(num), f'original number{num}')
+    assert sorted(index._originals) == ['2', '3']  # Оригинал вытесненной цитаты удалён вместе с ней
+    assert ids(index.search('original')) == ['3', '2']
+
+
+def test_prefix_search_sees_terms_added_after_search():
+    index = QuoteIndex()
+    for num in range(200):
+        index.add(make_quote(num, f'слово{num:03} общее'))
+    assert len(index.search('слово01')) == 10
+    index.add(make_quote(200, 'словарь общее'))  # Немногие новые слова встраиваются в отсортированный словарь
+    index.add(make_quote(201, 'абзац общее'))
+    assert ids(index.search('словар')) == ['200'] and ids(index.search('абз')) == ['201']
+    assert index._vocabulary == sorted(index._vocabulary)
@@ -0,0 +1,126 @@
+"""
+Объединение одновременных одинаковых вызовов: общий результат, отмена ожидающих
+и отмена вызова, который больше никто не ждёт.
+"""
+import asyncio
+
+import pytest
+
+from src.upstream import SingleFlight
+
+
+class Call:
+    """
+    Вызов, который завершается только по команде теста и запоминает, сколько раз он был начат и отменён.
+    """
+    def __init__(self, result: str = 'страница'):
+        self.result = result
+        self.started = self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.result
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flights, call = SingleFlight(), Call()
+        waiters = [asyncio.create_task(flights.do('key', call)) for _ in range(3)]
+        await settle()
+        call.release.set()
+        assert await asyncio.gather(*waiters) == ['страница'] * 3
+        assert (call.started, flights.calls, flights.shared) == (1, 1, 2)
+        assert 'key' not in flights
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('cancel_abandoned', [False, True])
+def test_cancelled_waiter_does_not_cancel_others(cancel_abandoned):
+    async def run():
+        flights, call = SingleFlight(cancel_abandoned), Call()
+        first = asyncio.create_task(flights.do('key', call))
+        second = asyncio.create_task(flights.do('key', call))
+        await settle()
+        first.cancel()
+        await settle()
+        call.release.set()
+        assert await second == 'страница'
+        assert first.cancelled() and call.cancelled == 0 and flights.abandoned == 0
+
+    asyncio.run(run())
+
+
+def test_last_waiter_leaving_cancels_call():
+    async def run():
+        flights, call = SingleFlight(cancel_abandoned=True), Call()
+        first = asyncio.create_task(flights.do('key', call))
+        second = asyncio.create_task(flights.do('key', call))
+        await settle()
+        first.cancel()
+        second.cancel()
+        await settle()
+        assert call.cancelled == 1 and flights.abandoned == 1
+        assert 'key' not in flights and len(flights) == 0
+
+    asyncio.run(run())
+
+
+def test_call_survives_abandonment_by_default():
+    async def run():
+        flights, call = SingleFlight(), Call()
+        waiter = asyncio.create_task(flights.do('key', call))
+        await settle()
+        waiter.cancel()
+        await settle()
+        later = asyncio.create_task(flights.do('key', call))
+        await settle()
+        call.release.set()
+        assert await later == 'страница'
+        assert (call.started, call.cancelled, flights.calls) == (1, 0, 1)
+
+    asyncio.run(run())
+
+
+def test_late_caller_does_not_join_abandoned_call():
+    async def run():
+        flights = SingleFlight(cancel_abandoned=True)
+        abandoned, fresh = Call(), Call('новая страница')
+        waiter = asyncio.create_task(flights.do('key', abandoned))
+        await settle()
+        waiter.cancel()
+        await asyncio.sleep(0)  # Ожидающий уже отменён, а вызов — ещё нет: его отмена только запрошена
+        assert not abandoned.cancelled
+        late = asyncio.create_task(flights.do('key', fresh))
+        await settle()
+        fresh.release.set()
+        assert await late == 'новая страница'
+        assert abandoned.cancelled == 1 and fresh.started == 1 and flights.calls == 2
+
+    asyncio.run(run())
+
+
+def test_late_caller_does_not_join_cancelling_call():
+    async def run():
+        flights = SingleFlight()
+        cancelling, fresh = Call(), Call('новая страница')
+        waiter = asyncio.create_task(flights.do('key', cancelling))
+        await settle()
+        flights._calls['key'].cancel()  # Вызов отменён извне, но ещё не забыт
+        fresh.release.set()
+        assert await flights.do('key', fresh) == 'новая страница'
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(run())
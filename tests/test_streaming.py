@@ -0,0 +1,71 @@
+"""
+Потоковое чтение страницы цитаты до ``QUOTE_END_MARKER``: маркер на границе частей,
+поток без маркера и ответ, собранный из прочитанного начала тела.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.parser.const import QUOTE_END_MARKER
+from src.upstream import streaming
+
+URL = 'https://citaty.info/quote/1'
+HEAD = b'<html><body><article><p>\xd0\xa6\xd0\xb8\xd1\x82\xd0\xb0\xd1\x82\xd0\xb0</p>'
+TAIL = b'<aside>comments</aside></body></html>'
+
+
+def read(chunks: list[bytes]) -> tuple[bytes, bool, list[bytes]]:
+    """
+    Результат ``read_until`` для ответа, тело которого передаётся частями ``chunks``,
+    и части, которые были отданы транспортом.
+    """
+    sent = []
+
+    async def body():
+        for chunk in chunks:
+            sent.append(chunk)
+            yield chunk
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream('GET', URL) as response:
+                return await streaming.read_until(response, QUOTE_END_MARKER)
+
+    content, found = asyncio.run(run())
+    return content, found, sent
+
+
+@pytest.mark.parametrize('split', range(1, len(QUOTE_END_MARKER)))
+def test_marker_split_across_chunks(split):
+    page = HEAD + QUOTE_END_MARKER
+    chunks = [page[:len(HEAD) + split], page[len(HEAD) + split:], TAIL, b'<never-read/>']
+    content, found, sent = read(chunks)
+    assert found and content == HEAD + QUOTE_END_MARKER
+    assert len(sent) == 2  # Части после маркера не читаются
+
+
+def test_marker_split_byte_by_byte():
+    page = HEAD + QUOTE_END_MARKER + TAIL
+    content, found, _ = read([page[index:index + 1] for index in range(len(page))])
+    assert found and content == HEAD + QUOTE_END_MARKER
+
+
+def test_stream_without_marker_is_read_whole():
+    chunks = [HEAD, b'</artic', b'le', TAIL]
+    content, found, sent = read(chunks)
+    assert not found and content == b''.join(chunks)
+    assert sent == chunks
+
+
+def test_truncated_response_drops_body_headers():
+    response = httpx.Response(
+        200,
+        headers={'Content-Encoding': 'gzip', 'Content-Length': '1000', 'ETag': '"1"'},
+        request=httpx.Request('GET', URL)
+    )
+    truncated = streaming.truncated_response(response, HEAD + QUOTE_END_MARKER)
+    assert truncated.content == HEAD + QUOTE_END_MARKER
+    assert truncated.headers['etag'] == '"1"' and 'content-encoding' not in truncated.headers
+    assert truncated.headers['content-length'] == str(len(HEAD + QUOTE_END_MARKER))
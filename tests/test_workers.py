@@ -0,0 +1,84 @@
+"""
+Распределение обновлений диспетчером по процессам-обработчикам.
+"""
+import asyncio
+import queue
+
+from pyrogram import raw
+from pyrogram.dispatcher import Dispatcher
+
+from src.telegram.workers import UpdateRouter, pack, shard_key, unpack
+
+USER_ID = 123456
+GROUP_ID = 654321
+
+
+def new_message(peer: raw.base.Peer, text: str = 'цитата') -> raw.types.UpdateNewMessage:
+    message = raw.types.Message(id=1, peer_id=peer, date=0, message=text)
+    return raw.types.UpdateNewMessage(message=message, pts=1, pts_count=1)
+
+
+def test_shard_key_of_private_message_is_user():
+    assert shard_key(new_message(raw.types.PeerUser(user_id=USER_ID))) == USER_ID
+
+
+def test_shard_key_of_group_message_is_chat():
+    assert shard_key(new_message(raw.types.PeerChat(chat_id=GROUP_ID))) == -GROUP_ID
+
+
+def test_shard_key_of_callback_query_is_its_chat():
+    update = raw.types.UpdateBotCallbackQuery(
+        query_id=1, user_id=USER_ID, peer=raw.types.PeerChat(chat_id=GROUP_ID), msg_id=1, chat_instance=1
+    )
+    assert shard_key(update) == -GROUP_ID
+
+
+def test_shard_key_of_inline_query_is_user():
+    update = raw.types.UpdateBotInlineQuery(query_id=1, user_id=USER_ID, query='любовь', offset='')
+    assert shard_key(update) == USER_ID
+
+
+def test_shard_key_of_unrelated_update():
+    assert shard_key(raw.types.UpdateConfig()) == 0
+
+
+def test_pack_roundtrip():
+    update = new_message(raw.types.PeerUser(user_id=USER_ID), 'привет')
+    users = {USER_ID: raw.types.User(id=USER_ID, access_hash=42, first_name='Имя')}
+    restored, restored_users, restored_chats = unpack(pack(update, users, {}))
+    assert isinstance(restored, raw.types.UpdateNewMessage)
+    assert restored.message.peer_id.user_id == USER_ID
+    assert restored.message.message == 'привет'
+    assert list(restored_users) == [USER_ID]
+    assert restored_users[USER_ID].access_hash == 42
+    assert restored_chats == {}
+
+
+def test_router_keeps_chat_in_one_queue_and_drops_overflow():
+    queues = [queue.Queue(maxsize=2) for _ in range(3)]
+    router = UpdateRouter(queues)
+
+    async def route_all():
+        for _ in range(3):
+            await router.route(None, new_message(raw.types.PeerUser(user_id=USER_ID)), {}, {})
+
+    asyncio.run(route_all())
+    expected_queue = queues[USER_ID % len(queues)]
+    assert expected_queue.qsize() == 2
+    assert sum(q.qsize() for q in queues) == 2
+    assert (router.routed, router.dropped) == (2, 1)
+
+
+def test_dispatcher_internals_used_by_workers():
+    """
+    ``consume_updates`` запускает задачи обработки через внутренние атрибуты ``Dispatcher``
+    закреплённой в requirements.txt версии Pyrogram; тест падает, если обновление их убрало.
+    """
+    async def create():
+        return Dispatcher(client=None)
+
+    dispatcher = asyncio.run(create())
+    assert isinstance(dispatcher.locks_list, list)
+    assert isinstance(dispatcher.handler_worker_tasks, list)
+    assert isinstance(dispatcher.updates_queue, asyncio.Queue)
+    assert asyncio.iscoroutinefunction(dispatcher.handler_worker)